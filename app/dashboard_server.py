@@ -9,7 +9,7 @@ import sys
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
-from flask import Flask, render_template, jsonify, send_file, request
+from flask import Flask, render_template, jsonify, send_file, request, Response
 from pathlib import Path
 
 # Add current directory to path for imports
@@ -17,7 +17,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
 from utils.request_tracker import SmartRequestTracker
-from utils.logger import PandasCSVLogger
+from utils.logger import PandasCSVLogger, configure_logging
+from utils.metrics import PROMETHEUS_CONTENT_TYPE, render_metrics_page
 
 app = Flask(__name__)
 
@@ -49,6 +50,7 @@ class DashboardDataService:
                     "requestStatus": record.smartrequest_status,
                     "requestId": record.smartrequest_id,
                     "requestType": record.request_type,
+                    "downloadedDocuments": record.downloaded_documents,
                     "timestamp": record.timestamp
                 }
                 record_dicts.append(record_dict)
@@ -319,6 +321,16 @@ def api_dashboard_data():
         }), 500
 
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    try:
+        return Response(render_metrics_page(), content_type=PROMETHEUS_CONTENT_TYPE)
+    except Exception as e:
+        print(f"❌ Error rendering metrics: {e}")
+        return Response(f"# error rendering metrics: {e}\n", status=500, content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.route('/pdf/<path:filename>')
 def serve_pdf(filename):
     """Serve PDF files"""
@@ -454,4 +466,5 @@ def main():
 
 
 if __name__ == "__main__":
+    configure_logging()
     main()
\ No newline at end of file
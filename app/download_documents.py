@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Document Download Runner
+Polls the status of tracked SmartRequests and downloads the documents of
+fulfilled ones (medical record, request letter, invoice) into downloads/.
+
+Usage:
+    python app/download_documents.py --once
+    python app/download_documents.py --interval=300 [--workers=4] [--max_kb_per_second=0]
+        [--download_dir=downloads] [--types=MEDICAL_RECORD,REQUEST_LETTER,INVOICE] [--no_refresh]
+"""
+
+import os
+import sys
+import time
+
+# Add current directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from services.document_downloader import (DOWNLOAD_DIR, DOWNLOAD_MAX_BYTES_PER_SECOND, DOWNLOAD_WORKERS,
+                                          DocumentDownloader)
+from services.external_api_service import parse_arg
+from utils.logger import configure_logging, get_logger
+from utils.metrics import metrics
+
+log = get_logger(__name__)
+
+
+def download_once(downloader: DocumentDownloader, refresh: bool):
+    result = downloader.run(refresh=refresh)
+    log.info("📥 Documents: %s downloaded (%.1f MB), %s failed",
+             result['downloaded'], result['bytes'] / 1024 / 1024, result['failed'])
+    metrics.save()
+    return result
+
+
+if __name__ == "__main__":
+    configure_logging()
+    metrics.persist()
+    run_once = "--once" in sys.argv
+    refresh = "--no_refresh" not in sys.argv
+    interval = float(parse_arg("interval", "300"))
+    types = parse_arg("types", None)
+
+    downloader = DocumentDownloader(
+        download_dir=parse_arg("download_dir", DOWNLOAD_DIR),
+        workers=int(parse_arg("workers", str(DOWNLOAD_WORKERS))),
+        max_bytes_per_second=float(parse_arg("max_kb_per_second", str(DOWNLOAD_MAX_BYTES_PER_SECOND / 1024))) * 1024,
+        document_types=[t.strip().upper() for t in types.split(",") if t.strip()] if types else None,
+    )
+
+    print(f"🚀 Starting document downloader ({downloader.download_dir}, {downloader.workers} workers)")
+    try:
+        while True:
+            download_once(downloader, refresh)
+            if run_once:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("🛑 Document downloader stopped")
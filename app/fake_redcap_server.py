@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+"""
+Fake REDCap API Server
+Local stand-in for the REDCap API's log and record exports, backed by the
+fake_responses generators, for load testing the HTTP fetch path without the
+real REDCap.
+
+    POST content=log     log entries between beginTime and endTime, streamed
+                         as a chunked JSON array of --page_size entries per chunk
+    POST content=record  rows for records[0..n] (all records when none are
+                         given), reduced to the requested fields[0..n]
+    GET  /stats          request counters of this server
+
+Usage:
+    python app/fake_redcap_server.py [--port=8081] [--records=1000]
+        [--entries_per_record=2] [--window_hours=24] [--seed=42]
+        [--latency_ms=0] [--jitter_ms=0] [--error_rate=0] [--drop_rate=0]
+        [--page_size=100] [--chunk_delay_ms=0] [--token=<required token>]
+
+Point the app at it with:
+    ENV=dev EXTERNAL_API_END_POINT=http://127.0.0.1:8081/api/ python app/main.py
+(SmartRequest stays in faker mode while no client credentials are set.)
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+# Add current directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from fake_responses import generate_fake_detail_rows, generate_fake_log_responses
+from services.external_api_service import parse_arg
+
+REDCAP_TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+
+class FakeRedcapData:
+    """Log entries spread over the window before start-up, and lazily generated record rows"""
+
+    def __init__(self, record_count: int = 1000, entries_per_record: int = 2,
+                 window_hours: float = 24, seed: Optional[int] = None):
+        rng = random.Random(seed)
+        now = datetime.now()
+        window_minutes = max(int(window_hours * 60), 1)
+        entries = generate_fake_log_responses(record_count * entries_per_record, record_count, seed=seed)
+        for entry in entries:
+            moment = now - timedelta(minutes=rng.randint(0, window_minutes))
+            entry["timestamp"] = moment.strftime(REDCAP_TIME_FORMAT)
+        # REDCap exports the log newest first
+        entries.sort(key=lambda e: e["timestamp"], reverse=True)
+        self.log_entries = entries
+        self.record_ids = sorted({entry["record"] for entry in entries})
+        self._rows: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+
+    def log_between(self, begin_time: str = "", end_time: str = "") -> List[dict]:
+        """Entries with begin_time <= timestamp <= end_time ("YYYY-MM-DD HH:MM" compares as text)"""
+        return [entry for entry in self.log_entries
+                if (not begin_time or entry["timestamp"] >= begin_time)
+                and (not end_time or entry["timestamp"] <= end_time)]
+
+    def rows_for(self, record_id: str) -> List[dict]:
+        with self._lock:
+            rows = self._rows.get(record_id)
+            if rows is None:
+                rows = self._rows[record_id] = generate_fake_detail_rows(record_id)
+            return rows
+
+
+def _indexed_values(form: Dict[str, List[str]], name: str) -> List[str]:
+    """records[0], records[1], ... in index order"""
+    indexed = []
+    for key, values in form.items():
+        if key.startswith(f"{name}[") and key.endswith("]") and key[len(name) + 1:-1].isdigit():
+            indexed.append((int(key[len(name) + 1:-1]), values[0]))
+    return [value for _, value in sorted(indexed)]
+
+
+class FakeRedcapHandler(BaseHTTPRequestHandler):
+    """REDCap API endpoint; behaviour is configured on the server object"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive and chunked responses, like the real API
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _count(self, key: str):
+        with self.server.stats_lock:
+            self.server.stats[key] += 1
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.server.stats_lock:
+                self._send_json(200, dict(self.server.stats))
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode("utf-8"), keep_blank_values=True)
+        field = lambda name: form.get(name, [""])[0]
+        content = field("content")
+        self._count(f"{content or 'unknown'}_requests")
+
+        server = self.server
+        if server.latency > 0 or server.jitter > 0:
+            time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+        if server.token and field("token") != server.token:
+            self._count("forbidden")
+            return self._send_json(403, {"error": "You do not have permissions to use the API"})
+        if random.random() < server.error_rate:
+            self._count("injected_errors")
+            return self._send_json(500, {"error": "Injected server error"})
+
+        if content == "log":
+            self._send_log(server.data.log_between(field("beginTime"), field("endTime")))
+        elif content == "record":
+            self._send_records(_indexed_values(form, "records"), _indexed_values(form, "fields"))
+        else:
+            self._send_json(400, {"error": f"Unsupported content: {content!r}"})
+
+    def _send_records(self, record_ids: List[str], fields: List[str]):
+        rows = []
+        for record_id in record_ids or self.server.data.record_ids:
+            for row in self.server.data.rows_for(record_id):
+                rows.append({key: row.get(key, "") for key in fields} if fields else row)
+        self._count("records_returned")
+        self._send_json(200, rows)
+
+    def _send_log(self, entries: List[dict]):
+        """Stream the entries as a chunked JSON array, page_size entries per chunk"""
+        server = self.server
+        drop_at = len(entries) // 2 if random.random() < server.drop_rate else None
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write_chunk(text: str):
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        page = ["["]
+        for i, entry in enumerate(entries):
+            if i == drop_at:
+                # Cut the connection mid-body: the client sees a truncated export
+                self._count("dropped_streams")
+                self.close_connection = True
+                return
+            page.append(("," if i else "") + json.dumps(entry))
+            if len(page) > server.page_size:
+                write_chunk("".join(page))
+                page = []
+                if server.chunk_delay > 0:
+                    time.sleep(server.chunk_delay)
+        page.append("]")
+        write_chunk("".join(page))
+        self.wfile.write(b"0\r\n\r\n")
+        self._count("log_entries_returned")
+
+
+class FakeRedcapServer(ThreadingHTTPServer):
+    """Threaded server holding the fake data and the injected behaviour"""
+
+    daemon_threads = True
+
+    def __init__(self, address, data: FakeRedcapData, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, drop_rate: float = 0.0, page_size: int = 100,
+                 chunk_delay: float = 0.0, token: str = "", verbose: bool = False):
+        super().__init__(address, FakeRedcapHandler)
+        self.data = data
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.page_size = max(page_size, 1)
+        self.chunk_delay = chunk_delay
+        self.token = token
+        self.verbose = verbose
+        self.stats: Counter = Counter()
+        self.stats_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/"
+
+
+def start_in_background(server: FakeRedcapServer) -> threading.Thread:
+    """Serve on a daemon thread (tests and benchmarks); stop with server.shutdown()"""
+    thread = threading.Thread(target=server.serve_forever, name="fake-redcap", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    port = int(parse_arg("port", "8081"))
+    data = FakeRedcapData(
+        record_count=int(parse_arg("records", "1000")),
+        entries_per_record=int(parse_arg("entries_per_record", "2")),
+        window_hours=float(parse_arg("window_hours", "24")),
+        seed=int(parse_arg("seed", "42")),
+    )
+    server = FakeRedcapServer(
+        ("127.0.0.1", port), data,
+        latency=float(parse_arg("latency_ms", "0")) / 1000,
+        jitter=float(parse_arg("jitter_ms", "0")) / 1000,
+        error_rate=float(parse_arg("error_rate", "0")),
+        drop_rate=float(parse_arg("drop_rate", "0")),
+        page_size=int(parse_arg("page_size", "100")),
+        chunk_delay=float(parse_arg("chunk_delay_ms", "0")) / 1000,
+        token=parse_arg("token", ""),
+        verbose="--verbose" in sys.argv,
+    )
+    print(f"🧪 Fake REDCap serving {len(data.log_entries)} log entries for {len(data.record_ids)} records")
+    print(f"🌐 {server.url}  (stats: http://127.0.0.1:{port}/stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("🛑 Fake REDCap stopped")
+    finally:
+        server.server_close()
@@ -11,16 +11,56 @@ def generate_fake_detail_responses(mg_idpreg,count: int):
     return [generate_fake_detail_record(mg_idpreg) for i in range(count)]
 
 
-def generate_fake_log_record():
+def generate_fake_log_details(rng: random.Random = random) -> str:
+    """A details string shaped like REDCap's record log (mr_* request fields)"""
+    day = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    pairs = [
+        f"mr_emr = '{rng.choice('01')}'",
+        f"mr_req_for = '{rng.choice('123')}'",
+        f"mr_request = '{rng.choice('01')}'",
+        f"mr_request_dt = '{day}'",
+        f"mr_request_days = '{rng.randint(0, 90)}'",
+        f"mr_received = '{rng.choice('01')}'",
+        f"mr_rec_all = '{rng.choice('01')}'",
+    ]
+    pairs += [f"mr_rec_needs({n}) = {rng.choice(['checked', 'unchecked'])}"
+              for n in sorted(rng.sample(range(1, 16), rng.randint(2, 8)))]
+    pairs += [f"mr_rec_needs_inf({n}) = checked" for n in sorted(rng.sample(range(1, 14), rng.randint(0, 7)))]
+    if rng.random() < 0.5:
+        pairs += ["mr_request_2 = '1'", f"mr_request_dt_2 = '{day}'", "mr_request_days_2 = '0'"]
+    if rng.random() < 0.05:
+        # An apostrophe inside free text breaks the exact format: general-pattern fallback
+        pairs.append("mr_needs_oth = 'Patient's labs, imaging'")
+    pairs.append("medical_records_request_for_pregnancy_and_birth_complete = '0'")
+    return ", ".join(pairs)
+
+
+def generate_fake_log_record(record_id: str = None, timestamp: str = None, rng: random.Random = random):
+    """One REDCap log entry ("content=log" export shape)"""
+    record_id = record_id or f"TNSC{rng.randint(10**8, 10**9 - 1):09d}"
+    if timestamp is None:
+        moment = datetime(2025, 1, 1) + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        timestamp = moment.strftime("%Y-%m-%d %H:%M")
     return {
-            "timestamp": fake.date_time_this_year(),
-            "username": fake.user_name(),
-            "action": fake.word(),
-            "details": fake.text(),
-            "record": fake.uuid4()
+            "timestamp": timestamp,
+            "username": f"user{rng.randint(1, 50):02d}",
+            "action": f"Update record {record_id}",
+            "details": generate_fake_log_details(rng),
+            "record": record_id
         }
-def generate_fake_log_responses(count: int):
-    return [generate_fake_log_record() for i in range(count)]
+
+def generate_fake_log_responses(count: int, record_count: int = None, seed: int = None):
+    """
+    Synthetic log export of count entries
+    
+    Args:
+        count: Number of log entries
+        record_count: Distinct records the entries are spread over (default: one per entry)
+        seed: Make the output reproducible
+    """
+    rng = random.Random(seed)
+    record_ids = [f"TNSC{i:09d}" for i in range(record_count or count)]
+    return [generate_fake_log_record(rng.choice(record_ids), rng=rng) for i in range(count)]
 
 
 
@@ -29,6 +69,11 @@ def generate_fake_detail_record(mg_idpreg, count=1) -> List[RedcapResponseSecond
     """
     Generate fake records for REDCap maternal-infant health surveillance system
     """
+    return filter_records(generate_fake_detail_rows(mg_idpreg, count), RedcapResponseSecond)
+
+
+def generate_fake_detail_rows(mg_idpreg, count=1) -> List[dict]:
+    """Raw "content=record" export rows, as REDCap returns them (before filter_records)"""
     details = []
     
     for i in range(count):
@@ -295,8 +340,7 @@ def generate_fake_detail_record(mg_idpreg, count=1) -> List[RedcapResponseSecond
         }
         
         details.append(record)
-    filtered_details = filter_records(details, RedcapResponseSecond)
-    return filtered_details
+    return details
 
 # Example usage:
 if __name__ == "__main__":
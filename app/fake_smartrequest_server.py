@@ -0,0 +1,400 @@
+#!/usr/bin/env python
+"""
+Fake SmartRequest (Datavant) API Server
+HTTP stand-in for the SmartRequest API on top of SmartRequestFaker, so the
+real client (pooled session, timeouts, token refresh, 429/503 retries) can be
+exercised and benchmarked locally.
+
+    POST /v1/auth/token                             Basic auth -> bearer token
+    GET  /v1/facilities, /request-reasons, /record-types
+    POST /v1/request
+    GET  /v1/request/{id}/status
+    GET  /v1/request/{id}/download-url/{type}
+    PUT  /v1/request/{id}/cancel
+    GET  /files/{id}/{type}.pdf                     document behind a download URL (no auth,
+                                                    Range requests, Digest: sha-256=...)
+    GET  /stats                                     request counters
+
+Behaviour comes from a profile (ideal, sandbox, degraded) and can be
+overridden per endpoint (auth, facilities, reasons, record_types, create,
+status, download_url, cancel; "default" for the rest):
+    --latency=create:lognormal:400:0.5,default:uniform:20:80
+        fixed:<ms> | uniform:<min ms>:<max ms> | normal:<mean ms>:<sd ms> |
+        lognormal:<median ms>:<sigma>
+    --failures=create:0.05,default:0.01    share of calls answered with --failure_status
+    --rate_limit=10:20                      requests/s and burst; beyond it 429 + Retry-After
+    --file_kb=256 --file_drop_rate=0.2      document size, share of downloads cut off mid-body
+
+Usage:
+    python app/fake_smartrequest_server.py [--port=8082] [--profile=sandbox]
+        [--latency=...] [--failures=...] [--rate_limit=...] [--failure_status=503]
+        [--token_ttl=3600] [--file_kb=256] [--file_drop_rate=0] [--seed=42]
+
+Point the client at it with:
+    SMARTREQUEST_BASE_URL=http://127.0.0.1:8082/v1 SMARTREQUEST_CLIENT_ID=x SMARTREQUEST_CLIENT_SECRET=y ENV=dev
+"""
+
+import base64
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# Add current directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from services.external_api_service import parse_arg
+from services.smartrequest_faker import SmartRequestFaker
+
+API_PREFIX = "/v1"
+
+# (method, path pattern) -> endpoint name
+ROUTES = [
+    ("POST", re.compile(r"^/auth/token$"), "auth"),
+    ("GET", re.compile(r"^/facilities$"), "facilities"),
+    ("GET", re.compile(r"^/request-reasons$"), "reasons"),
+    ("GET", re.compile(r"^/record-types$"), "record_types"),
+    ("POST", re.compile(r"^/request$"), "create"),
+    ("GET", re.compile(r"^/request/(?P<request_id>[^/]+)/status$"), "status"),
+    ("GET", re.compile(r"^/request/(?P<request_id>[^/]+)/download-url/(?P<document_type>[^/]+)$"), "download_url"),
+    ("PUT", re.compile(r"^/request/(?P<request_id>[^/]+)/cancel$"), "cancel"),
+]
+
+FILE_ROUTE = re.compile(r"^/files/(?P<request_id>[^/]+)/(?P<document_type>[^/.]+)\.pdf$")
+RANGE_HEADER = re.compile(r"^bytes=(\d+)-$")
+
+PROFILES = {
+    "ideal": {"latency": {}, "failures": {}, "rate_limit": None},
+    "sandbox": {
+        "latency": {"auth": "lognormal:150:0.3", "create": "lognormal:400:0.4", "default": "lognormal:80:0.3"},
+        "failures": {"create": 0.01},
+        "rate_limit": "20:40",
+    },
+    "degraded": {
+        "latency": {"auth": "lognormal:600:0.6", "create": "lognormal:1500:0.8", "default": "lognormal:400:0.6"},
+        "failures": {"create": 0.1, "default": 0.05},
+        "rate_limit": "5:5",
+    },
+}
+
+
+class Latency:
+    """Per-call delay drawn from a distribution, e.g. Latency.parse("lognormal:400:0.5")"""
+
+    def __init__(self, kind: str = "fixed", *params: float):
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, *params = spec.split(":")
+        return cls(kind, *(float(p) for p in params))
+
+    def sample(self, rng: random.Random) -> float:
+        """Seconds to wait"""
+        p = self.params
+        if self.kind == "fixed":
+            ms = p[0] if p else 0.0
+        elif self.kind == "uniform":
+            ms = rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            ms = rng.gauss(p[0], p[1])
+        else:
+            ms = rng.lognormvariate(math.log(max(p[0], 1e-3)), p[1])
+        return max(ms, 0.0) / 1000
+
+
+class TokenBucket:
+    """rate requests/s with bursts up to burst; acquire() returns 0 or the seconds until a token frees up"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+def parse_endpoint_map(spec: Optional[str], convert) -> Dict[str, object]:
+    """"create:lognormal:400:0.5,default:fixed:20" -> {"create": convert("lognormal:400:0.5"), ...}"""
+    result = {}
+    for item in (spec or "").split(","):
+        if item.strip():
+            endpoint, value = item.strip().split(":", 1)
+            result[endpoint] = convert(value)
+    return result
+
+
+class FakeSmartRequestHandler(BaseHTTPRequestHandler):
+    """SmartRequest API endpoints; behaviour is configured on the server object"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def _route(self, method: str, path: str) -> Tuple[Optional[str], Dict[str, str]]:
+        if not path.startswith(API_PREFIX):
+            return None, {}
+        path = path[len(API_PREFIX):]
+        for route_method, pattern, endpoint in ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                return endpoint, match.groupdict()
+        return None, {}
+
+    def _dispatch(self, method: str):
+        server = self.server
+        parsed = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        if method == "GET" and parsed.path.rstrip("/") == "/stats":
+            with server.lock:
+                return self._send_json(200, dict(server.stats))
+        file_match = FILE_ROUTE.match(parsed.path) if method == "GET" else None
+        if file_match:
+            return self._send_file(file_match["request_id"], file_match["document_type"])
+        endpoint, params = self._route(method, parsed.path)
+        if endpoint is None:
+            return self._send_json(404, {"error": "Not found"})
+        server.count(f"{endpoint}_requests")
+
+        # Throttling happens before any work, like an API gateway
+        if server.bucket is not None:
+            wait = server.bucket.acquire()
+            if wait > 0:
+                server.count(f"{endpoint}_429")
+                return self._send_json(429, {"error": "Too Many Requests"},
+                                       {"Retry-After": str(max(1, math.ceil(wait)))})
+
+        time.sleep(server.latency_for(endpoint))
+        if server.fails(endpoint):
+            server.count(f"{endpoint}_{server.failure_status}")
+            headers = {"Retry-After": "1"} if server.failure_status == 503 else None
+            return self._send_json(server.failure_status, {"error": "Injected failure"}, headers)
+
+        if endpoint == "auth":
+            if not self.headers.get("Authorization", "").startswith("Basic "):
+                return self._send_json(401, {"error": "Missing client credentials"})
+            return self._send_json(200, server.issue_token())
+        if not server.token_valid(self.headers.get("Authorization", "")):
+            server.count(f"{endpoint}_401")
+            return self._send_json(401, {"error": "Invalid or expired token"})
+
+        faker = server.faker
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        with server.lock:
+            if endpoint == "facilities":
+                payload = faker.get_facilities(query)
+            elif endpoint == "reasons":
+                payload = faker.get_request_reasons(int(query.get("companyId", 0)))
+            elif endpoint == "record_types":
+                payload = faker.get_record_types()
+            elif endpoint == "create":
+                try:
+                    request_data = json.loads(body or b"{}")
+                except ValueError:
+                    return self._send_json(400, {"error": "Invalid JSON"})
+                payload = faker.create_request(request_data)
+            elif endpoint == "status":
+                payload = faker.get_request_status(params["request_id"])
+            elif endpoint == "download_url":
+                payload = {"url": server.file_url(params["request_id"], params["document_type"])}
+            else:
+                reason = json.loads(body or b"{}").get("reason", "")
+                payload = {"cancelled": faker.cancel_request(params["request_id"], reason)}
+        self._send_json(200, payload)
+
+    def _send_file(self, request_id: str, document_type: str):
+        """Serve the document from the Range offset on; may cut the body off halfway"""
+        server = self.server
+        server.count("file_requests")
+        time.sleep(server.latency_for("file"))
+        content = server.document(request_id, document_type)
+        offset = 0
+        match = RANGE_HEADER.match(self.headers.get("Range", ""))
+        if match:
+            offset = int(match.group(1))
+            if offset >= len(content):
+                server.count("file_416")
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(content)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            server.count("file_206")
+        body = content[offset:]
+
+        self.send_response(206 if offset else 200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        if offset:
+            self.send_header("Content-Range", f"bytes {offset}-{len(content) - 1}/{len(content)}")
+        # Digest of the whole document, also on partial responses
+        self.send_header("Digest", "sha-256=" + base64.b64encode(hashlib.sha256(content).digest()).decode("ascii"))
+        self.end_headers()
+        with server.lock:
+            drop = server.file_drop_rate > 0 and server.rng.random() < server.file_drop_rate
+        if drop:
+            server.count("file_dropped")
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class FakeSmartRequestServer(ThreadingHTTPServer):
+    """Threaded server holding the faker, tokens and the injected behaviour"""
+
+    daemon_threads = True
+
+    def __init__(self, address, profile: str = "ideal", latency: Optional[str] = None,
+                 failures: Optional[str] = None, rate_limit: Optional[str] = None,
+                 failure_status: int = 503, token_ttl: int = 3600, seed: Optional[int] = None,
+                 file_size: int = 256 * 1024, file_drop_rate: float = 0.0, verbose: bool = False):
+        super().__init__(address, FakeSmartRequestHandler)
+        settings = PROFILES[profile]
+        self.latencies = {endpoint: Latency.parse(spec) for endpoint, spec in settings["latency"].items()}
+        self.latencies.update(parse_endpoint_map(latency, Latency.parse))
+        self.failure_rates = dict(settings["failures"])
+        self.failure_rates.update(parse_endpoint_map(failures, float))
+        rate_limit = rate_limit or settings["rate_limit"]
+        if rate_limit:
+            rate, _, burst = rate_limit.partition(":")
+            self.bucket = TokenBucket(float(rate), float(burst or rate))
+        else:
+            self.bucket = None
+        self.failure_status = failure_status
+        self.token_ttl = token_ttl
+        self.file_size = file_size
+        self.file_drop_rate = file_drop_rate
+        self.verbose = verbose
+        self.faker = SmartRequestFaker()
+        self.rng = random.Random(seed)
+        self.tokens: Dict[str, float] = {}
+        self.stats: Counter = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def file_url(self, request_id: str, document_type: str) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/files/{request_id}/{document_type.lower()}.pdf"
+
+    def document(self, request_id: str, document_type: str) -> bytes:
+        """Deterministic fake PDF of file_size bytes for a request and document type"""
+        rng = random.Random(f"{request_id}/{document_type}")
+        header = f"%PDF-1.4\n% {document_type} for request {request_id}\n".encode("ascii")
+        return header + rng.randbytes(max(self.file_size - len(header), 0))
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def latency_for(self, endpoint: str) -> float:
+        latency = self.latencies.get(endpoint) or self.latencies.get("default")
+        if latency is None:
+            return 0.0
+        with self.lock:
+            return latency.sample(self.rng)
+
+    def fails(self, endpoint: str) -> bool:
+        rate = self.failure_rates.get(endpoint, self.failure_rates.get("default", 0.0))
+        with self.lock:
+            return rate > 0 and self.rng.random() < rate
+
+    def issue_token(self) -> dict:
+        with self.lock:
+            token = self.faker._generate_fake_token()
+            self.tokens[token] = time.monotonic() + self.token_ttl
+        return {"accessToken": token, "tokenType": "Bearer", "expiresIn": self.token_ttl}
+
+    def token_valid(self, authorization: str) -> bool:
+        token = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else ""
+        with self.lock:
+            expires = self.tokens.get(token)
+        return expires is not None and expires > time.monotonic()
+
+    def expire_tokens(self):
+        """Invalidate every issued token (clients must re-authenticate)"""
+        with self.lock:
+            self.tokens.clear()
+
+
+def start_in_background(server: FakeSmartRequestServer) -> threading.Thread:
+    """Serve on a daemon thread (tests and benchmarks); stop with server.shutdown()"""
+    thread = threading.Thread(target=server.serve_forever, name="fake-smartrequest", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    port = int(parse_arg("port", "8082"))
+    profile = parse_arg("profile", "sandbox")
+    server = FakeSmartRequestServer(
+        ("127.0.0.1", port), profile,
+        latency=parse_arg("latency", None),
+        failures=parse_arg("failures", None),
+        rate_limit=parse_arg("rate_limit", None),
+        failure_status=int(parse_arg("failure_status", "503")),
+        token_ttl=int(parse_arg("token_ttl", "3600")),
+        seed=int(parse_arg("seed", "42")),
+        file_size=int(parse_arg("file_kb", "256")) * 1024,
+        file_drop_rate=float(parse_arg("file_drop_rate", "0")),
+        verbose="--verbose" in sys.argv,
+    )
+    print(f"🎭 Fake SmartRequest API ({profile} profile) at {server.url}  (stats: http://127.0.0.1:{port}/stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("🛑 Fake SmartRequest API stopped")
+    finally:
+        server.server_close()
@@ -1,38 +1,94 @@
 import os
+import sys
 import json
-from datetime import datetime
+import signal
+import threading
+import time
 from models.redcap_response_first import RedcapResponseFirst
 from utils.filters import filter_records, get_latest_records
 from services.record_service import process_first_request, process_complete_second_request, process_partial_second_request
 from utils.counter import Counter
-from utils.validators import is_first_request, is_second_request_manual_not_received, is_second_request_partial_received
-from utils.logger import PandasCSVLogger
-from services.external_api_service import get_log_data_from_api
+from utils.request_classifier import classify_requests, summarize
+from utils.logger import PandasCSVLogger, configure_logging, get_logger
+from services.external_api_service import get_new_log_data_from_api, parse_arg, backfill_start
+from utils.log_cursor import log_cursor
+from utils.processing_ledger import STATUS_DEAD, processing_ledger, should_skip
+from utils.scheduler import CronSchedule, CycleLock, IntervalSchedule, run_scheduled
+from utils.metrics import metrics
+from utils.profiler import RunProfiler
+from utils.timing import stage_timings
+from services.email_dispatcher import shutdown_dispatchers
+from services.render_pool import render_pool
+from services.notification_digest import flush_all_digests
+
+log = get_logger(__name__)
+
 # Initialize logger
-logger = PandasCSVLogger(f"logs/logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", ["record", "timestamp", "username", "status", "details"])
+logger = PandasCSVLogger("logs/logs_%Y%m%d_%H%M%S.csv", ["record", "timestamp", "username", "status", "details"], per_cycle=True)
 
 
 base_output = os.path.join(os.getcwd(), "output")
 
+# --force reprocesses every record; --force=ID1,ID2 only the listed ones
+force_all = "--force" in sys.argv
+force_records = {record_id.strip() for record_id in parse_arg("force", "").split(",") if record_id.strip()}
 
-if __name__ == "__main__":
+# --classifier=pandas evaluates the request rules column-wise
+classifier_engine = parse_arg("classifier", "python")
+
+# --profile[=sample|cprofile] writes per-function stats and collapsed stacks to logs/profiles/
+run_profiler = RunProfiler.from_args()
+
+# Request types come from utils.request_classifier.REQUEST_RULES
+REQUEST_PROCESSORS = {
+    "first_request": process_first_request,
+    "second_request_complete": process_complete_second_request,
+    "second_request_partial": process_partial_second_request,
+}
+
+
+@run_profiler.wrap
+def run_cycle() -> int:
+    """
+    Fetch new log entries and process every record once
+
+    Returns:
+        int: Number of documents processed
+    """
     counter = Counter()
-    print("🚀 Starting PDF generation...")
+    started = time.monotonic()
+    # --daemon: this cycle's run log goes to a new file
+    PandasCSVLogger.new_cycle()
+    log.info("🚀 Starting PDF generation...")
 
     # Setup
-    template_path = os.path.join(os.getcwd(), "assets/templates/infant_template.docx")
     output_dir = "output"
     os.makedirs(output_dir, exist_ok=True)
 
-    result = get_log_data_from_api()
-    # Filter records with non-empty details
-    filtered = [entry for entry in result if entry["details"].strip()]
-    # Get latest records
-    latest_records = get_latest_records(filtered)
+    # Streamed and reduced to the newest entry per record (empty details dropped)
+    batch, is_backfill = get_new_log_data_from_api(log_cursor)
+    # Log timestamps of records whose processing failed; the cursor stays before the earliest
+    failed_timestamps = []
+
+    def record_failure(record, request_type):
+        # Retried next run (only its failed documents) until it is dead-lettered
+        if processing_ledger.mark_failed(record.record, request_type, record.details) == STATUS_DEAD:
+            metrics.inc("medicos_records_dead_lettered_total", request_type=request_type)
+            log.error("❌ %s failed %s times as %s; dead-lettered, rerun it with --force=%s",
+                      record.record, processing_ledger.max_attempts, request_type, record.record)
+        else:
+            failed_timestamps.append(record.timestamp)
+    # Parse the details of the winning entries
+    latest_records = get_latest_records(batch.latest())
     if latest_records:
-        print(f"🔎 {len(latest_records)} records found.")
+        log.info("🔎 %s records found.", len(latest_records))
         filtered_records:list[RedcapResponseFirst] = filter_records(latest_records, RedcapResponseFirst)
-        for record in filtered_records:
+        request_types = classify_requests(filtered_records, classifier_engine)
+        log.info("🗂️ Request types: %s", summarize(request_types))
+        for request_type in request_types:
+            metrics.inc("medicos_records_total", request_type=request_type or "none")
+        processed_records = []
+        for record, request_type in zip(filtered_records, request_types):
             logger.log({
                 "record": record.record,
                 "timestamp": record.timestamp,
@@ -41,19 +97,123 @@ if __name__ == "__main__":
                 "details": ", ".join(f"{key} = {value}" for key, value in record.details.items()) + ","
             })
 
-            if is_first_request(record):
-                process_first_request(record,counter)
-            elif is_second_request_manual_not_received(record):
-                process_complete_second_request(record,counter)
-            elif is_second_request_partial_received(record):
-                process_partial_second_request(record,counter)
+            if request_type is None:
+                log.error("❌ No action needed for %s", record.record)
+            elif should_skip(processing_ledger, record.record, request_type, record.details,
+                             force_all, force_records):
+                log.info("⏭️ %s already processed as %s with these values", record.record, request_type)
             else:
-                print(f"❌ No action needed for {record.record}")
-        print(f"✅ PDF Generation Completed {counter.value()}")
+                forced = force_all or record.record in force_records
+                with run_profiler.record(), render_pool.collect(record.record), \
+                        processing_ledger.record(record.record, request_type, record.details, redo=forced):
+                    processed = REQUEST_PROCESSORS[request_type](record, counter)
+                if processed:
+                    processed_records.append((record, request_type))
+                else:
+                    record_failure(record, request_type)
+        # With PDF_WORKERS > 1 PDFs are still rendering: a record only counts as processed once they are done
+        failed_records = render_pool.wait()
+        for record, request_type in processed_records:
+            if record.record not in failed_records:
+                processing_ledger.mark_processed(record.record, request_type, record.details)
+            else:
+                record_failure(record, request_type)
+        log.info("✅ PDF Generation Completed %s", counter.value())
     else:
-        print("⚠️ No records received from API.")
+        log.warning("⚠️ No records received from API.")
+
+    # Checkpoint only after the entries were handled, so an interrupted run is retried;
+    # a stream that broke off part-way is fetched again in full
+    if not is_backfill and batch.complete:
+        if failed_timestamps:
+            first_failure = min(failed_timestamps)
+            log.warning("⚠️ %s records failed; log cursor kept before %s so they are retried next run",
+                        len(failed_timestamps), first_failure)
+            log_cursor.advance_before(batch.latest(), first_failure)
+        else:
+            log_cursor.advance(batch.watermark_entries)
+    report_stage_timings(counter.value())
+    report_cycle_metrics(counter.value(), time.monotonic() - started)
+    return counter.value()
+
+
+def report_stage_timings(documents: int):
+    """Log this cycle's p50/p95/p99 per stage, append it to the run summaries, and start over"""
+    if len(stage_timings):
+        log.info("⏱️ Stage timings:")
+        for line in stage_timings.format_summary():
+            log.info("   %s", line)
+        stage_timings.write_summary(documents=documents)
+    stage_timings.reset()
 
-    exit()
 
+def report_cycle_metrics(documents: int, duration: float):
+    """Count the finished cycle and write this process's metrics snapshot for /metrics"""
+    metrics.inc("medicos_cycles_total")
+    metrics.inc("medicos_documents_processed_total", documents)
+    metrics.set("medicos_last_cycle_timestamp_seconds", time.time())
+    metrics.set("medicos_last_cycle_duration_seconds", round(duration, 3))
+    metrics.save()
 
-        # Data input
+
+def get_schedule():
+    """--cron='*/15 * * * *' or --interval=<seconds> (default 900)"""
+    cron_expression = parse_arg("cron", None)
+    if cron_expression:
+        return CronSchedule(cron_expression)
+    return IntervalSchedule(float(parse_arg("interval", "900")))
+
+
+def run_daemon():
+    """
+    Run cycles on a schedule in one long-lived process
+
+    Imports, the facility index, SMTP/HTTP connections, the SmartRequest
+    token and template files stay warm between cycles.
+    """
+    if backfill_start or force_all or force_records:
+        log.error("❌ --backfill_start and --force apply to a single run; start them without --daemon")
+        sys.exit(1)
+
+    schedule = get_schedule()
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        log.info("🛑 Received signal %s, stopping after the current cycle...", signum)
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    log.info("🔁 Daemon mode: running %s", schedule)
+    run_scheduled(run_cycle, schedule, stop_event, lock=CycleLock())
+    log.info("👋 Daemon stopped")
+
+
+def shutdown():
+    """Finish PDF renders, then deliver pending digests and queued notification emails"""
+    render_pool.shutdown()
+    # Digests are handed to the dispatchers, so they go out before the queues are closed
+    flush_all_digests()
+    shutdown_dispatchers()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    metrics.persist()
+    try:
+        if "--daemon" in sys.argv:
+            run_daemon()
+        else:
+            # A one-shot run never overlaps a daemon cycle or another cron run
+            lock = CycleLock()
+            if not lock.acquire():
+                print(f"⏳ Another run is in progress ({lock.lock_file}), exiting")
+                exit(1)
+            try:
+                run_cycle()
+            finally:
+                lock.release()
+    finally:
+        shutdown()
+    exit()
@@ -1,10 +1,11 @@
 from dataclasses import dataclass, field, fields
+from operator import attrgetter
 import optparse
 from typing import Any, Optional, Union
 import re
 
 
-@dataclass
+@dataclass(slots=True)
 class RedcapResponseSecond:
     # Core identifiers
     DELIVERY_DATE:Optional[str]=""
@@ -541,240 +542,76 @@ class RedcapResponseSecond:
     mr_dv: Optional[str] = ""
 
     def __post_init__(self):
-        for f in fields(self):
-            if f.metadata.get("checkbox"):
-                val = getattr(self, f.name)
-                if val in [1, "1", True]:
-                    setattr(self, f.name, "☑")
-                else:
-                    setattr(self, f.name, "☐")
-            if f.metadata.get("prefix"):
-                val = getattr(self, f.name)
-                if val:
-                    setattr(self, f.name, f'{f.metadata.get("prefix_str")} {val}')
+        for name in _CHECKBOX_FIELDS:
+            if getattr(self, name) in [1, "1", True]:
+                setattr(self, name, "☑")
+            else:
+                setattr(self, name, "☐")
+        for name, prefix_str in _PREFIXED_FIELDS:
+            val = getattr(self, name)
+            if val:
+                setattr(self, name, f'{prefix_str} {val}')
 
     def to_dict(self):
         """Convert the dataclass instance to a dictionary."""
-        return {
+        values = dict(zip(_TEMPLATE_KEYS, _template_values(self)))
+        for name in MASKED_FIELDS:
+            values[name] = values[name][-4:] if values[name] else ""
+        return values
 
-            "mg_idpreg": self.mg_idpreg,
-            "DELIVERY_DATE": self.DELIVERY_DATE,
-            "hospital_phone_num": self.hospital_phone_num,
-            "hospital_fax_num": self.hospital_fax_num,
-            "hospital_mr": self.hospital_mr,
-            "hospital_mr_vr": self.hospital_mr_vr,
-            "phys_name": self.phys_name,
-            "physician_phone_num": self.physician_phone_num,
-            "physician_fax_num": self.physician_fax_num,
-            "redcap_repeat_instrument": self.redcap_repeat_instrument,
-            "redcap_repeat_instance": self.redcap_repeat_instance,
-            "mg_idpreg_sp": self.mg_idpreg_sp,
-            "mg_mra_done": self.mg_mra_done,
-            "mg_ltfu": self.mg_ltfu,
-            "mg_ltfu_why": self.mg_ltfu_why,
-            "mg_ltfu_why_sp": self.mg_ltfu_why_sp,
-            "mg_dob": self.mg_dob,
-            "mg_race_aian": self.mg_race_aian,
-            "mg_race_asian": self.mg_race_asian,
-            "mg_race_baa": self.mg_race_baa,
-            "mg_race_mena": self.mg_race_mena,
-            "mg_race_nhopi": self.mg_race_nhopi,
-            "mg_race_wh": self.mg_race_wh,
-            "mg_race_oth": self.mg_race_oth,
-            "mg_ethn": self.mg_ethn,
-            "mg_edu": self.mg_edu,
-            "mg_zip": self.mg_zip,
-            "mg_co": self.mg_co,
-            "mg_tract": self.mg_tract,
-            "mg_ht": self.mg_ht,
-            "mg_ppwt": self.mg_ppwt,
-            "mg_dewt": self.mg_dewt,
-            "mg_ppcon_diabetes": self.mg_ppcon_diabetes,
-            "mg_cron_htn": self.mg_cron_htn,
-            "mg_sub_alc": self.mg_sub_alc,
-            "mg_sub_tobacco": self.mg_sub_tobacco,
-            "mg_gravidity": self.mg_gravidity,
-            "mg_parity": self.mg_parity,
-            "mg_lmp": self.mg_lmp,
-            "mg_edd": self.mg_edd,
-            "mg_pn": self.mg_pn,
-            "mg_pn_dt": self.mg_pn_dt,
-            "mg_pn_num": self.mg_pn_num,
-            "mg_pregcon_diabetes": self.mg_pregcon_diabetes,
-            "mg_pregcon_eclamphtn": self.mg_pregcon_eclamphtn,
-            "mg_pregcon_fgr": self.mg_pregcon_fgr,
-            "mg_hosp_yn": self.mg_hosp_yn,
-            "mg_death": self.mg_death,
-            "mg_death_dt": self.mg_death_dt,
-            "mg_death_dx": self.mg_death_dx,
-            "mg_insur": self.mg_insur,
-            "mg_plurality_de": self.mg_plurality_de,
-            "mg_decon_icu": self.mg_decon_icu,
-            "mg_decon_icuadm_dt": self.mg_decon_icuadm_dt,
-            "mc_yn": self.mc_yn,
-            "mc_idnndss": self.mc_idnndss,
-            "mc_drugs": self.mc_drugs,
-            "mc_sub_mj": self.mc_sub_mj,
-            "mc_sub_op_rx": self.mc_sub_op_rx,
-            "mc_sub_op_il": self.mc_sub_op_il,
-            "mc_sub_op_moud": self.mc_sub_op_moud,
-            "mc_sub_meth": self.mc_sub_meth,
-            "mc_sub_coc": self.mc_sub_coc,
-            "mc_sub_oth": self.mc_sub_oth,
-            "mc_sub_oth_sp": self.mc_sub_oth_sp,
-            "mc_jail": self.mc_jail,
-            "mc_homeless": self.mc_homeless,
-            "mc_dpdx": self.mc_dpdx,
-            "mc_dpdx_dt": self.mc_dpdx_dt,
-            "mc_tx": self.mc_tx,
-            "mc_hiv": self.mc_hiv,
-            "mc_hbv": self.mc_hbv,
-            "mc_chol": self.mc_chol,
-            "mc_chol_dt": self.mc_chol_dt,
-            "mc_test_amnio": self.mc_test_amnio,
-            "mc_fetalmonitor": self.mc_fetalmonitor,
-            "mc_de_h": self.mc_de_h,
-            "mc_de_prolong": self.mc_de_prolong,
-            "mc_laceration": self.mc_laceration,
-            "mg_notes": self.mg_notes,
-            "pregnant_person_form_complete": self.pregnant_person_form_complete,
-            "bg_idbaby": self.bg_idbaby,
-            "bg_mra_done": self.bg_mra_done,
-            "bg_ltfu": self.bg_ltfu,
-            "bg_ltfu_why": self.bg_ltfu_why,
-            "bg_ltfu_why_sp": self.bg_ltfu_why_sp,
-            "bg_detype": self.bg_detype,
-            "bg_outcome": self.bg_outcome,
-            "bg_outcome_dt": self.bg_outcome_dt,
-            "bg_birvol": self.bg_birvol,
-            "bg_ga_w": self.bg_ga_w,
-            "bg_ga_d": self.bg_ga_d,
-            "bg_sex": self.bg_sex,
-            "bg_exm_yn": self.bg_exm_yn,
-            "bg_exm_gen": self.bg_exm_gen,
-            "bg_exm_gen_sp": self.bg_exm_gen_sp,
-            "bg_exm_heent": self.bg_exm_heent,
-            "bg_exm_heent_sp": self.bg_exm_heent_sp,
-            "bg_exm_cardio": self.bg_exm_cardio,
-            "bg_exm_cardio_sp": self.bg_exm_cardio_sp,
-            "bg_exm_lung": self.bg_exm_lung,
-            "bg_exm_lung_sp": self.bg_exm_lung_sp,
-            "bg_exm_abd": self.bg_exm_abd,
-            "bg_exm_abd_sp": self.bg_exm_abd_sp,
-            "bg_exm_gu": self.bg_exm_gu,
-            "bg_exm_gu_sp": self.bg_exm_gu_sp,
-            "bg_exm_muske": self.bg_exm_muske,
-            "bg_exm_muske_sp": self.bg_exm_muske_sp,
-            "bg_exm_neuro": self.bg_exm_neuro,
-            "bg_exm_neuro_sp": self.bg_exm_neuro_sp,
-            "bg_exm_skin": self.bg_exm_skin,
-            "bg_exm_skin_sp": self.bg_exm_skin_sp,
-            "bg_exm_sp": self.bg_exm_sp,
-            "bg_lt": self.bg_lt,
-            "bg_wt": self.bg_wt,
-            "bg_hc": self.bg_hc,
-            "bg_bstfed": self.bg_bstfed,
-            "bg_dis_dt": self.bg_dis_dt,
-            "bg_dischargecare": self.bg_dischargecare,
-            "bg_dischargecare_sp": self.bg_dischargecare_sp,
-            "bg_cps": self.bg_cps,
-            "bg_death": self.bg_death,
-            "bg_death_dt": self.bg_death_dt,
-            "bg_death_dx": self.bg_death_dx,
-            "bg_icu": self.bg_icu,
-            "bg_icudis_dt": self.bg_icudis_dt,
-            "bg_hear_oae": self.bg_hear_oae,
-            "bg_hear_abr": self.bg_hear_abr,
-            "bg_hear_unk": self.bg_hear_unk,
-            "bc_momnamefirst": self.bc_momnamefirst,
-            "bc_momnamelast": self.bc_momnamelast,
-            "bc_mom_dob":self.bc_mom_dob,
-            "bc_momssn": self.bc_momssn[-4:] if self.bc_momssn else "",
-            "bc_childnamefirst": self.bc_childnamefirst,
-            "bc_childnamelast": self.bc_childnamelast,
-            "bc_childssn": self.bc_childssn[-4:] if self.bc_childssn else "",
-            "inf_dob_mom_tr": self.inf_dob_mom_tr,
-            "hos_name_cat_2": self.hos_name_cat_2,
 
-            "mr_req_for" : self.mr_req_for,
-            "mr_request": self.mr_request,
-            "mr_request_dt": self.mr_request_dt,
-            "mr_request_days": self.mr_request_days,
-            "mr_received": self.mr_received,
-            "mr_rec_all": self.mr_rec_all,
+# Field metadata resolved once instead of on every instance
+_CHECKBOX_FIELDS = tuple(f.name for f in fields(RedcapResponseSecond) if f.metadata.get("checkbox"))
+_PREFIXED_FIELDS = tuple((f.name, f.metadata.get("prefix_str"))
+                         for f in fields(RedcapResponseSecond) if f.metadata.get("prefix"))
 
-            "mr_request_2": self.mr_request_2,
-            "mr_request_dt_2": self.mr_request_dt_2,
-            'mr_received_2': self.mr_received_2,
-            "mr_rec_all_2": self.mr_rec_all_2,
-
-            "mr_rec_needs___1": self.mr_rec_needs___1,
-            "mr_rec_needs___2": self.mr_rec_needs___2,
-            "mr_rec_needs___3": self.mr_rec_needs___3,
-            "redcap_repeat_instrument": self.redcap_repeat_instrument,
-            "redcap_repeat_instance": self.redcap_repeat_instance,
-            "ifu_fac_phone": self.ifu_fac_phone,
-            "ifu_fac_num": self.ifu_fac_num,
-            "mr_rec_needs___4": self.mr_rec_needs___4,
-            "mr_rec_needs___6": self.mr_rec_needs___6,
-            "mr_rec_needs___7": self.mr_rec_needs___7,
-            "mr_rec_needs___8": self.mr_rec_needs___8,
-            "mr_rec_needs___9": self.mr_rec_needs___9,
-            "mr_rec_needs___10": self.mr_rec_needs___10,
-            "mr_rec_needs___11": self.mr_rec_needs___11,
-            "mr_rec_needs___12": self.mr_rec_needs___12,
-            "mr_rec_needs___13": self.mr_rec_needs___13,
-            "mr_rec_needs___14": self.mr_rec_needs___14,
-            "mr_rec_needs___15": self.mr_rec_needs___15,
-            "mr_rec_needs___88": self.mr_rec_needs___88,
-            "mr_needs_oth": self.mr_needs_oth,
-            "mr_rec_needs_inf___1": self.mr_rec_needs_inf___1,
-            "mr_rec_needs_inf___2": self.mr_rec_needs_inf___2,
-            "mr_rec_needs_inf___3": self.mr_rec_needs_inf___3,
-            "mr_rec_needs_inf___4": self.mr_rec_needs_inf___4,
-            "mr_rec_needs_inf___5": self.mr_rec_needs_inf___5,
-            "mr_rec_needs_inf___6": self.mr_rec_needs_inf___6,
-            "mr_rec_needs_inf___7": self.mr_rec_needs_inf___7,
-            "mr_rec_needs_inf___8": self.mr_rec_needs_inf___8,
-            "mr_rec_needs_inf___9": self.mr_rec_needs_inf___9,
-            "mr_rec_needs_inf___10": self.mr_rec_needs_inf___10,
-            "mr_rec_needs_inf___11": self.mr_rec_needs_inf___11,
-            "mr_rec_needs_inf___12": self.mr_rec_needs_inf___12,
-            "mr_rec_needs_inf___13": self.mr_rec_needs_inf___13,
-            "mr_rec_needs_inf___88": self.mr_rec_needs_inf___88,
-            "mr_needs_oth_inf": self.mr_needs_oth_inf,
-            "mr_emr_needs___1": self.mr_emr_needs___1,
-            "mr_emr_needs___2": self.mr_emr_needs___2,
-            "mr_emr_needs___3": self.mr_emr_needs___3,
-            "mr_emr_needs___4": self.mr_emr_needs___4,
-            "mr_emr_needs___5": self.mr_emr_needs___5,
-            "mr_emr_needs___6": self.mr_emr_needs___6,
-            "mr_emr_needs___7": self.mr_emr_needs___7,
-            "mr_emr_needs___8": self.mr_emr_needs___8,
-            "mr_emr_needs___9": self.mr_emr_needs___9,
-            "mr_emr_needs___10": self.mr_emr_needs___10,
-            "mr_emr_needs___11": self.mr_emr_needs___11,
-            "mr_emr_needs___12": self.mr_emr_needs___12,
-            "mr_emr_needs___13": self.mr_emr_needs___13,
-            "mr_emr_needs___88": self.mr_emr_needs___88,
-            "mr_emr_needs_inf___1": self.mr_emr_needs_inf___1,
-            "mr_emr_needs_inf___2": self.mr_emr_needs_inf___2,
-            "mr_emr_needs_inf___3": self.mr_emr_needs_inf___3,
-            "mr_emr_needs_inf___4": self.mr_emr_needs_inf___4,
-            "mr_emr_needs_inf___5": self.mr_emr_needs_inf___5,
-            "mr_emr_needs_inf___6": self.mr_emr_needs_inf___6,
-            "mr_emr_needs_inf___7": self.mr_emr_needs_inf___7,
-            "mr_emr_needs_inf___8": self.mr_emr_needs_inf___8,
-            "mr_emr_needs_inf___9": self.mr_emr_needs_inf___9,
-            "mr_emr_needs_inf___10": self.mr_emr_needs_inf___10,
-            "mr_emr_needs_inf___11": self.mr_emr_needs_inf___11,
-            "mr_emr_needs_inf___12": self.mr_emr_needs_inf___12,
-            "mr_emr_needs_inf___13": self.mr_emr_needs_inf___13,
-            "mr_emr_needs_inf___88": self.mr_emr_needs_inf___88,
-            "hos_name": self.hos_name,
-            "dob_inf" :self.dob_inf,
-            "bc_childssn":self.bc_childssn[-4:] if self.bc_childssn else "" ,
-            "bc_momnamemaidenlast":self.bc_momnamemaidenlast,
-            "mr_dev":self.mr_dv
-}
-    
\ No newline at end of file
+# Fields handed to the document templates by to_dict, in template order
+TEMPLATE_FIELDS = (
+    "mg_idpreg", "DELIVERY_DATE", "hospital_phone_num", "hospital_fax_num", "hospital_mr",
+    "hospital_mr_vr", "phys_name", "physician_phone_num", "physician_fax_num",
+    "redcap_repeat_instrument", "redcap_repeat_instance", "mg_idpreg_sp", "mg_mra_done", "mg_ltfu",
+    "mg_ltfu_why", "mg_ltfu_why_sp", "mg_dob", "mg_race_aian", "mg_race_asian", "mg_race_baa",
+    "mg_race_mena", "mg_race_nhopi", "mg_race_wh", "mg_race_oth", "mg_ethn", "mg_edu", "mg_zip",
+    "mg_co", "mg_tract", "mg_ht", "mg_ppwt", "mg_dewt", "mg_ppcon_diabetes", "mg_cron_htn",
+    "mg_sub_alc", "mg_sub_tobacco", "mg_gravidity", "mg_parity", "mg_lmp", "mg_edd", "mg_pn",
+    "mg_pn_dt", "mg_pn_num", "mg_pregcon_diabetes", "mg_pregcon_eclamphtn", "mg_pregcon_fgr",
+    "mg_hosp_yn", "mg_death", "mg_death_dt", "mg_death_dx", "mg_insur", "mg_plurality_de",
+    "mg_decon_icu", "mg_decon_icuadm_dt", "mc_yn", "mc_idnndss", "mc_drugs", "mc_sub_mj",
+    "mc_sub_op_rx", "mc_sub_op_il", "mc_sub_op_moud", "mc_sub_meth", "mc_sub_coc", "mc_sub_oth",
+    "mc_sub_oth_sp", "mc_jail", "mc_homeless", "mc_dpdx", "mc_dpdx_dt", "mc_tx", "mc_hiv",
+    "mc_hbv", "mc_chol", "mc_chol_dt", "mc_test_amnio", "mc_fetalmonitor", "mc_de_h",
+    "mc_de_prolong", "mc_laceration", "mg_notes", "pregnant_person_form_complete", "bg_idbaby",
+    "bg_mra_done", "bg_ltfu", "bg_ltfu_why", "bg_ltfu_why_sp", "bg_detype", "bg_outcome",
+    "bg_outcome_dt", "bg_birvol", "bg_ga_w", "bg_ga_d", "bg_sex", "bg_exm_yn", "bg_exm_gen",
+    "bg_exm_gen_sp", "bg_exm_heent", "bg_exm_heent_sp", "bg_exm_cardio", "bg_exm_cardio_sp",
+    "bg_exm_lung", "bg_exm_lung_sp", "bg_exm_abd", "bg_exm_abd_sp", "bg_exm_gu", "bg_exm_gu_sp",
+    "bg_exm_muske", "bg_exm_muske_sp", "bg_exm_neuro", "bg_exm_neuro_sp", "bg_exm_skin",
+    "bg_exm_skin_sp", "bg_exm_sp", "bg_lt", "bg_wt", "bg_hc", "bg_bstfed", "bg_dis_dt",
+    "bg_dischargecare", "bg_dischargecare_sp", "bg_cps", "bg_death", "bg_death_dt", "bg_death_dx",
+    "bg_icu", "bg_icudis_dt", "bg_hear_oae", "bg_hear_abr", "bg_hear_unk", "bc_momnamefirst",
+    "bc_momnamelast", "bc_mom_dob", "bc_momssn", "bc_childnamefirst", "bc_childnamelast",
+    "bc_childssn", "inf_dob_mom_tr", "hos_name_cat_2", "mr_req_for", "mr_request", "mr_request_dt",
+    "mr_request_days", "mr_received", "mr_rec_all", "mr_request_2", "mr_request_dt_2",
+    "mr_received_2", "mr_rec_all_2", "mr_rec_needs___1", "mr_rec_needs___2", "mr_rec_needs___3",
+    "ifu_fac_phone", "ifu_fac_num", "mr_rec_needs___4", "mr_rec_needs___6", "mr_rec_needs___7",
+    "mr_rec_needs___8", "mr_rec_needs___9", "mr_rec_needs___10", "mr_rec_needs___11",
+    "mr_rec_needs___12", "mr_rec_needs___13", "mr_rec_needs___14", "mr_rec_needs___15",
+    "mr_rec_needs___88", "mr_needs_oth", "mr_rec_needs_inf___1", "mr_rec_needs_inf___2",
+    "mr_rec_needs_inf___3", "mr_rec_needs_inf___4", "mr_rec_needs_inf___5", "mr_rec_needs_inf___6",
+    "mr_rec_needs_inf___7", "mr_rec_needs_inf___8", "mr_rec_needs_inf___9",
+    "mr_rec_needs_inf___10", "mr_rec_needs_inf___11", "mr_rec_needs_inf___12",
+    "mr_rec_needs_inf___13", "mr_rec_needs_inf___88", "mr_needs_oth_inf", "mr_emr_needs___1",
+    "mr_emr_needs___2", "mr_emr_needs___3", "mr_emr_needs___4", "mr_emr_needs___5",
+    "mr_emr_needs___6", "mr_emr_needs___7", "mr_emr_needs___8", "mr_emr_needs___9",
+    "mr_emr_needs___10", "mr_emr_needs___11", "mr_emr_needs___12", "mr_emr_needs___13",
+    "mr_emr_needs___88", "mr_emr_needs_inf___1", "mr_emr_needs_inf___2", "mr_emr_needs_inf___3",
+    "mr_emr_needs_inf___4", "mr_emr_needs_inf___5", "mr_emr_needs_inf___6", "mr_emr_needs_inf___7",
+    "mr_emr_needs_inf___8", "mr_emr_needs_inf___9", "mr_emr_needs_inf___10",
+    "mr_emr_needs_inf___11", "mr_emr_needs_inf___12", "mr_emr_needs_inf___13",
+    "mr_emr_needs_inf___88", "hos_name", "dob_inf", "bc_momnamemaidenlast",
+)
+# Only the last four digits of these leave the model
+MASKED_FIELDS = ("bc_momssn", "bc_childssn")
+# The templates call mr_dv "mr_dev"
+_TEMPLATE_KEYS = TEMPLATE_FIELDS + ("mr_dev",)
+_template_values = attrgetter(*TEMPLATE_FIELDS, "mr_dv")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Outbox Drainer
+Retries SmartRequest submissions and emails that failed during a run,
+without re-running the time window or regenerating PDFs.
+
+A SmartRequest submission whose outcome is unknown (timeout, 5xx) may have
+created the request, so it is not resubmitted but held for manual review.
+After checking SmartRequest, release it for another attempt or resolve it.
+
+Usage:
+    python app/outbox_drainer.py --once
+    python app/outbox_drainer.py --interval=60
+    python app/outbox_drainer.py --review
+    python app/outbox_drainer.py --release=<key>   (no request was created: retry it)
+    python app/outbox_drainer.py --resolve=<key>   (the request exists: mark it done)
+"""
+
+import os
+import sys
+import time
+from typing import Any, Dict
+
+# Add current directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from services.email_dispatcher import EmailDispatcher
+from services.external_api_service import get_smartrequest_service, parse_arg
+from services.sas_email_service import SASEmailService
+from services.smartrequest_service import SmartRequestOutcomeUnknown
+from utils.dashboard_tracker import track_smartrequest_success
+from utils.logger import configure_logging, get_logger
+from utils.metrics import metrics
+from utils.outbox import KIND_EMAIL, KIND_SMARTREQUEST, NeedsReview, outbox
+from utils.request_tracker import track_smartrequest
+
+log = get_logger(__name__)
+
+
+def retry_smartrequest(payload: Dict[str, Any]) -> bool:
+    """Resubmit a stored SmartRequest body and record the new request ID"""
+    try:
+        result = get_smartrequest_service().create_request(payload["request"])
+    except SmartRequestOutcomeUnknown as e:
+        raise NeedsReview(f"request may have been created: {e}") from e
+    if not result or not result.get("requestId"):
+        return False
+
+    request_id = result["requestId"]
+    track_smartrequest_success(payload["record_id"], request_id)
+    track_smartrequest(
+        request_id=request_id,
+        record_id=payload["mg_idpreg"],
+        document_type=payload["document_type"],
+        patient_name=payload.get("patient_name"),
+        facility_name=payload.get("facility_name")
+    )
+    return True
+
+
+class EmailRetry:
+    """Resends stored emails over one connection; failures stay in the outbox"""
+
+    def __init__(self):
+        self._dispatcher = None
+
+    def __call__(self, payload: Dict[str, Any]) -> bool:
+        if self._dispatcher is None:
+            settings = SASEmailService(background=False, digest=False).get_smtp_settings()
+            # No on_failure callback: the drainer reschedules the existing outbox item itself
+            self._dispatcher = EmailDispatcher(settings['server'], settings['port'], settings['from_email'])
+        return self._dispatcher.send(payload["to_email"], payload["subject"], payload["body"])
+
+    def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.close()
+            self._dispatcher = None
+
+
+def drain_once(handlers) -> Dict[str, int]:
+    result = outbox.drain(handlers)
+    stats = outbox.stats()
+    log.info("📤 Outbox: %s delivered, %s rescheduled, %s dead, %s to review "
+             "(%s pending, %s dead, %s in review in total)",
+             result['delivered'], result['failed'], result['dead'], result['review'],
+             stats['pending'], stats['dead'], stats['review'])
+    metrics.save()
+    return result
+
+
+if __name__ == "__main__":
+    configure_logging()
+    metrics.persist()
+    run_once = "--once" in sys.argv
+    interval = float(parse_arg("interval", "60"))
+
+    if "--review" in sys.argv:
+        for item in outbox.in_review():
+            print(f"   {item.idempotency_key} ({item.kind}): {item.last_error}")
+        sys.exit(0)
+    release_key, resolve_key = parse_arg("release", None), parse_arg("resolve", None)
+    if release_key or resolve_key:
+        updated = outbox.release(release_key) if release_key else outbox.mark_done(resolve_key)
+        if not updated:
+            print(f"❌ No outbox item {release_key or resolve_key}" + (" in review" if release_key else ""))
+        sys.exit(0 if updated else 1)
+
+    email_retry = EmailRetry()
+    handlers = {
+        KIND_SMARTREQUEST: retry_smartrequest,
+        KIND_EMAIL: email_retry,
+    }
+
+    print(f"🚀 Starting outbox drainer ({outbox.db_path})")
+    try:
+        while True:
+            drain_once(handlers)
+            if run_once:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("🛑 Outbox drainer stopped")
+    finally:
+        email_retry.close()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+"""
+Document Downloader
+Fetches the documents of fulfilled SmartRequests ("Record Available" in the
+SmartRequestTracker) into downloads/<record_id>/<request_id>_<type>.pdf.
+
+Downloads run on a thread pool and stream to a .part file in CHUNK_SIZE
+pieces, so a document is never held in memory and an interrupted download
+resumes with a Range request on the next run. A finished file is checked
+against the size and SHA-256 the server announced (Content-Length /
+Content-Range, Digest / Repr-Digest / X-Checksum-SHA256) before it is moved
+into place and recorded in the request tracker and the dashboard.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.dashboard_tracker import track_document_downloaded
+from utils.logger import get_logger
+from utils.metrics import metrics
+from utils.request_tracker import RequestRecord, SmartRequestTracker, request_tracker
+from utils.timing import time_stage
+
+log = get_logger(__name__)
+
+DOWNLOAD_DIR = os.getenv("DOWNLOAD_DIR", "downloads")
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "4"))
+# Combined limit of all workers; 0 = unlimited
+DOWNLOAD_MAX_BYTES_PER_SECOND = int(os.getenv("DOWNLOAD_MAX_BYTES_PER_SECOND", "0"))
+DOWNLOAD_DOCUMENT_TYPES = [t.strip() for t in os.getenv(
+    "DOWNLOAD_DOCUMENT_TYPES", "MEDICAL_RECORD,REQUEST_LETTER,INVOICE").split(",") if t.strip()]
+CHUNK_SIZE = 64 * 1024
+FULFILLED_STATUS = "Record Available"
+# (connect, read) seconds; the read timeout applies between chunks, not to the whole file
+DOWNLOAD_TIMEOUT = (10, 60)
+
+
+class BandwidthLimiter:
+    """Caps the combined throughput of all download threads at rate bytes/s (0 = unlimited)"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, size: int):
+        """Wait until size more bytes fit within the rate"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._next = max(self._next, now) + size / self.rate
+            wait = self._next - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+def announced_sha256(response: requests.Response) -> Optional[str]:
+    """Hex SHA-256 of the whole document from the response headers, if the server sent one"""
+    checksum = response.headers.get("X-Checksum-SHA256")
+    if checksum:
+        return checksum.strip().lower()
+    for header in ("Repr-Digest", "Digest"):
+        for item in response.headers.get(header, "").split(","):
+            algorithm, _, value = item.strip().partition("=")
+            if algorithm.lower() == "sha-256" and value:
+                try:
+                    # Repr-Digest wraps the value in colons (RFC 9530)
+                    return base64.b64decode(value.strip(":")).hex()
+                except (binascii.Error, ValueError):
+                    log.warning("⚠️ Unreadable %s header: %s", header, value)
+    return None
+
+
+def total_size(response: requests.Response, offset: int) -> Optional[int]:
+    """Full document size from Content-Range (206) or Content-Length (200)"""
+    content_range = response.headers.get("Content-Range", "")
+    match = re.match(r"bytes \d+-\d+/(\d+)", content_range)
+    if match:
+        return int(match.group(1))
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit():
+        return offset + int(length)
+    return None
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", str(value))
+
+
+class DocumentDownloader:
+    """Downloads the documents of fulfilled SmartRequests with a bounded thread pool"""
+
+    def __init__(self, service=None, tracker: Optional[SmartRequestTracker] = None,
+                 download_dir: str = DOWNLOAD_DIR, workers: int = DOWNLOAD_WORKERS,
+                 max_bytes_per_second: float = DOWNLOAD_MAX_BYTES_PER_SECOND,
+                 document_types: Optional[List[str]] = None, chunk_size: int = CHUNK_SIZE):
+        if service is None:
+            from services.external_api_service import get_smartrequest_service
+            service = get_smartrequest_service()
+        self.service = service
+        self.tracker = tracker or request_tracker
+        self.download_dir = download_dir
+        self.workers = max(workers, 1)
+        self.document_types = document_types or DOWNLOAD_DOCUMENT_TYPES
+        self.chunk_size = chunk_size
+        self.limiter = BandwidthLimiter(max_bytes_per_second)
+        # Download URLs are pre-signed: a separate session without the API's bearer token
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def document_path(self, record: RequestRecord, document_type: str) -> str:
+        return os.path.join(self.download_dir, _safe_name(record.record_id),
+                            f"{_safe_name(record.request_id)}_{document_type.lower()}.pdf")
+
+    def refresh_statuses(self) -> int:
+        """
+        Poll the API for tracked requests that are not fulfilled yet
+
+        Returns:
+            int: Number of requests whose status changed
+        """
+        waiting = [record for record in self.tracker.list_all_requests() if record.status != FULFILLED_STATUS]
+        changed = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for record, status in zip(waiting, pool.map(
+                    lambda r: self.service.get_request_status(r.request_id), waiting)):
+                new_status = (status or {}).get("status")
+                if new_status and new_status != record.status:
+                    self.tracker.update_request_status(record.request_id, new_status)
+                    changed += 1
+        return changed
+
+    def pending_downloads(self) -> List[Tuple[RequestRecord, str]]:
+        """(request, document type) pairs of fulfilled requests not downloaded yet"""
+        return [(record, document_type)
+                for record in self.tracker.get_requests_by_status(FULFILLED_STATUS)
+                for document_type in self.document_types
+                if document_type not in (record.documents or {})]
+
+    def download_file(self, url: str, path: str, expected_sha256: Optional[str] = None) -> Optional[dict]:
+        """
+        Stream url to path, resuming from path + ".part" when an earlier attempt was cut off
+
+        Args:
+            url: Document URL
+            path: Final location of the file
+            expected_sha256: Hex SHA-256 to verify against (default: the one the server announces)
+
+        Returns:
+            dict with path, sha256, bytes and resumed, or None on failure (a partial
+            file is kept for the next attempt unless its checksum was wrong)
+        """
+        part_path = path + ".part"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        try:
+            with time_stage("document_download"), \
+                    self.session.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                if response.status_code == 416 and offset:
+                    # The partial file is not a prefix of this document: start over
+                    log.warning("⚠️ Server rejected resume of %s at %d bytes, restarting", path, offset)
+                    os.remove(part_path)
+                    return self.download_file(url, path, expected_sha256)
+                response.raise_for_status()
+
+                resumed = offset > 0 and response.status_code == 206
+                if not resumed:
+                    offset = 0
+                digest = hashlib.sha256()
+                if resumed:
+                    with open(part_path, "rb") as existing:
+                        for block in iter(lambda: existing.read(self.chunk_size), b""):
+                            digest.update(block)
+                expected = expected_sha256 or announced_sha256(response)
+                expected_size = total_size(response, offset)
+
+                size = offset
+                with open(part_path, "ab" if resumed else "wb") as f:
+                    for chunk in response.iter_content(self.chunk_size):
+                        self.limiter.consume(len(chunk))
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+                metrics.inc("medicos_download_bytes_total", size - offset)
+        except (requests.exceptions.RequestException, OSError) as e:
+            log.warning("⚠️ Download of %s interrupted, will resume: %s", path, e)
+            return None
+
+        if expected_size is not None and size != expected_size:
+            log.warning("⚠️ Download of %s incomplete (%d of %d bytes), will resume", path, size, expected_size)
+            return None
+        sha256 = digest.hexdigest()
+        if expected and sha256 != expected.lower():
+            log.error("❌ Checksum mismatch for %s: expected %s, got %s", path, expected, sha256)
+            os.remove(part_path)
+            return None
+        os.replace(part_path, path)
+        return {"path": path, "sha256": sha256, "bytes": size, "resumed": resumed}
+
+    def _download_document(self, record: RequestRecord, document_type: str) -> Optional[dict]:
+        url = self.service.get_download_url(record.request_id, document_type)
+        if not url:
+            log.warning("⚠️ No %s download URL for request %s", document_type, record.request_id)
+            return None
+        return self.download_file(url, self.document_path(record, document_type))
+
+    def run(self, refresh: bool = False) -> Dict[str, int]:
+        """
+        Download every pending document
+
+        Args:
+            refresh: Poll the status of unfulfilled requests first
+
+        Returns:
+            dict: downloaded, failed and bytes counts
+        """
+        if refresh:
+            changed = self.refresh_statuses()
+            if changed:
+                log.info("🔄 %d SmartRequest statuses changed", changed)
+        pending = self.pending_downloads()
+        summary = Counter(downloaded=0, failed=0, bytes=0)
+        if not pending:
+            return dict(summary)
+
+        log.info("📥 Downloading %d documents with %d workers", len(pending), self.workers)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._download_document, record, document_type): (record, document_type)
+                       for record, document_type in pending}
+            # Trackers are written from this thread only; their JSON files are not thread-safe
+            for future in as_completed(futures):
+                record, document_type = futures[future]
+                result = future.result()
+                if result is None:
+                    summary["failed"] += 1
+                    metrics.inc("medicos_documents_downloaded_total", outcome="failed")
+                    continue
+                self.tracker.record_download(record.request_id, document_type, result["path"],
+                                             result["sha256"], result["bytes"])
+                track_document_downloaded(record.request_id, document_type, result["path"])
+                summary["downloaded"] += 1
+                summary["bytes"] += result["bytes"]
+                metrics.inc("medicos_documents_downloaded_total", outcome="success")
+        return dict(summary)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+"""
+Email Dispatcher
+Long-lived SMTP delivery: one reused connection per server, reconnect on
+failure, and an optional background queue so callers never wait on SMTP
+"""
+
+import atexit
+import queue
+import smtplib
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Callable, Dict, Optional, Tuple
+
+from utils.logger import get_logger
+from utils.metrics import metrics
+from utils.timing import time_stage
+
+log = get_logger(__name__)
+
+# Close the pooled connection after this many idle seconds (relays drop idle sessions)
+DEFAULT_IDLE_TIMEOUT = 60
+# Delivery attempts per message (the first reconnect happens transparently)
+DEFAULT_MAX_ATTEMPTS = 2
+
+# Called as on_failure(to_email, subject, body, error, idempotency_key)
+FailureCallback = Callable[[str, str, str, Exception, Optional[str]], None]
+
+
+class EmailDispatcher:
+    """Sends messages over a single pooled SMTP connection"""
+
+    def __init__(self, server: str, port: int, from_email: str,
+                 username: str = "", password: str = "",
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 on_failure: Optional[FailureCallback] = None):
+        self.server = server
+        self.port = port
+        self.from_email = from_email
+        self.username = username
+        self.password = password
+        self.idle_timeout = idle_timeout
+        self.max_attempts = max_attempts
+        self.on_failure = on_failure
+
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._send_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[str, str, str, Optional[str]]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self.sent_count = 0
+        self.failed_count = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.server, self.port, timeout=30)
+        # Enable TLS if credentials are provided
+        if self.username and self.password:
+            smtp.starttls()
+            smtp.login(self.username, self.password)
+        return smtp
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self._disconnect()
+        if self._smtp is None:
+            self._smtp = self._connect()
+        return self._smtp
+
+    def _build_message(self, to_email: str, subject: str, body: str) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg['From'] = self.from_email
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+
+    def send(self, to_email: str, subject: str, body: str, idempotency_key: Optional[str] = None) -> bool:
+        """
+        Send a message synchronously over the pooled connection
+
+        On final failure on_failure is called with the message and idempotency_key.
+
+        Returns:
+            bool: True if the relay accepted the message, False otherwise
+        """
+        msg = self._build_message(to_email, subject, body)
+        last_error: Optional[Exception] = None
+
+        with self._send_lock:
+            for attempt in range(self.max_attempts):
+                try:
+                    with time_stage("email_send"):
+                        self._connection().send_message(msg)
+                    self._last_used = time.monotonic()
+                    self.sent_count += 1
+                    metrics.inc("medicos_emails_total", outcome="sent")
+                    log.info("✅ Email sent to %s: %s", to_email, subject)
+                    return True
+                except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError) as e:
+                    # Stale or dropped connection: reconnect and retry
+                    last_error = e
+                    self._disconnect()
+                except smtplib.SMTPException as e:
+                    # Refused recipients, rejected data, failed login: retrying will not help.
+                    # Caught before OSError, which SMTPException subclasses.
+                    last_error = e
+                    self._disconnect()
+                    break
+                except OSError as e:
+                    # Socket errors and timeouts: reconnect and retry
+                    last_error = e
+                    self._disconnect()
+
+        self.failed_count += 1
+        metrics.inc("medicos_emails_total", outcome="failed")
+        log.error("❌ Failed to send email to %s: %s", to_email, last_error)
+        if self.on_failure is not None:
+            try:
+                self.on_failure(to_email, subject, body, last_error, idempotency_key)
+            except Exception as e:
+                log.warning("⚠️ Email failure callback raised: %s", e)
+        return False
+
+    def submit(self, to_email: str, subject: str, body: str, idempotency_key: Optional[str] = None):
+        """Queue a message for background delivery and return immediately"""
+        self._ensure_worker()
+        self._queue.put((to_email, subject, body, idempotency_key))
+        self._report_pending()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=f"email-dispatcher-{self.server}", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                # Nothing to send for a while: release the relay connection
+                with self._send_lock:
+                    self._disconnect()
+                continue
+            try:
+                if item is None:
+                    return
+                self.send(*item)
+            finally:
+                self._queue.task_done()
+                self._report_pending()
+
+    @property
+    def pending(self) -> int:
+        """Messages queued but not yet delivered"""
+        return self._queue.unfinished_tasks
+
+    def _report_pending(self):
+        metrics.set("medicos_email_queue_depth", self.pending, server=self.server)
+
+    def flush(self):
+        """Block until every queued message has been attempted"""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Flush the queue, stop the worker and close the SMTP connection"""
+        self.flush()
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join(timeout=5)
+        self._worker = None
+        with self._send_lock:
+            self._disconnect()
+
+
+_dispatchers: Dict[Tuple[str, int, str, str], EmailDispatcher] = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_dispatcher(server: str, port: int, from_email: str,
+                   username: str = "", password: str = "") -> EmailDispatcher:
+    """Shared dispatcher per (server, port, sender, login), created on first use"""
+    key = (server, int(port), from_email, username)
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(key)
+        if dispatcher is None:
+            dispatcher = EmailDispatcher(server, int(port), from_email, username, password)
+            _dispatchers[key] = dispatcher
+        return dispatcher
+
+
+def flush_dispatchers():
+    """Wait for all queued emails to be attempted"""
+    for dispatcher in list(_dispatchers.values()):
+        dispatcher.flush()
+
+
+def shutdown_dispatchers():
+    """Flush and close every shared dispatcher"""
+    with _dispatchers_lock:
+        dispatchers = list(_dispatchers.values())
+        _dispatchers.clear()
+    for dispatcher in dispatchers:
+        dispatcher.close()
+
+
+# Make sure queued notifications are delivered before the interpreter exits
+atexit.register(shutdown_dispatchers)
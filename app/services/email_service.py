@@ -1,16 +1,17 @@
+import importlib.util
 import os
 import sys
 import re
 from typing import Optional, Dict, Any
 from datetime import datetime
 
-# Try to import win32 modules for Outlook integration
-try:
-    import win32com.client
-    OUTLOOK_AVAILABLE = True
-except ImportError:
-    OUTLOOK_AVAILABLE = False
-    print("⚠️ win32com not available. Install with: pip install pywin32")
+from services.notification_digest import DigestEntry, NotificationDigest, digest_enabled_from_env, render_digest_body
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# Outlook integration needs pywin32; win32com itself is only imported when Outlook is used
+OUTLOOK_AVAILABLE = importlib.util.find_spec("win32com") is not None
 
 # Fallback SMTP imports
 try:
@@ -23,12 +24,14 @@ except ImportError:
 
 
 class EmailService:
-    def __init__(self, use_outlook=True):
+    def __init__(self, use_outlook=True, digest: Optional[bool] = None):
         # Load configuration from SASS file
         self.config = self._load_sass_config()
         
         self.use_outlook = (use_outlook and OUTLOOK_AVAILABLE and 
                            self.config.get('use-outlook', True))
+        if use_outlook and not OUTLOOK_AVAILABLE and self.config.get('use-outlook', True):
+            log.warning("⚠️ win32com not available. Install with: pip install pywin32")
         
         # Load email template
         self.email_template = self._load_email_template()
@@ -45,15 +48,20 @@ class EmailService:
         self.smtp_username = os.getenv('SMTP_USERNAME', '')
         self.smtp_password = os.getenv('SMTP_PASSWORD', '')
         
+        # Digest mode batches notifications per recipient (EMAIL_DIGEST_MODE)
+        if digest is None:
+            digest = digest_enabled_from_env()
+        self.digest = NotificationDigest(self._send_digest) if digest else None
+        
         # Initialize Outlook if available
         self.outlook = None
         if self.use_outlook:
             try:
+                import win32com.client
                 self.outlook = win32com.client.Dispatch("Outlook.Application")
-                print("✅ Connected to local Outlook application")
+                log.info("✅ Connected to local Outlook application")
             except Exception as e:
-                print(f"⚠️ Could not connect to Outlook: {e}")
-                print("Falling back to SMTP method")
+                log.warning("⚠️ Could not connect to Outlook: %s; falling back to SMTP", e)
                 self.use_outlook = False
     
     def _load_sass_config(self) -> Dict[str, Any]:
@@ -63,7 +71,7 @@ class EmailService:
             config_path = os.path.abspath(config_path)
             
             if not os.path.exists(config_path):
-                print(f"⚠️ SASS config file not found at {config_path}, using defaults")
+                log.warning("⚠️ SASS config file not found at %s, using defaults", config_path)
                 return {}
             
             config = {}
@@ -104,11 +112,11 @@ class EmailService:
                                     value = False
                                 config[key] = value
             
-            print(f"✅ Loaded email configuration from SASS file")
+            log.info("✅ Loaded email configuration from SASS file")
             return config
             
         except Exception as e:
-            print(f"⚠️ Error loading SASS config: {e}, using defaults")
+            log.warning("⚠️ Error loading SASS config: %s, using defaults", e)
             return {}
     
     def _load_email_template(self) -> str:
@@ -118,17 +126,17 @@ class EmailService:
             template_path = os.path.abspath(template_path)
             
             if not os.path.exists(template_path):
-                print(f"⚠️ HSB template file not found at {template_path}, using default")
+                log.warning("⚠️ HSB template file not found at %s, using default", template_path)
                 return self._get_default_template()
             
             with open(template_path, 'r', encoding='utf-8') as file:
                 template = file.read().strip()
                 
-            print(f"✅ Loaded email template from HSB file")
+            log.info("✅ Loaded email template from HSB file")
             return template
             
         except Exception as e:
-            print(f"⚠️ Error loading HSB template: {e}, using default")
+            log.warning("⚠️ Error loading HSB template: %s, using default", e)
             return self._get_default_template()
     
     def _get_default_template(self) -> str:
@@ -158,28 +166,41 @@ Kind regards,"""
             if not to_email:
                 to_email = self.notification_email
                 if not to_email:
-                    print(f"⚠️ No notification email configured for mr_dv alert: {record_id}")
+                    log.warning("⚠️ No notification email configured for mr_dv alert: %s", record_id)
                     return False
             
+            if self.digest is not None:
+                self.digest.add(to_email, DigestEntry(record_id, patient_name, facility_name))
+                log.info("📨 Added %s to notification digest for %s", record_id, to_email)
+                return True
+            
             # Use the configured subject
             subject = self.email_subject
             
             # Use the loaded template
             body = self._create_email_body_from_template(record_id, patient_name, facility_name)
             
-            # Send email using appropriate method
-            if self.use_outlook and self.outlook:
-                return self._send_outlook_email(to_email, subject, body)
-            elif SMTP_AVAILABLE:
-                return self._send_smtp_email(to_email, subject, body)
-            else:
-                print("❌ No email sending method available (neither Outlook nor SMTP)")
-                return False
+            return self._send(to_email, subject, body)
             
         except Exception as e:
-            print(f"❌ Error sending mr_dv notification email: {e}")
+            log.error("❌ Error sending mr_dv notification email: %s", e)
+            return False
+    
+    def _send(self, to_email: str, subject: str, body: str) -> bool:
+        """Send email using the appropriate method (Outlook, then SMTP)"""
+        if self.use_outlook and self.outlook:
+            return self._send_outlook_email(to_email, subject, body)
+        elif SMTP_AVAILABLE:
+            return self._send_smtp_email(to_email, subject, body)
+        else:
+            log.error("❌ No email sending method available (neither Outlook nor SMTP)")
             return False
     
+    def _send_digest(self, to_email: str, entries) -> bool:
+        """Deliver one digest email for a batch of mr_dv notifications"""
+        body = render_digest_body(self.email_template, entries)
+        return self._send(to_email, f"{self.email_subject} ({len(entries)} records)", body)
+    
     def _create_email_body_from_template(self, record_id: str, patient_name: Optional[str] = None,
                                        facility_name: Optional[str] = None) -> str:
         """Create the email body using the loaded HSB template"""
@@ -232,11 +253,11 @@ Kind regards,"""
             # Send the email
             mail.Send()
             
-            print(f"✅ Outlook email sent to {to_email}: {subject}")
+            log.info("✅ Outlook email sent to %s: %s", to_email, subject)
             return True
             
         except Exception as e:
-            print(f"❌ Failed to send Outlook email to {to_email}: {e}")
+            log.error("❌ Failed to send Outlook email to %s: %s", to_email, e)
             return False
     
     def _send_smtp_email(self, to_email: str, subject: str, body: str) -> bool:
@@ -271,9 +292,9 @@ Kind regards,"""
                 # Send email
                 server.send_message(msg)
                 
-            print(f"✅ Email notification sent to {to_email} for record: {subject}")
+            log.info("✅ Email notification sent to %s for record: %s", to_email, subject)
             return True
             
         except Exception as e:
-            print(f"❌ Failed to send email to {to_email}: {e}")
+            log.error("❌ Failed to send email to %s: %s", to_email, e)
             return False
\ No newline at end of file
@@ -7,9 +7,12 @@ from models.redcap_response_second import RedcapResponseSecond
 from models.datavant_request import DatavantRequest
 from utils.filters import filter_records, get_latest_records, merge_records
 from utils.dates import get_current_time_str, get_one_hour_before_str, get_start_of_today_str, subtract_time_from_str
-from fake_responses import generate_fake_detail_record
-from services.smartrequest_service import SmartRequestService
-from typing import List, Literal, Optional
+from utils.log_cursor import LogCursor
+from utils.log_stream import LatestLogEntries, iter_file_chunks, iter_json_array
+from utils.logger import get_logger
+from utils.timing import time_stage
+from services.smartrequest_service import SmartRequestOutcomeUnknown, SmartRequestService
+from typing import Iterator, List, Literal, Optional, Tuple
 
 import json
 import sys
@@ -22,13 +25,41 @@ def parse_arg(flag_name: str, default_value: str):
 
 time_delta = parse_arg("time_delta", "1")
 time_delta_period = parse_arg("time_delta_period", "hours")
+# Explicit re-fetch of a past range ("YYYY-MM-DD HH:MM"); bypasses the log cursor
+backfill_start = parse_arg("backfill_start", None)
+backfill_end = parse_arg("backfill_end", None)
 load_dotenv()
 end_point = os.getenv("EXTERNAL_API_END_POINT") or "https://localhost/redcap/api/"
 token = os.getenv("EXTERNAL_API_TOKEN") or "E*************7"
 env = os.getenv("ENV") or 'local'
 
-# Initialize SmartRequest service
-smartrequest_service = SmartRequestService()
+log = get_logger(__name__)
+
+_smartrequest_service: Optional[SmartRequestService] = None
+
+
+def get_smartrequest_service() -> SmartRequestService:
+    """Shared SmartRequest client, created on first use rather than at import"""
+    global _smartrequest_service
+    if _smartrequest_service is None:
+        _smartrequest_service = SmartRequestService()
+    return _smartrequest_service
+
+
+def __getattr__(name: str):
+    # Keeps `from services.external_api_service import smartrequest_service` working
+    if name == "smartrequest_service":
+        return get_smartrequest_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Reused REDCap connection (keep-alive across log and record exports)
+http_session = requests.Session()
+# Bytes read per step when streaming the log export
+LOG_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Local mode reads these instead of the bundled samples when set (benchmarks point them at synthetic data)
+LOG_SAMPLE_FILE_ENV = "REDCAP_LOG_SAMPLE_FILE"
+RECORD_SAMPLE_FILE_ENV = "REDCAP_RECORD_SAMPLE_FILE"
 
 details_data = {
     'token': token,
@@ -67,57 +98,124 @@ details_data = {
     'returnFormat': 'json'
 }
 
-def get_log_data_from_api():
-    data = {
+def _local_sample_paths(env_var: str, filename: str) -> List[str]:
+    override = os.getenv(env_var)
+    if override:
+        return [override]
+    return [
+        f'app/{filename}',     # When run from project root
+        filename,              # When run from app directory
+        f'../app/{filename}'   # When run from subdirectory
+    ]
+
+
+# path -> (mtime, {mg_idpreg: [rows]})
+_record_sample_index: dict = {}
+
+
+def _local_record_rows(path: str, record_id: str) -> list:
+    """Rows of record_id in a local record sample, indexed once per file version"""
+    mtime = os.path.getmtime(path)
+    cached = _record_sample_index.get(path)
+    if cached is None or cached[0] != mtime:
+        index = {}
+        with open(path) as f:
+            for row in json.load(f):
+                index.setdefault(row['mg_idpreg'], []).append(row)
+        cached = _record_sample_index[path] = (mtime, index)
+    return list(cached[1].get(record_id, ()))
+
+
+def get_default_begin_time() -> str:
+    """Window start from --time_delta, used when there is no log cursor yet"""
+    return subtract_time_from_str(get_current_time_str(), int(time_delta), time_delta_period)
+
+
+def _log_request_data(begin_time: Optional[str] = None, end_time: Optional[str] = None) -> dict:
+    return {
         'token': token,
         'content': 'log',
         'logtype': 'record',
         'user': '',
         'record': '',
-        'beginTime': subtract_time_from_str(get_current_time_str(), int(time_delta), time_delta_period),
-        'endTime': get_current_time_str(),
+        'beginTime': begin_time or get_default_begin_time(),
+        'endTime': end_time or get_current_time_str(),
         'format': 'json',
         'returnFormat': 'json'
     }
-    print(f'🔍 Begin Time: {data}')
-    try:
-        if env == 'local':
-            print(f'logs fetching from local...')
-            # Try different possible paths for the sample file
-            sample_paths = [
-                'app/response_1_sample.json',  # When run from project root
-                'response_1_sample.json',      # When run from app directory
-                '../app/response_1_sample.json'  # When run from subdirectory
-            ]
-            
-            for path in sample_paths:
-                if os.path.exists(path):
-                    return json.load(open(path))
-            
-            print(f"⚠️ Sample data file not found in any of: {sample_paths}")
-            return []
-        print(f"Hitting logs api....")
-        response = requests.post(f'{end_point}',data=data,timeout=60)
+
+def iter_log_data_from_api(begin_time: Optional[str] = None, end_time: Optional[str] = None) -> Iterator[dict]:
+    """
+    Stream log entries one at a time as the response body arrives
+    
+    Errors (timeouts, HTTP errors, a truncated body) propagate to the caller.
+    """
+    data = _log_request_data(begin_time, end_time)
+    log.info("🔍 Begin Time: %s, End Time: %s", data['beginTime'], data['endTime'])
+    log.debug("log request %s", data)
+    if env == 'local':
+        log.info("logs fetching from local...")
+        # Try different possible paths for the sample file
+        sample_paths = _local_sample_paths(LOG_SAMPLE_FILE_ENV, 'response_1_sample.json')
+        
+        for path in sample_paths:
+            if os.path.exists(path):
+                yield from iter_json_array(iter_file_chunks(path))
+                return
+        
+        log.warning("⚠️ Sample data file not found in any of: %s", sample_paths)
+        return
+    log.info("Hitting logs api....")
+    with http_session.post(f'{end_point}', data=data, timeout=60, stream=True) as response:
         response.raise_for_status()
-        return response.json()
+        yield from iter_json_array(response.iter_content(chunk_size=LOG_STREAM_CHUNK_SIZE))
+
+def get_log_data_from_api(begin_time: Optional[str] = None, end_time: Optional[str] = None):
+    try:
+        return list(iter_log_data_from_api(begin_time, end_time))
     except requests.exceptions.Timeout:
-        print(f'❌ api timeout...')
+        log.error("❌ api timeout...")
         return []
     except Exception as e:
-        print(f"❌ Error getting log data from API: {e}")
+        log.error("❌ Error getting log data from API: %s", e)
         return []
 
+def get_new_log_data_from_api(cursor: LogCursor) -> Tuple[LatestLogEntries, bool]:
+    """
+    Stream log entries that have not been processed yet, keeping only the
+    newest entry per record
+    
+    Resumes from the cursor's high-water mark (falling back to --time_delta
+    on the first run). With --backfill_start the explicit range is fetched
+    as-is and the cursor is not consulted.
+    
+    Returns:
+        tuple: (LatestLogEntries, is_backfill)
+    """
+    if backfill_start:
+        log.info("⏪ Backfilling logs from %s to %s", backfill_start, backfill_end or 'now')
+        with time_stage("redcap_log_fetch"):
+            return LatestLogEntries().consume(iter_log_data_from_api(backfill_start, backfill_end)), True
+    
+    begin_time = cursor.begin_time(get_default_begin_time())
+    with time_stage("redcap_log_fetch"):
+        batch = LatestLogEntries(cursor).consume(iter_log_data_from_api(begin_time))
+    if batch.skipped:
+        log.info("⏭️ Skipped %s log entries already processed", batch.skipped)
+    return batch, False
+
+
 def get_log_detail_data_from_api(record:RedcapResponseFirst):
-        data = get_record_data_from_api(record)
+        with time_stage("redcap_fetch"):
+            data = get_record_data_from_api(record)
         data = merge_records(data)
-        print(f'details response {data}')
+        log.debug("details response %s", data)
         if len(data) == 0:
-            print(f"❌ no record data found for {record.record}")
+            log.error("❌ no record data found for %s", record.record)
             return []
         data = filter_records([data], RedcapResponseSecond)
-        # data = generate_fake_detail_record(record.record,1)
         if data is None:
-            print(f"❌ no record data found for {record.record}")
+            log.error("❌ no record data found for %s", record.record)
             return []
         return data
 
@@ -125,33 +223,27 @@ def get_log_detail_data_from_api(record:RedcapResponseFirst):
 def get_record_data_from_api(record:RedcapResponseFirst):
     data = details_data.copy()
     data[f'records[{0}]'] = record.record
-    print(f"data {data}")
+    log.debug("data %s", data)
     try:
         if env == 'local':
             # Try different possible paths for the sample file
-            sample_paths = [
-                'app/response_2_sample.json',  # When run from project root
-                'response_2_sample.json',      # When run from app directory
-                '../app/response_2_sample.json'  # When run from subdirectory
-            ]
+            sample_paths = _local_sample_paths(RECORD_SAMPLE_FILE_ENV, 'response_2_sample.json')
             
             for path in sample_paths:
                 if os.path.exists(path):
-                    json_data = json.load(open(path))
-                    print(f'details fetching from local...')
-                    result = [x for x in json_data if x['mg_idpreg'] == record.record]
-                    return result
+                    log.info("details fetching from local...")
+                    return _local_record_rows(path, record.record)
             
-            print(f"⚠️ Sample data file response_2_sample.json not found in any of: {sample_paths}")
+            log.warning("⚠️ Sample data file response_2_sample.json not found in any of: %s", sample_paths)
             return []
-        response = requests.post(end_point,data=data)
+        response = http_session.post(end_point, data=data, timeout=60)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.Timeout:
-        print(f'❌ api timeout...')
+        log.error("❌ api timeout...")
         return []
     except Exception as e:
-        print(f"❌ Error getting log detail data from API: {e}")
+        log.error("❌ Error getting log detail data from API: %s", e)
         return []
 
 
@@ -164,26 +256,32 @@ def submit_datavant_request(request_data: DatavantRequest) -> Optional[dict]:
     
     Returns:
         dict: API response or None on error
+
+    Raises:
+        SmartRequestOutcomeUnknown: If the request may have been created
     """
     try:
         # Convert Pydantic model to dict for API submission
         request_dict = request_data.model_dump(exclude_none=True)
         
         # Submit request using SmartRequest service
-        result = smartrequest_service.create_request(request_dict)
+        with time_stage("create_request"):
+            result = get_smartrequest_service().create_request(request_dict)
         
         if result:
             request_id = result.get("requestId")
-            print(f"✅ SmartRequest submitted successfully with ID: {request_id}")
+            log.info("✅ SmartRequest submitted successfully with ID: %s", request_id)
             
             # Log the request ID for tracking
             if request_id:
-                print(f"📝 Track this request with ID: {request_id}")
+                log.info("📝 Track this request with ID: %s", request_id)
         
         return result
         
+    except SmartRequestOutcomeUnknown:
+        raise
     except Exception as e:
-        print(f"❌ Unexpected error submitting SmartRequest: {e}")
+        log.error("❌ Unexpected error submitting SmartRequest: %s", e)
         return None
 
 
@@ -197,7 +295,7 @@ def get_smartrequest_status(request_id: str) -> Optional[dict]:
     Returns:
         Status dictionary or None on error
     """
-    return smartrequest_service.get_request_status(request_id)
+    return get_smartrequest_service().get_request_status(request_id)
 
 
 def get_smartrequest_download_url(request_id: str, document_type: str = "ALL") -> Optional[str]:
@@ -211,7 +309,7 @@ def get_smartrequest_download_url(request_id: str, document_type: str = "ALL") -
     Returns:
         Download URL or None on error
     """
-    return smartrequest_service.get_download_url(request_id, document_type)
+    return get_smartrequest_service().get_download_url(request_id, document_type)
 
 
 def cancel_smartrequest(request_id: str, reason: str) -> bool:
@@ -225,5 +323,5 @@ def cancel_smartrequest(request_id: str, reason: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    return smartrequest_service.cancel_request(request_id, reason)
+    return get_smartrequest_service().cancel_request(request_id, reason)
     
\ No newline at end of file
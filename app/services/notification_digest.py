@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+Notification Digest
+Accumulates mr_dv notifications per recipient and sends one summary
+email per window or batch size instead of one email per record
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_WINDOW_SECONDS = 300
+DEFAULT_MAX_ITEMS = 50
+
+
+@dataclass
+class DigestEntry:
+    """One record included in a digest email"""
+    record_id: str
+    patient_name: Optional[str] = None
+    facility_name: Optional[str] = None
+    timestamp: str = field(default_factory=lambda: datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def digest_enabled_from_env() -> bool:
+    return os.getenv('EMAIL_DIGEST_MODE', 'false').lower() == 'true'
+
+
+def render_digest_table(entries: List[DigestEntry]) -> str:
+    """Plain-text table of record IDs, patients and facilities"""
+    headers = ("Record ID", "Patient", "Facility", "Timestamp")
+    rows = [(e.record_id, e.patient_name or "", e.facility_name or "", e.timestamp) for e in entries]
+    widths = [max(len(str(row[i])) for row in rows + [headers]) for i in range(len(headers))]
+
+    def line(values):
+        return " | ".join(str(v).ljust(widths[i]) for i, v in enumerate(values)).rstrip()
+
+    lines = [line(headers), "-+-".join("-" * w for w in widths)]
+    lines.extend(line(row) for row in rows)
+    return "\n".join(lines)
+
+
+def render_digest_body(template: str, entries: List[DigestEntry]) -> str:
+    """Email body for one digest: the notification template, the records table and the signature"""
+    body = template + "\n\n"
+    body += f"Records ({len(entries)}):\n\n"
+    body += render_digest_table(entries) + "\n"
+    body += "\nTennessee Department of Health\n"
+    body += "Bhanu Prathap Gaddam\n"
+    body += "bhanu.prathap.gaddam@tn.gov"
+    return body
+
+
+class NotificationDigest:
+    """Per-recipient batches flushed by size or by age"""
+
+    def __init__(self, send_batch: Callable[[str, List[DigestEntry]], bool],
+                 window_seconds: Optional[float] = None,
+                 max_items: Optional[int] = None):
+        """
+        Args:
+            send_batch: Called with (recipient, entries) to deliver one digest email
+            window_seconds: Maximum age of a batch before it is sent
+            max_items: Batch size that triggers an immediate send
+        """
+        self.send_batch = send_batch
+        self.window_seconds = float(window_seconds if window_seconds is not None
+                                    else os.getenv('EMAIL_DIGEST_WINDOW_SECONDS', DEFAULT_WINDOW_SECONDS))
+        self.max_items = int(max_items if max_items is not None
+                             else os.getenv('EMAIL_DIGEST_MAX_ITEMS', DEFAULT_MAX_ITEMS))
+        self._batches: Dict[str, List[DigestEntry]] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def add(self, recipient: str, entry: DigestEntry):
+        """Add a notification; sends the recipient's batch once it is full"""
+        with self._lock:
+            batch = self._batches.setdefault(recipient, [])
+            batch.append(entry)
+            full = len(batch) >= self.max_items
+            if not full and recipient not in self._timers:
+                timer = threading.Timer(self.window_seconds, self.flush, args=(recipient,))
+                timer.daemon = True
+                self._timers[recipient] = timer
+                timer.start()
+        if full:
+            self.flush(recipient)
+
+    def pending(self) -> int:
+        """Notifications waiting to be sent"""
+        with self._lock:
+            return sum(len(batch) for batch in self._batches.values())
+
+    def flush(self, recipient: Optional[str] = None) -> bool:
+        """
+        Send pending digests for one recipient (or all)
+
+        Returns:
+            bool: True if every digest was delivered
+        """
+        with self._lock:
+            recipients = [recipient] if recipient is not None else list(self._batches)
+            batches = []
+            for r in recipients:
+                timer = self._timers.pop(r, None)
+                if timer is not None:
+                    timer.cancel()
+                entries = self._batches.pop(r, None)
+                if entries:
+                    batches.append((r, entries))
+
+        success = True
+        for r, entries in batches:
+            try:
+                success = self.send_batch(r, entries) and success
+            except Exception as e:
+                log.error("❌ Error sending notification digest to %s: %s", r, e)
+                success = False
+        return success
+
+
+_digests: List[NotificationDigest] = []
+
+
+def _register(digest: NotificationDigest):
+    _digests.append(digest)
+
+
+def flush_all_digests():
+    """
+    Send every pending digest
+
+    Entry points call this at the end of a run, before shutdown_dispatchers(),
+    so background-queued digests are delivered before the queue is closed.
+    """
+    for digest in list(_digests):
+        digest.flush()
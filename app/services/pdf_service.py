@@ -1,22 +1,116 @@
+import multiprocessing.util
 import os
-from docx2pdf import convert
+import sys
+import tempfile
+from contextlib import nullcontext
 from datetime import datetime
+from typing import BinaryIO, Union
 from utils.dates import generate_dir_name
+from utils.document_store import remove_output
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
 output_dir = os.getenv("OUTPUT_DIR") or "output"
 
+WD_FORMAT_PDF = 17
+# This process's own Word instance (render pool workers on Windows), see start_word()
+_word = None
+# Held around docx2pdf conversions when processes share the one Word application
+_convert_lock = None
+
+
+def start_word(convert_lock=None):
+    """
+    Prepare a render pool worker process for PDF conversion
+
+    docx2pdf attaches to the running Word instance and quits it after every
+    conversion, which would close the documents of the other workers. On
+    Windows the worker therefore starts its own Word instance (quit when the
+    worker exits); elsewhere docx2pdf's conversions are serialized on
+    convert_lock, a lock shared by the workers.
+    """
+    global _word, _convert_lock
+    _convert_lock = convert_lock
+    if sys.platform != "win32" or _word is not None:
+        return
+    try:
+        import pythoncom
+        import win32com.client
+
+        pythoncom.CoInitialize()
+        _word = win32com.client.DispatchEx("Word.Application")
+        _word.Visible = False
+        _word.DisplayAlerts = 0
+    except Exception as e:
+        log.warning("⚠️ Could not start a Word instance for this worker, sharing Word: %s", e)
+        _word = None
+        return
+    multiprocessing.util.Finalize(None, quit_word, exitpriority=10)
+
+
+def quit_word():
+    """Quit this process's Word instance, if start_word() started one"""
+    global _word
+    if _word is not None:
+        try:
+            _word.Quit()
+        except Exception as e:
+            log.warning("⚠️ Could not quit Word: %s", e)
+        _word = None
+
+
+def _convert(docx_path: str, pdf_path: str):
+    if _word is not None:
+        document = _word.Documents.Open(os.path.abspath(docx_path), ReadOnly=True)
+        try:
+            document.SaveAs(os.path.abspath(pdf_path), FileFormat=WD_FORMAT_PDF)
+        finally:
+            document.Close(0)
+        return
+    # docx2pdf drives Word; only loaded when a PDF is actually converted
+    from docx2pdf import convert
+    with _convert_lock or nullcontext():
+        convert(docx_path, pdf_path)
+
 
 class PDFService:
     
     def __init__(self):
         self.output_dir = output_dir+"/"+generate_dir_name()
-        print(f"output_dir {self.output_dir}")
+        log.debug("output_dir %s", self.output_dir)
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def convert_to_pdf(self, docx_path: str,output_path, output_filename: str):
-        file_path = self.output_dir+"/"+output_path
-        path = os.path.join(file_path, f"{output_filename}.pdf")
-        print(f"📄 Output PDF path: {path}")
-        convert(docx_path, path)
+    def pdf_path(self, output_path, output_filename: str) -> str:
+        """Dated location of a generated PDF"""
+        return os.path.join(self.output_dir+"/"+output_path, f"{output_filename}.pdf")
+
+    def convert_to_pdf(self, docx: Union[str, BinaryIO], output_path, output_filename: str):
+        """
+        Convert a .docx to output/<date>/<output_path>/<output_filename>.pdf
+
+        Args:
+            docx: Path of a .docx file, or an in-memory .docx (e.g. from TemplateService.render)
+            output_path: Sub-directory, the request type
+            output_filename: File name without extension
+
+        Returns:
+            str: PDF path with forward slashes
+        """
+        path = self.pdf_path(output_path, output_filename)
+        log.info("📄 Output PDF path: %s", path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Never convert over a link to a document store object
+        remove_output(path)
+        if isinstance(docx, (str, os.PathLike)):
+            _convert(docx, path)
+        else:
+            # Word only opens files: spool the buffer to local temp storage, not the output volume
+            with tempfile.TemporaryDirectory(prefix="medicos_docx_") as spool_dir:
+                docx_path = os.path.join(spool_dir, f"{output_filename}.docx")
+                with open(docx_path, 'wb') as f:
+                    f.write(docx.getvalue() if hasattr(docx, "getvalue") else docx.read())
+                _convert(docx_path, path)
         
         # Normalize path for cross-platform compatibility (use forward slashes)
         normalized_path = path.replace(os.sep, '/')
@@ -1,10 +1,8 @@
-import time
 import os
 import sys
-import csv
-from typing import List, Optional, Dict, Any
+import time
+from typing import List, Optional, Dict, Any, Set
 from dataclasses import replace 
-from datetime import datetime
 
 # Add current directory to path for relative imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,96 +11,68 @@ sys.path.insert(0, parent_dir)
 
 from models.datavant_request import DatavantRequest, Facility, RequesterInfo, Patient, Reason, RequestCriteria, CallbackDetails, CallbackHeaders
 from services.external_api_service import get_log_detail_data_from_api, submit_datavant_request
+from services.smartrequest_service import SmartRequestOutcomeUnknown
 from utils.filters import filter_records
 from models.redcap_response_second import RedcapResponseSecond
-from services.template_service import TemplateService
 from services.pdf_service import PDFService
-from services.sas_email_service import SASEmailService
+from services.render_pool import render_pool
+from services.sas_email_service import get_sas_email_service
 from models.redcap_response_first import RedcapResponseFirst
 from utils.counter import Counter
-from utils.logger import PandasCSVLogger
+from utils.logger import PandasCSVLogger, get_logger
+from utils.metrics import metrics
 from utils.request_tracker import track_smartrequest
 from utils.dashboard_tracker import (
-    track_processing_start, track_pdf_success, track_pdf_error,
+    track_processing_start, track_processing_complete, track_pdf_success, track_pdf_error,
     track_smartrequest_sent, track_smartrequest_success, track_smartrequest_error
 )
 from utils.dates import get_datavant_date_range
+from utils.document_store import document_key, document_store
+from utils.facility_index import facility_index
+from utils.facility_matcher import facility_matcher
+from utils.processing_ledger import processing_ledger
+from utils.outbox import outbox, make_key, KIND_SMARTREQUEST, STATUS_PENDING, STATUS_REVIEW
+from utils.timing import RecordTimings, record_timing, stage_timings
 
-pdf_logger = PandasCSVLogger(f"logs/pdfs/logs_{datetime.now().strftime('%Y%m%d')}.csv", ["record", "timestamp", "username", "request_type","process_type", "status", "details"])
-extended_record_logger = PandasCSVLogger(f"logs/extended_records/logs_{datetime.now().strftime('%Y%m%d')}.csv", ["record", "timestamp", "username", "request_type","process_type", "status", "details"])
-logger = PandasCSVLogger(f"logs/logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", ["record", "timestamp", "username", "status", "details"])
+log = get_logger(__name__)
+pdf_logger = PandasCSVLogger("logs/pdfs/logs_%Y%m%d.csv", ["record", "timestamp", "username", "request_type","process_type", "status", "details"])
+extended_record_logger = PandasCSVLogger("logs/extended_records/logs_%Y%m%d.csv", ["record", "timestamp", "username", "request_type","process_type", "status", "details"])
+logger = PandasCSVLogger("logs/logs_%Y%m%d_%H%M%S.csv", ["record", "timestamp", "username", "status", "details"], per_cycle=True)
 
 PATIENT_AUTH_ENCODED = "PATIENT_AUTH_ENCODED"
 REPRESENTATION_LETTER_ENCODED = "REPRESENTATION_LETTER_ENCODED"
 
-# Facility data cache
-_facility_cache = None
+# Minimum facility match score before falling back to the default facility
+FACILITY_MATCH_MIN_SCORE = float(os.getenv("FACILITY_MATCH_MIN_SCORE", "0.6"))
+
+# Debugging: also write the filled-in .docx next to each generated PDF (normally it stays in memory)
+KEEP_INTERMEDIATE_DOCX = os.getenv("KEEP_INTERMEDIATE_DOCX", "false").lower() == "true"
 
 def load_datavant_facilities() -> List[Dict[str, Any]]:
     """
     Load facility data from Datavant facility CSV file
     
+    The CSV is indexed once per process and only re-read when its mtime changes.
+    
     Returns:
         List of facility dictionaries with standardized field names
     """
-    global _facility_cache
-    
-    if _facility_cache is not None:
-        return _facility_cache
-    
-    facilities = []
-    csv_path = os.path.join(os.getcwd(), "Datavant_ Facility_List.csv")
-    
-    try:
-        with open(csv_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                # Standardize the facility data to match Datavant API format
-                facility = {
-                    'site': row.get('SITE', '').strip(),
-                    'healthSystem': row.get('Health System ', '').strip(),  # Note the space after "System"
-                    'siteName': row.get('SiteName', '').strip(),
-                    'addressLine1': row.get('Address', '').strip(),
-                    'addressLine2': row.get('Address2', '').strip() or None,
-                    'city': row.get('City', '').strip(),
-                    'state': row.get('State', '').strip(),
-                    'zip': row.get('ZIP', '').strip(),
-                    'phone': row.get('PHONE', '').strip(),
-                    'fax': row.get('Fax', '').strip(),
-                    # Additional fields for reference
-                    'itemizedBills': row.get('ITEMIZED BILLS', '').strip(),
-                    'records': row.get('RECORDS', '').strip(),
-                    'radiology': row.get('RADIOLOGY', '').strip(),
-                    'subpoena': row.get('SUBPOENA', '').strip()
-                }
-                facilities.append(facility)
-        
-        _facility_cache = facilities
-        print(f"✅ Loaded {len(facilities)} facilities from Datavant CSV")
-        return facilities
-        
-    except Exception as e:
-        print(f"❌ Error loading Datavant facilities CSV: {e}")
-        return []
+    return facility_index.all()
 
 def get_facility_by_site(site_number: str) -> Optional[Dict[str, Any]]:
     """
     Get facility data by site number
     
     Args:
-        site_number: Site number to lookup (e.g., "00101")
+        site_number: Site number to lookup (e.g., "00101" or "101")
         
     Returns:
         Facility dictionary or None if not found
     """
-    facilities = load_datavant_facilities()
-    
-    for facility in facilities:
-        if facility['site'] == site_number.strip():
-            return facility
-    
-    print(f"⚠️ Facility with site number '{site_number}' not found in CSV")
-    return None
+    facility = facility_index.by_site(site_number)
+    if facility is None:
+        log.warning("⚠️ Facility with site number '%s' not found in CSV", site_number)
+    return facility
 
 def get_first_facility() -> Optional[Dict[str, Any]]:
     """
@@ -115,50 +85,63 @@ def get_first_facility() -> Optional[Dict[str, Any]]:
     
     if facilities:
         first_facility = facilities[0]
-        print(f"🔍 Using first facility: {first_facility['siteName']} (Site: {first_facility['site']})")
+        log.info("🔍 Using first facility: %s (Site: %s)", first_facility['siteName'], first_facility['site'])
         return first_facility
     
-    print("❌ No facilities found in CSV")
+    log.error("❌ No facilities found in CSV")
     return None
 
+def _facility_from_csv(csv_facility: Dict[str, Any]) -> Facility:
+    """Build a Datavant Facility from a facility CSV entry"""
+    return Facility(
+        addressLine1=csv_facility['addressLine1'],
+        addressLine2=csv_facility['addressLine2'],
+        city=csv_facility['city'],
+        state=csv_facility['state'],
+        zip=csv_facility['zip'],
+        healthSystem=csv_facility['healthSystem'],
+        siteName=csv_facility['siteName'],
+        phone=csv_facility['phone'],
+        fax=csv_facility['fax']
+    )
+
 def _get_facility_for_datavant_request(data: RedcapResponseFirst) -> Facility:
     """
     Get facility data for Datavant request, prioritizing CSV lookup over form data
     
+    The REDCap hospital fields (hos_name, hospital_phone_num, hospital_fax_num,
+    hospital_address) are matched against the facility CSV; when no candidate
+    scores high enough the first CSV facility is used as before.
+    
     Args:
         data: RedcapResponseFirst object containing form data
         
     Returns:
         Facility object with appropriate data
     """
-    # TODO: In future, match facility number from redcap detail response with CSV SITE
-    # Example usage when facility matching is implemented:
-    # facility_number = getattr(data, 'facility_number', None) or getattr(data, 'site_id', None)
-    # if facility_number:
-    #     csv_facility = get_facility_by_site(str(facility_number).zfill(5))  # Pad to 5 digits like 00101
-    #     if csv_facility:
-    #         return create_facility_from_csv_data(csv_facility)
-    
-    # For now, use the first facility from CSV as requested
+    match = facility_matcher.best_match(
+        hos_name=getattr(data, 'hos_name', ''),
+        phone=getattr(data, 'hospital_phone_num', ''),
+        fax=getattr(data, 'hospital_fax_num', ''),
+        address=getattr(data, 'hospital_address', ''),
+        city_state=getattr(data, 'bc_birthplace_city_state', ''),
+        min_score=FACILITY_MATCH_MIN_SCORE
+    )
+    if match:
+        csv_facility = match.facility
+        log.info("🔍 Matched facility: %s (Site: %s, score: %.2f, %s)", csv_facility['siteName'],
+                 csv_facility['site'], match.score, ', '.join(match.reasons))
+        return _facility_from_csv(csv_facility)
     
+    log.warning("⚠️ No facility match for '%s', using first CSV facility", getattr(data, 'hos_name', ''))
     csv_facility = get_first_facility()
     
     if csv_facility:
-        print(f"🔍 Using CSV facility: {csv_facility['siteName']} (Site: {csv_facility['site']})")
-        return Facility(
-            addressLine1=csv_facility['addressLine1'],
-            addressLine2=csv_facility['addressLine2'],
-            city=csv_facility['city'],
-            state=csv_facility['state'],
-            zip=csv_facility['zip'],
-            healthSystem=csv_facility['healthSystem'],
-            siteName=csv_facility['siteName'],
-            phone=csv_facility['phone'],
-            fax=csv_facility['fax']
-        )
+        log.info("🔍 Using CSV facility: %s (Site: %s)", csv_facility['siteName'], csv_facility['site'])
+        return _facility_from_csv(csv_facility)
     else:
         # Fallback to form data if CSV loading fails
-        print("⚠️ CSV facility not available, falling back to form data")
+        log.warning("⚠️ CSV facility not available, falling back to form data")
         return Facility(
             addressLine1=getattr(data, 'mr_address_line_1', ''),
             addressLine2=getattr(data, 'mr_address_line_2', None),
@@ -171,17 +154,18 @@ def _get_facility_for_datavant_request(data: RedcapResponseFirst) -> Facility:
             fax=getattr(data, 'mr_fax', '')
         )
 
-def process_first_request(data:RedcapResponseFirst,counter:Counter):
-    print(f"Processing first request for {data.record}")
+def process_first_request(data:RedcapResponseFirst,counter:Counter) -> bool:
+    log.info("Processing first request for %s", data.record)
     try:
         data_to_process = get_log_detail_data_from_api(data)
         if len(data_to_process) == 0:
-            print(f"❌ No data to process for {data.record}")
-            return
+            log.error("❌ No data to process for %s", data.record)
+            return False
         
         
+        success = True
         for j, item in enumerate(data_to_process):
-            print(f"📄 Processing {j+1} of {item.mg_idpreg}")
+            log.info("📄 Processing %s of %s", j+1, item.mg_idpreg)
             item.mr_rec_needs___1 = "1"
             item.mr_rec_needs___2 = "1"
             item.mr_rec_needs___3 = "1"
@@ -210,22 +194,18 @@ def process_first_request(data:RedcapResponseFirst,counter:Counter):
             item.mr_rec_needs_inf___12 = "1"
             item.mr_rec_needs_inf___13 = "1"
             item = replace(item)
-            handle_pdf_generation(item,"first_request",data,j)
-            if(item.mr_dv == "1"):
-                request_for = getattr(data, 'mr_req_for', None)
-                handle_datavant_request(item, j, "first_request", request_for)
-            else:
-                print(f"🔄 skipping datavant request for {item.mg_idpreg}_{j}")
-                # Send SAS email notification when mr_dv is not 1
-                sas_email_service = SASEmailService()
-                patient_name = f"{getattr(item, 'bc_momnamefirst', '')} {getattr(item, 'bc_momnamelast', '')}".strip()
-                facility_name = getattr(item, 'hos_name', '')
-                sas_email_service.send_mr_dv_notification(
-                    record_id=f"{item.mg_idpreg}_{j}",
-                    patient_name=patient_name if patient_name else None,
-                    facility_name=facility_name if facility_name else None
-                )
+            with record_timing() as timings:
+                success = handle_pdf_generation(item,"first_request",data,j,timings) and success
+                if(item.mr_dv == "1"):
+                    request_for = getattr(data, 'mr_req_for', None)
+                    handle_datavant_request(item, j, "first_request", request_for)
+                else:
+                    log.info("🔄 skipping datavant request for %s_%s", item.mg_idpreg, j)
+                    # Send SAS email notification when mr_dv is not 1
+                    send_mr_dv_notification(item, j)
+            _document_part_done(f"{item.mg_idpreg}_{j}", timings)
             counter.inc()
+        return success
     except Exception as e:
         logger.log({
             "record": data.record,
@@ -234,20 +214,21 @@ def process_first_request(data:RedcapResponseFirst,counter:Counter):
             "status": "error",
             "details": f"Error processing {data.record}: {e}"
         })
-        print(f"❌ Error processing {data.record}: {e}")
-        return
+        log.error("❌ Error processing %s: %s", data.record, e)
+        return False
 
-def process_complete_second_request(data:RedcapResponseFirst,counter:Counter):
-    print(f"Processing complete second request for {data.record}")
+def process_complete_second_request(data:RedcapResponseFirst,counter:Counter) -> bool:
+    log.info("Processing complete second request for %s", data.record)
     try:
         data_to_process = get_log_detail_data_from_api(data)
         if len(data_to_process) == 0:
-            print(f"❌ No data to process for {data.record}")
-            return
+            log.error("❌ No data to process for %s", data.record)
+            return False
 
         
+        success = True
         for j, item in enumerate(data_to_process):
-            print(f"📄 Processing {j+1} of {item.mg_idpreg}")
+            log.info("📄 Processing %s of %s", j+1, item.mg_idpreg)
             item.mr_rec_needs___1 = "0"
             item.mr_rec_needs___2 = "0"
             item.mr_rec_needs___3 = "0"
@@ -276,21 +257,18 @@ def process_complete_second_request(data:RedcapResponseFirst,counter:Counter):
             item.mr_rec_needs_inf___12 = "1"
             item.mr_rec_needs_inf___13 = "1"
             item = replace(item)
-            handle_pdf_generation(item,"second_request",data,j)
-            if(item.mr_dv == "1"):
-                handle_datavant_request(item, j, "second_request_complete", request_for)
-            else:
-                print(f"🔄 skipping datavant request for {item.mg_idpreg}_{j}")
-                # Send SAS email notification when mr_dv is not 1
-                sas_email_service = SASEmailService()
-                patient_name = f"{getattr(item, 'bc_momnamefirst', '')} {getattr(item, 'bc_momnamelast', '')}".strip()
-                facility_name = getattr(item, 'hos_name', '')
-                sas_email_service.send_mr_dv_notification(
-                    record_id=f"{item.mg_idpreg}_{j}",
-                    patient_name=patient_name if patient_name else None,
-                    facility_name=facility_name if facility_name else None
-                )
+            with record_timing() as timings:
+                success = handle_pdf_generation(item,"second_request",data,j,timings) and success
+                if(item.mr_dv == "1"):
+                    request_for = getattr(data, 'mr_req_for', None)
+                    handle_datavant_request(item, j, "second_request_complete", request_for)
+                else:
+                    log.info("🔄 skipping datavant request for %s_%s", item.mg_idpreg, j)
+                    # Send SAS email notification when mr_dv is not 1
+                    send_mr_dv_notification(item, j)
+            _document_part_done(f"{item.mg_idpreg}_{j}", timings)
             counter.inc()
+        return success
     except Exception as e:
         logger.log({
             "record": data.record,
@@ -299,23 +277,27 @@ def process_complete_second_request(data:RedcapResponseFirst,counter:Counter):
             "status": "error",
             "details": f"Error processing {data.record}: {e}"
         })
-        print(f"❌ Error processing {data.record}: {e}")
-        return
+        log.error("❌ Error processing %s: %s", data.record, e)
+        return False
 
-def process_partial_second_request(data:RedcapResponseFirst,counter:Counter):
-    print(f"Processing partial second request for {data.record}")
+def process_partial_second_request(data:RedcapResponseFirst,counter:Counter) -> bool:
+    log.info("Processing partial second request for %s", data.record)
     try:
         data_to_process = get_log_detail_data_from_api(data)
         if len(data_to_process) == 0:
-            print(f"❌ No data to process for {data.record}")
-            return
+            log.error("❌ No data to process for %s", data.record)
+            return False
 
+        success = True
         for j, item in enumerate(data_to_process):
-            print(f"📄 Processing {j+1} of {item.mg_idpreg}")
-            handle_pdf_generation(item,"second_request",data,j)
-            counter.inc()
-            request_for = getattr(data, 'mr_req_for', None)
-            handle_datavant_request(item, j, "second_request_partial", request_for)
+            log.info("📄 Processing %s of %s", j+1, item.mg_idpreg)
+            with record_timing() as timings:
+                success = handle_pdf_generation(item,"second_request",data,j,timings) and success
+                counter.inc()
+                request_for = getattr(data, 'mr_req_for', None)
+                handle_datavant_request(item, j, "second_request_partial", request_for)
+            _document_part_done(f"{item.mg_idpreg}_{j}", timings)
+        return success
     except Exception as e:
         logger.log({
             "record": data.record,
@@ -324,15 +306,55 @@ def process_partial_second_request(data:RedcapResponseFirst,counter:Counter):
             "status": "error",
             "details": f"Error processing {data.record}: {e}"
         })
-        print(f"❌ Error processing {data.record}: {e}")
-        return
+        log.error("❌ Error processing %s: %s", data.record, e)
+        return False
+
+
+def send_mr_dv_notification(item, j: int) -> bool:
+    """
+    Queue the mr_dv email notification for a non-Datavant record
+    
+    Uses the shared SASEmailService so the SAS config and HSB template are
+    parsed once and the SMTP connection is reused. Not sent again when a
+    retry of the record finds it already sent (or queued).
+    """
+    step = processing_ledger.step_key(f"{item.mg_idpreg}_{j}", "mr_dv_email")
+    if processing_ledger.step_done(step):
+        log.info("⏭️ mr_dv notification for %s_%s already sent", item.mg_idpreg, j)
+        return True
+    patient_name = f"{getattr(item, 'bc_momnamefirst', '')} {getattr(item, 'bc_momnamelast', '')}".strip()
+    facility_name = getattr(item, 'hos_name', '')
+    sent = get_sas_email_service().send_mr_dv_notification(
+        record_id=f"{item.mg_idpreg}_{j}",
+        patient_name=patient_name if patient_name else None,
+        facility_name=facility_name if facility_name else None
+    )
+    if sent:
+        processing_ledger.mark_step_done(step)
+    return sent
+
+
+def handle_pdf_generation(data,request_type,first_data,j,timings: RecordTimings) -> bool:
+    """
+    Generate the PDF of one document, or hand it to the render pool
 
+    timings are the document's record_timing(); the render's stages are added
+    to them when it finishes (see _document_part_done)
 
-def handle_pdf_generation(data,request_type,first_data,j):
+    Returns:
+        bool: Whether the PDF was generated; always True once queued on a
+              parallel render pool (failures are reported by render_pool.wait())
+    """
+    mg_idpreg = data.mg_idpreg
+    # Generated by an earlier attempt at this record state (which failed on another document)
+    step = processing_ledger.step_key(f"{mg_idpreg}_{j}", "pdf")
+    if processing_ledger.step_done(step):
+        log.info("⏭️ PDF for %s_%s already generated", mg_idpreg, j)
+        _document_part_done(f"{mg_idpreg}_{j}", timings)
+        return True
     try:
         request_for = data.mr_req_for
-        mg_idpreg = data.mg_idpreg
-        print(f"📄 Generating PDF for {mg_idpreg}_{j}")
+        log.info("📄 Generating PDF for %s_%s", mg_idpreg, j)
         
         # Start dashboard tracking
         patient_name = f"{getattr(data, 'bc_momnamefirst', '')} {getattr(data, 'bc_momnamelast', '')}".strip()
@@ -348,12 +370,81 @@ def handle_pdf_generation(data,request_type,first_data,j):
         )
         
         template_path = get_template_path(request_for)
-        template_service = TemplateService(template_path)
-        docx_path = template_service.fill_template(request_type,data.to_dict(),j)  
-        print(f"📄 Docx path test: {docx_path}")
-        pdf_service = PDFService()
-        pdf_path = pdf_service.convert_to_pdf(docx_path,request_type, f"{mg_idpreg}_{j}")      
-        print(f"✅ PDF generated for {mg_idpreg}_{j}")
+        template_data = data.to_dict()
+        # Same template and data as an earlier run: link the stored PDF instead of rendering
+        store_key = document_key(template_path, template_data) if os.path.exists(template_path) else None
+        linked_path = store_key and document_store.link(
+            store_key, PDFService().pdf_path(request_type, f"{mg_idpreg}_{j}"))
+        if linked_path:
+            metrics.inc("medicos_document_store_total", outcome="hit")
+            log.info("♻️ PDF for %s_%s unchanged, linked from the document store", mg_idpreg, j)
+            return _finish_pdf_generation(data, request_type, first_data, j, None, step, timings,
+                                          {"pdf_path": linked_path.replace(os.sep, '/'), "linked": True, "error": None})
+        
+        job = {
+            "template_path": template_path,
+            "data": template_data,
+            "request_type": request_type,
+            "mg_idpreg": mg_idpreg,
+            "j": j,
+            "keep_docx": KEEP_INTERMEDIATE_DOCX,
+        }
+        return render_pool.submit(job, lambda result: _finish_pdf_generation(
+            data, request_type, first_data, j, store_key, step, timings, result))
+    except Exception as e:
+        _document_part_done(f"{mg_idpreg}_{j}", timings)
+        return _track_pdf_failure(data, first_data, j, str(e))
+
+
+# Documents of which either the loop iteration or the PDF render has finished, not both
+_half_finished: Set[RecordTimings] = set()
+
+
+def _document_part_done(record_id: str, timings: RecordTimings):
+    """
+    Record a document as complete once its loop iteration and its PDF render have both finished
+
+    On a parallel render pool the render usually finishes after the loop has
+    moved on; the duration then runs until the render's result was handled.
+    """
+    if timings not in _half_finished:
+        _half_finished.add(timings)
+        return
+    _half_finished.discard(timings)
+    track_processing_complete(record_id, time.perf_counter() - timings.started, timings.stages)
+
+
+def _finish_pdf_generation(data, request_type, first_data, j, store_key, step: Optional[str],
+                           timings: RecordTimings, result: dict) -> bool:
+    """Record a rendered (or store-linked) PDF: timings, document store, ledger, dashboard and CSV logs"""
+    # The render pool calls this outside of any record_timing() block: attribute the worker's
+    # stages, and the trackers written below, to this document
+    with record_timing(timings):
+        try:
+            generated = _record_pdf_result(data, request_type, first_data, j, store_key, result)
+            if generated:
+                processing_ledger.mark_step_done(step)
+            return generated
+        finally:
+            _document_part_done(f"{data.mg_idpreg}_{j}", timings)
+
+
+def _record_pdf_result(data, request_type, first_data, j, store_key, result: dict) -> bool:
+    mg_idpreg = data.mg_idpreg
+    for stage, seconds in result.get("timings", {}).items():
+        stage_timings.observe(stage, seconds)
+    if result.get("error"):
+        return _track_pdf_failure(data, first_data, j, result["error"])
+    try:
+        request_for = data.mr_req_for
+        pdf_path = result["pdf_path"]
+        if result.get("docx_path"):
+            log.debug("📄 Docx path test: %s", result["docx_path"])
+        if not result.get("linked"):
+            log.info("✅ PDF generated for %s_%s", mg_idpreg, j)
+            if store_key:
+                document_store.add(store_key, pdf_path)
+                metrics.inc("medicos_document_store_total", outcome="miss")
         
         # Track PDF success
         template_name = request_for_to_template_name(request_for)
@@ -377,31 +468,36 @@ def handle_pdf_generation(data,request_type,first_data,j):
             "status": "generated",
             "details": ", ".join(f"{key} = {value}" for key, value in first_data.details.items())
         })
-        time.sleep(2)
+        return True
     except Exception as e:
-        # Track PDF error
-        track_pdf_error(f"{mg_idpreg}_{j}", str(e))
-        
-        logger.log({
-            "record": mg_idpreg,
-            "timestamp": first_data.timestamp,
-            "username": first_data.username,
-            "status": "error",
-            "details": f"Error generating PDF for {mg_idpreg}_{j}: {e}"
-        })
-        print(f"❌ Error generating PDF for {mg_idpreg}_{j}: {e}")
-        return
+        return _track_pdf_failure(data, first_data, j, str(e))
+
+
+def _track_pdf_failure(data, first_data, j, error: str) -> bool:
+    mg_idpreg = data.mg_idpreg
+    # Track PDF error
+    track_pdf_error(f"{mg_idpreg}_{j}", error)
+    
+    logger.log({
+        "record": mg_idpreg,
+        "timestamp": first_data.timestamp,
+        "username": first_data.username,
+        "status": "error",
+        "details": f"Error generating PDF for {mg_idpreg}_{j}: {error}"
+    })
+    log.error("❌ Error generating PDF for %s_%s: %s", mg_idpreg, j, error)
+    return False
 
 
 def get_template_path(request_for):
     if request_for == "1":
-        print("🔍 Using Mother template")
+        log.info("🔍 Using Mother template")
         return os.path.join(os.getcwd(), "assets/templates/mother_template.docx")
     elif request_for == "2":
-        print("🔍 Using Infant template")
+        log.info("🔍 Using Infant template")
         return os.path.join(os.getcwd(), "assets/templates/infant_template.docx")
     else:
-        print("🔍 Using Combined template")
+        log.info("🔍 Using Combined template")
         return os.path.join(os.getcwd(), "assets/templates/combined_template.docx")
 
 def request_for_to_template_name(request_for):
@@ -427,13 +523,13 @@ def get_record_types_for_request(request_for) -> List[str]:
     service = SmartRequestService()
     
     if request_for == "1":
-        print("🔍 Using Mom record types for Datavant request")
+        log.info("🔍 Using Mom record types for Datavant request")
         return service.get_mom_record_types()
     elif request_for == "2":
-        print("🔍 Using Infant record types for Datavant request")
+        log.info("🔍 Using Infant record types for Datavant request")
         return service.get_infant_record_types()
     else:
-        print("🔍 Using Combined record types for Datavant request")
+        log.info("🔍 Using Combined record types for Datavant request")
         # For combined requests, use all available record types
         mom_types = service.get_mom_record_types()
         infant_types = service.get_infant_record_types()
@@ -465,7 +561,7 @@ def _get_record_types_for_datavant_request(data: RedcapResponseFirst, request_fo
             return [manual_types]
     
     # Final fallback: use combined record types (safest option)
-    print("⚠️ No request_for or manual record types specified, using combined record types")
+    log.warning("⚠️ No request_for or manual record types specified, using combined record types")
     return get_record_types_for_request("combined")
 
 def get_datavant_request_data(data: RedcapResponseFirst, request_for: str = None) -> DatavantRequest:
@@ -482,11 +578,11 @@ def get_datavant_request_data(data: RedcapResponseFirst, request_for: str = None
     try:
         # Get date range for the request
         date_range = get_datavant_date_range()
-        print(f"🗓️ Using Datavant date range: {date_range[0]} to {date_range[1]}")
+        log.info("🗓️ Using Datavant date range: %s to %s", date_range[0], date_range[1])
         
         # Log patient data being used
         patient_name = f"{getattr(data, 'bc_momnamefirst', '')} {getattr(data, 'bc_momnamelast', '')}".strip()
-        print(f"👤 Using patient data: {patient_name} (DOB: {getattr(data, 'bc_mom_dob', 'N/A')})")
+        log.debug("👤 Using patient data: %s (DOB: %s)", patient_name, getattr(data, 'bc_mom_dob', 'N/A'))
         
         return DatavantRequest(
             facility=_get_facility_for_datavant_request(data),
@@ -520,7 +616,7 @@ def get_datavant_request_data(data: RedcapResponseFirst, request_for: str = None
             callbackDetails=_create_callback_details(data)
         )
     except Exception as e:
-        print(f"❌ Error creating SmartRequest data: {e}")
+        log.error("❌ Error creating SmartRequest data: %s", e)
         raise
 
 
@@ -548,22 +644,36 @@ def handle_datavant_request(item, j: int, document_type: str, request_for: str =
         document_type: Type of document request (first_request, second_request_complete, etc.)
         request_for: Request type ("1" for mother, "2" for infant, other for combined)
     """
+    datavant_request_data = None
+    outbox_key = make_key(f"{item.mg_idpreg}_{j}", document_type)
+    patient_name = f"{getattr(item, 'mr_first_name', '')} {getattr(item, 'mr_last_name', '')}".strip()
+    facility_name = getattr(item, 'mr_site_name', '')
+    # Submitted (or handed to the outbox) by an earlier attempt at this record state
+    step = processing_ledger.step_key(f"{item.mg_idpreg}_{j}", "smartrequest")
+    if processing_ledger.step_done(step):
+        log.info("⏭️ SmartRequest for %s_%s already submitted", item.mg_idpreg, j)
+        return
+    queued = outbox.get(outbox_key)
+    if queued is not None and queued.status == STATUS_REVIEW:
+        # An earlier submission may have created the request: wait for the operator
+        log.warning("⚠️ SmartRequest for %s_%s is in manual review, not submitting again", item.mg_idpreg, j)
+        return
     try:
         datavant_request_data = get_datavant_request_data(item, request_for)
-        print(f"🔄 Datavant request data: {datavant_request_data}")
+        log.debug("🔄 Datavant request data: %s", datavant_request_data)
         api_response = submit_datavant_request(datavant_request_data)
-        print(f"🔄 SmartRequest API response: {api_response}")
+        log.debug("🔄 SmartRequest API response: %s", api_response)
         
         # Track SmartRequest in dashboard
         if api_response and api_response.get('requestId'):
             request_id = api_response['requestId']
-            patient_name = f"{getattr(item, 'mr_first_name', '')} {getattr(item, 'mr_last_name', '')}".strip()
-            facility_name = getattr(item, 'mr_site_name', '')
+            # Clears any retry queued by an earlier run for the same record
+            outbox.mark_done(outbox_key)
             
             # Dashboard tracking - Success case
             track_smartrequest_sent(f"{item.mg_idpreg}_{j}", request_id, datavant_request_data.model_dump() if hasattr(datavant_request_data, 'model_dump') else None)
             track_smartrequest_success(f"{item.mg_idpreg}_{j}", request_id)
-            print(f"✅ SmartRequest tracked as successful for {item.mg_idpreg}_{j}")
+            log.info("✅ SmartRequest tracked as successful for %s_%s", item.mg_idpreg, j)
             
             # Original tracking (for backward compatibility)
             track_smartrequest(
@@ -573,15 +683,51 @@ def handle_datavant_request(item, j: int, document_type: str, request_for: str =
                 patient_name=patient_name if patient_name else None,
                 facility_name=facility_name if facility_name else None
             )
+            processing_ledger.mark_step_done(step)
         else:
             # Dashboard tracking - Failure case
             error_msg = "SmartRequest API call failed or returned no requestId"
             if api_response:
                 error_msg += f": {api_response}"
             track_smartrequest_error(f"{item.mg_idpreg}_{j}", error_msg)
-            print(f"❌ SmartRequest failed for {item.mg_idpreg}_{j}: {error_msg}")
+            log.error("❌ SmartRequest failed for %s_%s: %s", item.mg_idpreg, j, error_msg)
+            # From here on the outbox owns the retry
+            if queue_datavant_retry(outbox_key, item, j, document_type, datavant_request_data,
+                                    patient_name, facility_name, error_msg):
+                processing_ledger.mark_step_done(step)
+    except SmartRequestOutcomeUnknown as e:
+        error_msg = f"SmartRequest may have been created: {e}"
+        track_smartrequest_error(f"{item.mg_idpreg}_{j}", error_msg)
+        if queue_datavant_retry(outbox_key, item, j, document_type, datavant_request_data,
+                                patient_name, facility_name, error_msg, status=STATUS_REVIEW):
+            processing_ledger.mark_step_done(step)
     except Exception as e:
         # Track unexpected SmartRequest errors
         error_msg = f"Unexpected error during SmartRequest: {str(e)}"
         track_smartrequest_error(f"{item.mg_idpreg}_{j}", error_msg)
-        print(f"❌ SmartRequest exception for {item.mg_idpreg}_{j}: {error_msg}")
\ No newline at end of file
+        log.error("❌ SmartRequest exception for %s_%s: %s", item.mg_idpreg, j, error_msg)
+        if datavant_request_data is not None and queue_datavant_retry(
+                outbox_key, item, j, document_type, datavant_request_data,
+                patient_name, facility_name, error_msg):
+            processing_ledger.mark_step_done(step)
+
+
+def queue_datavant_retry(key: str, item, j: int, document_type: str, datavant_request_data: DatavantRequest,
+                         patient_name: str, facility_name: str, error_msg: str,
+                         status: str = STATUS_PENDING) -> bool:
+    """
+    Store a failed SmartRequest submission in the outbox for outbox_drainer.py
+    
+    The payload carries the exact request body, so a retry does not need to
+    re-fetch the record or regenerate its PDFs. With STATUS_REVIEW (the
+    request may exist) it waits for an operator instead of being resubmitted.
+    """
+    payload = {
+        "record_id": f"{item.mg_idpreg}_{j}",
+        "mg_idpreg": item.mg_idpreg,
+        "document_type": document_type,
+        "patient_name": patient_name or None,
+        "facility_name": facility_name or None,
+        "request": datavant_request_data.model_dump(exclude_none=True),
+    }
+    return outbox.enqueue(key, KIND_SMARTREQUEST, payload, error_msg, status)
\ No newline at end of file
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+"""
+PDF Render Pool
+Template filling and PDF conversion on a pool of worker processes, so
+template filling no longer queues behind the GIL.
+
+Jobs are plain dicts (the record's RedcapResponseSecond.to_dict() plus where
+to write the PDF); each worker loads python-docx and the templates once at
+start-up. On Windows each worker converts with its own Word instance; on
+other platforms the workers share the one Word application and take turns
+(see pdf_service.start_word()). How far conversion scales with several Word
+instances depends on the machine: measure with benchmarks/bench_pipeline.py
+before raising PDF_WORKERS. A worker returns the PDF path and its stage
+timings; the caller's on_done callback then runs in the submitting thread,
+where the dashboard and CSV trackers are written.
+
+With PDF_WORKERS=1 (the default) jobs run inline, exactly as before.
+"""
+
+import contextvars
+import multiprocessing
+import multiprocessing.util
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, Deque, Iterator, List, Optional, Set, Tuple
+
+from utils.logger import configure_logging, get_logger, reset_logging, shutdown_logging
+
+log = get_logger(__name__)
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "1"))
+# Pause after each generated PDF (gives Word time to release the document); 0 for benchmarks
+PDF_THROTTLE_SECONDS = float(os.getenv("PDF_THROTTLE_SECONDS", "2"))
+TEMPLATE_DIR = os.path.join("assets", "templates")
+
+
+def _init_worker(template_paths: List[str], convert_lock):
+    """Set up logging, load python-docx and the template files once per worker process, and set up its Word"""
+    # A forked worker inherits the parent's queue handler but not the thread writing it out
+    reset_logging()
+    configure_logging()
+    # Workers leave without running atexit hooks: write out their last records
+    multiprocessing.util.Finalize(None, shutdown_logging, exitpriority=0)
+    import docx  # noqa: F401  (the import is what takes time)
+    from services.pdf_service import start_word
+    from services.template_service import _read_template_bytes
+
+    start_word(convert_lock)
+
+    for path in template_paths:
+        if os.path.exists(path):
+            _read_template_bytes(path, os.path.getmtime(path))
+
+
+def render_document(job: dict) -> dict:
+    """
+    Fill the template and convert it to PDF
+
+    Args:
+        job: template_path, data (template values), request_type, mg_idpreg, j,
+             keep_docx (also write the .docx next to the PDF)
+
+    Returns:
+        dict: pdf_path, docx_path, timings (seconds per stage) and error (None on success)
+    """
+    from services.pdf_service import PDFService
+    from services.template_service import TemplateService
+
+    result = {"pdf_path": None, "docx_path": None, "timings": {}, "error": None}
+
+    @contextmanager
+    def timed(stage: str):
+        # Like time_stage(), but reported back to the parent process instead of observed here
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            result["timings"][stage] = time.perf_counter() - started
+
+    try:
+        template_service = TemplateService(job["template_path"])
+        with timed("fill_template"):
+            docx = template_service.render(job["data"])
+        if job.get("keep_docx"):
+            result["docx_path"] = template_service.save_docx(docx, job["request_type"], job["mg_idpreg"], job["j"])
+
+        with timed("convert_to_pdf"):
+            result["pdf_path"] = PDFService().convert_to_pdf(docx, job["request_type"], f"{job['mg_idpreg']}_{job['j']}")
+        if PDF_THROTTLE_SECONDS > 0:
+            time.sleep(PDF_THROTTLE_SECONDS)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+class RenderPool:
+    """Runs render_document jobs on worker processes, or inline with one worker"""
+
+    def __init__(self, workers: int = PDF_WORKERS, template_dir: str = TEMPLATE_DIR,
+                 max_pending: Optional[int] = None):
+        self.workers = max(workers, 1)
+        self.template_dir = template_dir
+        # Bounds the jobs (and their record data) held in memory at once
+        self.max_pending = max_pending or self.workers * 4
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Deque[Tuple[Future, Callable[[dict], bool], Optional[str]]] = deque()
+        self._owner: Optional[str] = None
+        self._failed: Set[str] = set()
+
+    @property
+    def parallel(self) -> bool:
+        return self.workers > 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            template_paths = [os.path.join(os.getcwd(), self.template_dir, name)
+                              for name in sorted(os.listdir(self.template_dir))] \
+                if os.path.isdir(self.template_dir) else []
+            log.info("🧵 Starting %d PDF render workers", self.workers)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(template_paths, multiprocessing.Lock()))
+        return self._executor
+
+    @contextmanager
+    def collect(self, owner: str) -> Iterator[None]:
+        """Attribute the jobs submitted in this block to owner (e.g. a REDCap record ID)"""
+        previous, self._owner = self._owner, owner
+        try:
+            yield
+        finally:
+            self._owner = previous
+
+    def submit(self, job: dict, on_done: Callable[[dict], bool]) -> bool:
+        """
+        Render job; on_done(result) -> bool handles the result in this thread
+
+        Returns:
+            bool: on_done's result when rendered inline; True once queued on the pool
+                  (a failure then shows up in wait())
+        """
+        if not self.parallel:
+            ok = on_done(render_document(job))
+            if not ok and self._owner is not None:
+                self._failed.add(self._owner)
+            return ok
+
+        future = self._get_executor().submit(render_document, job)
+        self._pending.append((future, on_done, self._owner))
+        if len(self._pending) >= self.max_pending:
+            self._finish(wait([entry[0] for entry in self._pending], return_when=FIRST_COMPLETED).done)
+        return True
+
+    def _finish(self, done):
+        """Run on_done for the finished futures, in submission order"""
+        remaining = deque()
+        for future, on_done, owner in self._pending:
+            if future not in done:
+                remaining.append((future, on_done, owner))
+                continue
+            try:
+                result = future.result()
+            except Exception as e:  # the worker process died
+                result = {"pdf_path": None, "docx_path": None, "timings": {}, "error": f"{type(e).__name__}: {e}"}
+            # Outside of any record_timing() block: the stages belong to the job's record, not the current one
+            ok = contextvars.Context().run(on_done, result)
+            if not ok and owner is not None:
+                self._failed.add(owner)
+        self._pending = remaining
+
+    def wait(self) -> Set[str]:
+        """
+        Finish every submitted job
+
+        Returns:
+            set: Owners with at least one failed job since the last wait()
+        """
+        if self._pending:
+            self._finish(wait([entry[0] for entry in self._pending]).done)
+        failed, self._failed = self._failed, set()
+        return failed
+
+    def shutdown(self):
+        self.wait()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+# Global render pool
+render_pool = RenderPool()
@@ -1,19 +1,68 @@
 import os
 import re
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+from functools import lru_cache
 from typing import Optional
 from datetime import datetime
 
+from services.email_dispatcher import get_dispatcher
+from services.notification_digest import DigestEntry, NotificationDigest, digest_enabled_from_env, render_digest_body
+from utils.logger import get_logger
+from utils.outbox import enqueue_failed_email, make_key
+
+log = get_logger(__name__)
+
+DEFAULT_SAS_CONFIG_PATH = "/opt/sas/config/Lev1/SASApp/sasv9.cfg"
+EMAIL_TEMPLATE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'templates', 'email_body.hsb'))
+
+
+def _file_mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=8)
+def _parse_sas_email_config(cfg_path: str, mtime: float) -> dict:
+    """
+    Parse SAS config file to extract email settings (cached per path and mtime).
+    Example options in sasv9.cfg:
+        -EMAILSYS SMTP
+        -EMAILHOST smtp.example.com
+        -EMAILPORT 25
+        -EMAILID user@example.com
+    """
+    config = {}
+    pattern = re.compile(r"^-(EMAIL\w+)\s+(.*)", re.IGNORECASE)
+
+    with open(cfg_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            match = pattern.match(line)
+            if match:
+                key, value = match.groups()
+                config[key.upper()] = value
+
+    return config
+
+
+@lru_cache(maxsize=8)
+def _read_email_template(template_path: str, mtime: float) -> str:
+    """Read the HSB email template (cached per path and mtime)"""
+    with open(template_path, 'r', encoding='utf-8') as file:
+        return file.read().strip()
+
 
 class SASEmailService:
     """Email service that uses SAS configuration file for email settings"""
     
-    def __init__(self, sas_config_path: Optional[str] = None):
+    def __init__(self, sas_config_path: Optional[str] = None, background: Optional[bool] = None,
+                 digest: Optional[bool] = None):
         # Default SAS config path
         if sas_config_path is None:
-            sas_config_path = "/opt/sas/config/Lev1/SASApp/sasv9.cfg"
+            sas_config_path = DEFAULT_SAS_CONFIG_PATH
         
         self.sas_config_path = sas_config_path
         self.config = self._load_config()
@@ -26,61 +75,50 @@ class SASEmailService:
         self.fallback_smtp_port = int(os.getenv('SMTP_PORT', '25'))
         self.fallback_from_email = os.getenv('FROM_EMAIL', 'bhanu.prathap.gaddam@tn.gov')
         self.notification_email = os.getenv('NOTIFICATION_EMAIL', 'bhanu.prathap.gaddam@tn.gov')
+        
+        # Queue notifications for background delivery unless disabled
+        if background is None:
+            background = os.getenv('EMAIL_BACKGROUND_SEND', 'true').lower() == 'true'
+        self.background = background
+        
+        # Digest mode batches notifications per recipient (EMAIL_DIGEST_MODE)
+        if digest is None:
+            digest = digest_enabled_from_env()
+        self.digest = NotificationDigest(self._send_digest) if digest else None
     
     def _load_config(self):
         """Load SAS email configuration"""
         try:
-            if os.path.exists(self.sas_config_path):
-                config = self._load_sas_email_config(self.sas_config_path)
-                print(f"✅ Loaded SAS email configuration from {self.sas_config_path}")
+            mtime = _file_mtime(self.sas_config_path)
+            if mtime is not None:
+                config = dict(_parse_sas_email_config(self.sas_config_path, mtime))
+                log.info("✅ Loaded SAS email configuration from %s", self.sas_config_path)
                 return config
             else:
-                print(f"⚠️ SAS config file not found at {self.sas_config_path}, using fallback settings")
+                log.warning("⚠️ SAS config file not found at %s, using fallback settings", self.sas_config_path)
                 return {}
         except Exception as e:
-            print(f"⚠️ Error loading SAS config: {e}, using fallback settings")
+            log.warning("⚠️ Error loading SAS config: %s, using fallback settings", e)
             return {}
     
     def _load_sas_email_config(self, cfg_path):
-        """
-        Parse SAS config file to extract email settings.
-        Example options in sasv9.cfg:
-            -EMAILSYS SMTP
-            -EMAILHOST smtp.example.com
-            -EMAILPORT 25
-            -EMAILID user@example.com
-        """
-        config = {}
-        pattern = re.compile(r"^-(EMAIL\w+)\s+(.*)", re.IGNORECASE)
-
-        with open(cfg_path, "r") as f:
-            for line in f:
-                line = line.strip()
-                match = pattern.match(line)
-                if match:
-                    key, value = match.groups()
-                    config[key.upper()] = value
-
-        return config
+        """Parse SAS config file to extract email settings (see _parse_sas_email_config)"""
+        return dict(_parse_sas_email_config(cfg_path, _file_mtime(cfg_path) or 0.0))
     
     def _load_email_template(self) -> str:
         """Load email template from HSB file"""
         try:
-            template_path = os.path.join(os.path.dirname(__file__), '..', '..', 'templates', 'email_body.hsb')
-            template_path = os.path.abspath(template_path)
-            
-            if not os.path.exists(template_path):
-                print(f"⚠️ HSB template file not found at {template_path}, using default")
+            mtime = _file_mtime(EMAIL_TEMPLATE_PATH)
+            if mtime is None:
+                log.warning("⚠️ HSB template file not found at %s, using default", EMAIL_TEMPLATE_PATH)
                 return self._get_default_template()
             
-            with open(template_path, 'r', encoding='utf-8') as file:
-                template = file.read().strip()
-                
-            print(f"✅ Loaded email template from HSB file")
+            template = _read_email_template(EMAIL_TEMPLATE_PATH, mtime)
+            log.info("✅ Loaded email template from HSB file")
             return template
             
         except Exception as e:
-            print(f"⚠️ Error loading HSB template: {e}, using default")
+            log.warning("⚠️ Error loading HSB template: %s, using default", e)
             return self._get_default_template()
     
     def _get_default_template(self) -> str:
@@ -123,9 +161,14 @@ Kind regards,"""
             # Use provided email or fallback to notification email
             recipient_email = to_email or self.notification_email
             if not recipient_email:
-                print(f"⚠️ No recipient email configured for mr_dv alert: {record_id}")
+                log.warning("⚠️ No recipient email configured for mr_dv alert: %s", record_id)
                 return False
             
+            if self.digest is not None:
+                self.digest.add(recipient_email, DigestEntry(record_id, patient_name, facility_name))
+                log.info("📨 Added %s to notification digest for %s", record_id, recipient_email)
+                return True
+            
             # Get SMTP settings
             smtp_settings = self.get_smtp_settings()
             
@@ -133,11 +176,20 @@ Kind regards,"""
             subject = "Medical Record Request"
             body = self._create_email_body(record_id, patient_name, facility_name)
             
+            # Undelivered notifications land in the outbox under this key
+            idempotency_key = make_key(record_id, "mr_dv_email")
+            
+            # Hand off to the background queue so PDF generation never waits on SMTP
+            if self.background:
+                self._dispatcher(smtp_settings).submit(recipient_email, subject, body, idempotency_key)
+                log.info("📨 Queued SAS email notification to %s for record: %s", recipient_email, record_id)
+                return True
+            
             # Send email
-            return self._send_email(recipient_email, subject, body, smtp_settings)
+            return self._send_email(recipient_email, subject, body, smtp_settings, idempotency_key=idempotency_key)
             
         except Exception as e:
-            print(f"❌ Error sending mr_dv notification email: {e}")
+            log.error("❌ Error sending mr_dv notification email: %s", e)
             return False
     
     def _create_email_body(self, record_id: str, patient_name: Optional[str] = None,
@@ -165,39 +217,45 @@ Kind regards,"""
         
         return body
     
-    def _send_email(self, to_email: str, subject: str, body: str, smtp_settings: dict) -> bool:
+    def _send_digest(self, recipient_email: str, entries) -> bool:
+        """Deliver one digest email for a batch of mr_dv notifications"""
+        smtp_settings = self.get_smtp_settings()
+        subject = f"Medical Record Request ({len(entries)} records)"
+        body = render_digest_body(self.email_template, entries)
+        if self.background:
+            self._dispatcher(smtp_settings).submit(recipient_email, subject, body)
+            return True
+        return self._send_email(recipient_email, subject, body, smtp_settings)
+    
+    def _dispatcher(self, smtp_settings: dict):
+        """Shared pooled-connection dispatcher for these SMTP settings"""
+        dispatcher = get_dispatcher(smtp_settings['server'], smtp_settings['port'], smtp_settings['from_email'])
+        if dispatcher.on_failure is None:
+            # Keep failed notifications for outbox_drainer.py instead of dropping them
+            dispatcher.on_failure = enqueue_failed_email
+        return dispatcher
+    
+    def _send_email(self, to_email: str, subject: str, body: str, smtp_settings: dict,
+                    idempotency_key: Optional[str] = None) -> bool:
         """
         Send email using SMTP with SAS configuration
         
+        The SMTP connection is pooled and reused across messages.
+        
         Args:
             to_email: Recipient email address
             subject: Email subject
             body: Email body text
             smtp_settings: SMTP configuration dictionary
+            idempotency_key: Outbox key used if delivery fails
             
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = smtp_settings['from_email']
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            # Add body to email
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # Create SMTP session and send
-            with smtplib.SMTP(smtp_settings['server'], smtp_settings['port']) as server:
-                # Send the message
-                server.send_message(msg)
-                
-            print(f"✅ SAS email notification sent to {to_email} for record: {subject}")
-            return True
-            
+            return self._dispatcher(smtp_settings).send(to_email, subject, body, idempotency_key)
         except Exception as e:
-            print(f"❌ Failed to send SAS email to {to_email}: {e}")
+            log.error("❌ Failed to send SAS email to %s: %s", to_email, e)
             return False
     
     def test_connection(self) -> bool:
@@ -205,17 +263,31 @@ Kind regards,"""
         try:
             smtp_settings = self.get_smtp_settings()
             
-            print(f"Testing SAS SMTP connection to {smtp_settings['server']}:{smtp_settings['port']}")
+            log.info("Testing SAS SMTP connection to %s:%s", smtp_settings['server'], smtp_settings['port'])
             
             with smtplib.SMTP(smtp_settings['server'], smtp_settings['port']) as server:
                 status = server.noop()[0]
                 if status == 250:
-                    print("✅ SAS SMTP connection test successful")
+                    log.info("✅ SAS SMTP connection test successful")
                     return True
                 else:
-                    print(f"⚠️ SAS SMTP connection test returned status: {status}")
+                    log.warning("⚠️ SAS SMTP connection test returned status: %s", status)
                     return False
                     
         except Exception as e:
-            print(f"❌ SAS SMTP connection test failed: {e}")
-            return False
\ No newline at end of file
+            log.error("❌ SAS SMTP connection test failed: %s", e)
+            return False
+
+
+_shared_service: Optional[SASEmailService] = None
+_shared_service_lock = threading.Lock()
+
+
+def get_sas_email_service() -> SASEmailService:
+    """Process-wide SASEmailService (config and template are parsed once)"""
+    global _shared_service
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                _shared_service = SASEmailService()
+    return _shared_service
@@ -1,21 +1,76 @@
 #!/usr/bin/env python
 import requests
 import base64
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
 from typing import Optional, Dict, List, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Import faker for local testing
-try:
-    from .smartrequest_faker import smartrequest_faker
-except ImportError:
-    # Handle relative import when running as module
-    import sys
-    sys.path.append(os.path.dirname(__file__))
-    from smartrequest_faker import smartrequest_faker
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+log = get_logger(__name__)
+
+
+def _faker():
+    """Faker backend for local testing, imported on first use (faker is slow to load)"""
+    try:
+        from .smartrequest_faker import smartrequest_faker
+    except ImportError:
+        # Handle relative import when running as module
+        import sys
+        sys.path.append(os.path.dirname(__file__))
+        from smartrequest_faker import smartrequest_faker
+    return smartrequest_faker
+
+# Throttled (429) responses were rejected unprocessed and are always retried
+THROTTLED_STATUS = 429
+# A 503 may come from a gateway after the API already acted, so it is only
+# retried for methods that are safe to repeat (not POST /request)
+UNAVAILABLE_STATUS = 503
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+MAX_RETRIES = int(os.getenv("SMARTREQUEST_MAX_RETRIES", "3"))
+# Longest wait between attempts, also when Retry-After asks for more
+MAX_RETRY_DELAY = float(os.getenv("SMARTREQUEST_MAX_RETRY_DELAY", "30"))
+RETRY_BASE_DELAY = 0.5
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Retry-After as seconds (delta-seconds or HTTP-date); None if absent or invalid"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class SmartRequestOutcomeUnknown(Exception):
+    """
+    POST /request failed after it may have reached the API (timeout, dropped
+    connection, 5xx): the request may exist, so it must not be sent again blindly
+    """
+
+
+def _request_may_exist(error: requests.exceptions.RequestException) -> bool:
+    """False only when the API certainly did not create the request"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    response = getattr(error, "response", None)
+    # 4xx (including 429 after the retries) means the request was rejected
+    return response is None or response.status_code >= 500
+
 
 class SmartRequestService:
     """Service class for interacting with SmartRequest (Datavant) API"""
@@ -27,6 +82,11 @@ class SmartRequestService:
         self.client_secret = os.getenv("SMARTREQUEST_CLIENT_SECRET", "")
         self.access_token: Optional[str] = None
         self.token_expires_at: Optional[datetime] = None
+        # Keep-alive connection pool shared by every API call
+        self.session = requests.Session()
+        self._auth_lock = threading.Lock()
+        self.max_retries = MAX_RETRIES
+        self.max_retry_delay = MAX_RETRY_DELAY
         
         # Check if we should use fake mode
         self.env = os.getenv("ENV", "production").lower()
@@ -36,7 +96,7 @@ class SmartRequestService:
                          os.getenv("USE_SMARTREQUEST_FAKER", "false").lower() == "true")
         
         if self.use_faker:
-            print("🎭 SmartRequest: Using faker mode for local testing")
+            log.info("🎭 SmartRequest: Using faker mode for local testing")
         
     def _get_basic_auth_header(self) -> str:
         """Generate Basic Auth header for token endpoint"""
@@ -63,22 +123,23 @@ class SmartRequestService:
             bool: True if authentication successful, False otherwise
         """
         if self.use_faker:
-            print("🎭 Using fake authentication...")
-            auth_data = smartrequest_faker.authenticate()
+            log.debug("🎭 Using fake authentication...")
+            auth_data = _faker().authenticate()
             self.access_token = auth_data.get("accessToken")
             expires_in = auth_data.get("expiresIn", 3600)
             self.token_expires_at = datetime.now() + timedelta(seconds=expires_in)
-            print(f"✅ SmartRequest fake authentication successful")
+            log.info("✅ SmartRequest fake authentication successful")
             return True
         
         url = f"{self.base_url}/auth/token"
         headers = {
             "Authorization": self._get_basic_auth_header()
         }
-        print(f"🔄 Authenticating with SmartRequest API...")
+        log.info("🔄 Authenticating with SmartRequest API...")
         
         try:
-            response = requests.post(url, headers=headers, timeout=30)
+            # Asking for a new token twice is harmless
+            response = self._send("POST", url, headers=headers, timeout=30, idempotent=True)
             response.raise_for_status()
             
             data = response.json()
@@ -87,18 +148,66 @@ class SmartRequestService:
             
             self.token_expires_at = datetime.now() + timedelta(seconds=expires_in)
             
-            print(f"✅ SmartRequest authentication successful")
+            log.info("✅ SmartRequest authentication successful")
+            metrics.inc("medicos_smartrequest_token_refreshes_total", outcome="success")
             return True
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ SmartRequest authentication failed: {e}")
+            log.error("❌ SmartRequest authentication failed: %s", e)
+            metrics.inc("medicos_smartrequest_token_refreshes_total", outcome="error")
             return False
     
     def _ensure_authenticated(self) -> bool:
-        """Ensure we have a valid access token"""
+        """Ensure we have a valid access token (one refresh at a time across threads)"""
         if self._is_token_expired():
-            return self.authenticate()
+            with self._auth_lock:
+                if self._is_token_expired():
+                    return self.authenticate()
         return True
+
+    def _send(self, method: str, url: str, idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+        """
+        Send a request over the pooled session, retrying 429 (and, for idempotent calls, 503) responses
+
+        Waits for Retry-After when the API sends it (capped at max_retry_delay),
+        otherwise backs off exponentially with jitter. A 401 on a bearer call
+        refreshes the token once and repeats the call.
+
+        Args:
+            idempotent: Whether repeating the call is safe; defaults to True for
+                        GET/PUT/... and False for POST
+
+        Returns:
+            requests.Response: The final response (callers still raise_for_status)
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_statuses = (THROTTLED_STATUS, UNAVAILABLE_STATUS) if idempotent else (THROTTLED_STATUS,)
+        refreshed = False
+        attempt = 0
+        while True:
+            response = self.session.request(method, url, **kwargs)
+            headers = kwargs.get("headers") or {}
+            if (response.status_code == 401 and not refreshed
+                    and headers.get("Authorization", "").startswith("Bearer ")):
+                refreshed = True
+                with self._auth_lock:
+                    # Another thread may have refreshed the token while this call was in flight
+                    if headers["Authorization"] == self._get_bearer_auth_header() and not self.authenticate():
+                        return response
+                kwargs["headers"] = {**headers, "Authorization": self._get_bearer_auth_header()}
+                continue
+            if response.status_code not in retry_statuses or attempt >= self.max_retries:
+                return response
+            delay = retry_after_seconds(response)
+            if delay is None:
+                delay = RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5)
+            delay = min(delay, self.max_retry_delay)
+            attempt += 1
+            metrics.inc("medicos_smartrequest_retries_total", status=str(response.status_code))
+            log.warning("⚠️ SmartRequest %s %s returned %s, retry %s/%s in %.1fs",
+                        method, url, response.status_code, attempt, self.max_retries, delay)
+            time.sleep(delay)
     
     def get_facilities(self, filters: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
         """
@@ -111,8 +220,8 @@ class SmartRequestService:
             List of facility dictionaries
         """
         if self.use_faker:
-            print("🎭 Using fake facilities data...")
-            data = smartrequest_faker.get_facilities(filters)
+            log.debug("🎭 Using fake facilities data...")
+            data = _faker().get_facilities(filters)
             return data.get("facilities", [])
         
         if not self._ensure_authenticated():
@@ -124,14 +233,14 @@ class SmartRequestService:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=filters or {}, timeout=30)
+            response = self._send("GET", url, headers=headers, params=filters or {}, timeout=30)
             response.raise_for_status()
             
             data = response.json()
             return data.get("facilities", [])
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching facilities: {e}")
+            log.error("❌ Error fetching facilities: %s", e)
             return []
     
     def get_request_reasons(self, company_id: int) -> List[Dict[str, Any]]:
@@ -145,8 +254,8 @@ class SmartRequestService:
             List of reason dictionaries
         """
         if self.use_faker:
-            print("🎭 Using fake request reasons data...")
-            data = smartrequest_faker.get_request_reasons(company_id)
+            log.debug("🎭 Using fake request reasons data...")
+            data = _faker().get_request_reasons(company_id)
             return data.get("reasons", [])
         
         if not self._ensure_authenticated():
@@ -159,14 +268,14 @@ class SmartRequestService:
         params = {"companyId": company_id}
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response = self._send("GET", url, headers=headers, params=params, timeout=30)
             response.raise_for_status()
             
             data = response.json()
             return data.get("reasons", [])
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching request reasons: {e}")
+            log.error("❌ Error fetching request reasons: %s", e)
             return []
     
     def get_record_types(self) -> List[Dict[str, Any]]:
@@ -177,8 +286,8 @@ class SmartRequestService:
             List of record type dictionaries
         """
         if self.use_faker:
-            print("🎭 Using fake record types data...")
-            data = smartrequest_faker.get_record_types()
+            log.debug("🎭 Using fake record types data...")
+            data = _faker().get_record_types()
             return data.get("recordTypes", [])
         
         if not self._ensure_authenticated():
@@ -190,14 +299,14 @@ class SmartRequestService:
         }
         
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self._send("GET", url, headers=headers, timeout=30)
             response.raise_for_status()
             
             data = response.json()
             return data.get("recordTypes", [])
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching record types: {e}")
+            log.error("❌ Error fetching record types: %s", e)
             return []
     
     def create_request(self, request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -208,13 +317,19 @@ class SmartRequestService:
             request_data: Dictionary containing request payload
             
         Returns:
-            API response dictionary or None on error
+            API response dictionary or None when the request was not created
+
+        Raises:
+            SmartRequestOutcomeUnknown: If the request may have been created
         """
         if self.use_faker:
-            print("🎭 Creating fake SmartRequest...")
-            return smartrequest_faker.create_request(request_data)
+            log.debug("🎭 Creating fake SmartRequest...")
+            result = _faker().create_request(request_data)
+            metrics.inc("medicos_smartrequest_requests_total", outcome="created" if result else "error")
+            return result
         
         if not self._ensure_authenticated():
+            metrics.inc("medicos_smartrequest_requests_total", outcome="auth_error")
             return None
             
         url = f"{self.base_url}/request"
@@ -224,18 +339,24 @@ class SmartRequestService:
         }
         
         try:
-            print(f"🔄 Creating SmartRequest...")
-            print(f'datavant payload {request_data}')
-            response = requests.post(url, json=request_data, headers=headers, timeout=60)
+            log.info("🔄 Creating SmartRequest...")
+            log.debug("datavant payload %s", request_data)
+            response = self._send("POST", url, json=request_data, headers=headers, timeout=60)
             response.raise_for_status()
             
             result = response.json()
             request_id = result.get("requestId")
-            print(f"✅ SmartRequest created successfully with ID: {request_id}")
+            log.info("✅ SmartRequest created successfully with ID: %s", request_id)
+            metrics.inc("medicos_smartrequest_requests_total", outcome="created")
             return result
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error creating SmartRequest: {e}")
+            if _request_may_exist(e):
+                log.error("❌ SmartRequest creation may have succeeded, not repeating it: %s", e)
+                metrics.inc("medicos_smartrequest_requests_total", outcome="unknown")
+                raise SmartRequestOutcomeUnknown(str(e)) from e
+            log.error("❌ Error creating SmartRequest: %s", e)
+            metrics.inc("medicos_smartrequest_requests_total", outcome="error")
             return None
     
     def get_request_status(self, request_id: str) -> Optional[Dict[str, Any]]:
@@ -249,8 +370,8 @@ class SmartRequestService:
             Status dictionary or None on error
         """
         if self.use_faker:
-            print(f"🎭 Getting fake status for request {request_id}...")
-            return smartrequest_faker.get_request_status(request_id)
+            log.debug("🎭 Getting fake status for request %s...", request_id)
+            return _faker().get_request_status(request_id)
         
         if not self._ensure_authenticated():
             return None
@@ -261,13 +382,13 @@ class SmartRequestService:
         }
         
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self._send("GET", url, headers=headers, timeout=30)
             response.raise_for_status()
             
             return response.json()
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error getting request status: {e}")
+            log.error("❌ Error getting request status: %s", e)
             return None
     
     def get_download_url(self, request_id: str, document_type: str) -> Optional[str]:
@@ -282,8 +403,8 @@ class SmartRequestService:
             Download URL or None on error
         """
         if self.use_faker:
-            print(f"🎭 Getting fake download URL for {request_id}/{document_type}...")
-            data = smartrequest_faker.get_download_url(request_id, document_type)
+            log.debug("🎭 Getting fake download URL for %s/%s...", request_id, document_type)
+            data = _faker().get_download_url(request_id, document_type)
             return data.get("url")
         
         if not self._ensure_authenticated():
@@ -295,14 +416,14 @@ class SmartRequestService:
         }
         
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self._send("GET", url, headers=headers, timeout=30)
             response.raise_for_status()
             
             data = response.json()
             return data.get("url")
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error getting download URL: {e}")
+            log.error("❌ Error getting download URL: %s", e)
             return None
     
     def cancel_request(self, request_id: str, reason: str) -> bool:
@@ -317,8 +438,8 @@ class SmartRequestService:
             True if successful, False otherwise
         """
         if self.use_faker:
-            print(f"🎭 Cancelling fake request {request_id}...")
-            return smartrequest_faker.cancel_request(request_id, reason)
+            log.debug("🎭 Cancelling fake request %s...", request_id)
+            return _faker().cancel_request(request_id, reason)
         
         if not self._ensure_authenticated():
             return False
@@ -331,14 +452,14 @@ class SmartRequestService:
         data = {"reason": reason}
         
         try:
-            response = requests.put(url, json=data, headers=headers, timeout=30)
+            response = self._send("PUT", url, json=data, headers=headers, timeout=30)
             response.raise_for_status()
             
-            print(f"✅ Request {request_id} cancelled successfully")
+            log.info("✅ Request %s cancelled successfully", request_id)
             return True
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error cancelling request: {e}")
+            log.error("❌ Error cancelling request: %s", e)
             return False
     
     def encode_authorization_form(self, file_path: str) -> Optional[str]:
@@ -357,7 +478,7 @@ class SmartRequestService:
                 encoded = base64.b64encode(file_content).decode('utf-8')
                 return encoded
         except Exception as e:
-            print(f"❌ Error encoding file {file_path}: {e}")
+            log.error("❌ Error encoding file %s: %s", file_path, e)
             return None
     
     def get_infant_record_types(self) -> List[str]:
@@ -368,7 +489,7 @@ class SmartRequestService:
             List of record type names for infant requests
         """
         if self.use_faker:
-            return smartrequest_faker.get_infant_record_types()
+            return _faker().get_infant_record_types()
         
         # For production, these would be the actual Datavant record types for infants
         return [
@@ -392,7 +513,7 @@ class SmartRequestService:
             List of record type names for mom requests
         """
         if self.use_faker:
-            return smartrequest_faker.get_mom_record_types()
+            return _faker().get_mom_record_types()
         
         # For production, these would be the actual Datavant record types for moms
         return [
@@ -1,18 +1,28 @@
-from docx import Document
 from services.pdf_service import PDFService
 import os
+from io import BytesIO
+from functools import lru_cache
 from datetime import datetime
 from utils.dates import generate_dir_name
+from utils.logger import get_logger
+
+log = get_logger(__name__)
 
 output_dir = os.getenv("OUTPUT_DIR") or "output"
 
+
+@lru_cache(maxsize=16)
+def _read_template_bytes(template_path: str, mtime: float) -> bytes:
+    """Template file contents, cached until the file's mtime changes"""
+    with open(template_path, 'rb') as f:
+        return f.read()
+
 class TemplateService:
     
     def __init__(self, template_path: str):
         self.template_path = template_path
         self.output_path_docx = None
         self.output_dir = output_dir+"/"+generate_dir_name()
-        os.makedirs(self.output_dir, exist_ok=True)
     def merge_runs(self, paragraph):
         full_text = ''.join(run.text for run in paragraph.runs)
         for run in paragraph.runs:
@@ -32,33 +42,60 @@ class TemplateService:
         para.add_run(text)
 
 
-    def fill_template(self, output_path: str, data: dict,j):
-        print(f"📄 Using template: {self.template_path}")
-        mg_idpreg = data.get('mg_idpreg')
-        if mg_idpreg is None:
+    def _replace_placeholders_in_runs(self, paragraphs, replacements):
+        """Replace #key# placeholders run by run (runs preserve formatting)"""
+        for para in paragraphs:
+            for run in para.runs:
+                # run.text is rebuilt from the XML on every access: read it once
+                text = run.text
+                if "#" not in text:
+                    continue
+                replaced = text
+                for placeholder, value in replacements:
+                    if placeholder in replaced:
+                        replaced = replaced.replace(placeholder, value)
+                if replaced != text:
+                    run.text = replaced
+
+    def render(self, data: dict) -> BytesIO:
+        """
+        Fill the template with data in memory
+
+        Args:
+            data: Placeholder values (#key# in the template)
+
+        Returns:
+            BytesIO: The filled-in .docx, positioned at the start
+        """
+        log.info("📄 Using template: %s", self.template_path)
+        if data.get('mg_idpreg') is None:
             raise KeyError("❌ 'mg_idpreg' key not found in data dictionary")
-        file_path = self.output_dir+"/"+output_path
-        os.makedirs(file_path, exist_ok=True)
-        self.output_path_docx = os.path.join(file_path, f"{mg_idpreg}_{j}.docx")
         if not os.path.exists(self.template_path):
             raise FileNotFoundError(f"❌ Template not found at: {self.template_path}")
-        doc = Document(self.template_path)
-        # Replace in paragraphs (runs preserve formatting)
-        for para in doc.paragraphs:
-            for run in para.runs:
-                for key, value in data.items():
-                    if f"#{key}#" in run.text:
-                        run.text = run.text.replace(f"#{key}#", str(value))
+        from docx import Document
 
-        # Replace in tables
+        doc = Document(BytesIO(_read_template_bytes(self.template_path, os.path.getmtime(self.template_path))))
+        replacements = [(f"#{key}#", str(value)) for key, value in data.items()]
+        self._replace_placeholders_in_runs(doc.paragraphs, replacements)
         for table in doc.tables:
             for row in table.rows:
                 for cell in row.cells:
-                    for para in cell.paragraphs:
-                        for run in para.runs:
-                            for key, value in data.items():
-                                if f"#{key}#" in run.text:
-                                    run.text = run.text.replace(f"#{key}#", str(value))
+                    self._replace_placeholders_in_runs(cell.paragraphs, replacements)
 
-        doc.save(self.output_path_docx)
+        buffer = BytesIO()
+        doc.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+    def save_docx(self, document: BytesIO, output_path: str, mg_idpreg: str, j) -> str:
+        """Write a rendered document next to the PDFs (output/<date>/<output_path>/<id>_<j>.docx)"""
+        file_path = self.output_dir+"/"+output_path
+        os.makedirs(file_path, exist_ok=True)
+        self.output_path_docx = os.path.join(file_path, f"{mg_idpreg}_{j}.docx")
+        with open(self.output_path_docx, 'wb') as f:
+            f.write(document.getvalue())
         return self.output_path_docx
+
+    def fill_template(self, output_path: str, data: dict,j):
+        """Render the template and save the .docx; returns its path"""
+        return self.save_docx(self.render(data), output_path, data.get('mg_idpreg'), j)
@@ -21,6 +21,8 @@ sys.path.insert(0, current_dir)
 
 from utils.request_tracker import SmartRequestTracker
 from utils.dashboard_tracker import dashboard_tracker
+from utils.metrics import PROMETHEUS_CONTENT_TYPE, render_metrics_page
+from utils.logger import configure_logging
 
 class DashboardHTTPHandler(BaseHTTPRequestHandler):
     """HTTP handler for the dashboard server"""
@@ -45,6 +47,8 @@ class DashboardHTTPHandler(BaseHTTPRequestHandler):
             elif path.startswith('/api/records/'):
                 record_id = path.split('/')[-1]
                 self.serve_record_detail(record_id)
+            elif path == '/metrics':
+                self.serve_metrics()
             else:
                 self.send_error(404, "Not Found")
         except Exception as e:
@@ -160,6 +164,19 @@ class DashboardHTTPHandler(BaseHTTPRequestHandler):
             print(f"❌ Error serving record detail: {e}")
             self.send_error(500, f"Error getting record detail: {e}")
     
+    def serve_metrics(self):
+        """Serve process metrics in the Prometheus text format"""
+        try:
+            body = render_metrics_page().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except Exception as e:
+            print(f"❌ Error serving metrics: {e}")
+            self.send_error(500, f"Error rendering metrics: {e}")
+    
     def generate_dashboard_html(self):
         """Generate the dashboard HTML dynamically"""
         # Get current data for the dashboard
@@ -419,4 +436,5 @@ def main():
 
 
 if __name__ == "__main__":
+    configure_logging()
     main()
\ No newline at end of file
@@ -6,11 +6,22 @@ Enhanced tracking service for PDF generation and SmartRequest monitoring
 
 import json
 import os
+import sys
 from datetime import datetime
 from typing import Dict, Optional, Any, List
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_lock import FileLock, exclusive
+from utils.logger import configure_logging, get_logger
+from utils.timing import time_stage
+
+log = get_logger(__name__)
+
+
 @dataclass
 class ProcessingRecord:
     """Complete record of a processing event"""
@@ -38,6 +49,8 @@ class ProcessingRecord:
     username: Optional[str] = None
     template_used: Optional[str] = None
     processing_duration: Optional[float] = None
+    stage_timings: Optional[Dict[str, float]] = None  # seconds per stage (fill_template, convert_to_pdf, ...)
+    downloaded_documents: Optional[Dict[str, str]] = None  # document type -> path of the fulfilled request's files
     
     def to_dict(self) -> dict:
         return asdict(self)
@@ -52,7 +65,9 @@ class DashboardTracker:
     
     def __init__(self, storage_file: str = "logs/dashboard_tracking.json"):
         self.storage_file = storage_file
-        self._ensure_storage_dir()
+        # Held around every read-modify-write: main.py, the dashboards and
+        # download_documents.py update the same file from separate processes
+        self._lock = FileLock(f"{storage_file}.lock")
         
     def _ensure_storage_dir(self):
         """Ensure the storage directory exists"""
@@ -67,17 +82,22 @@ class DashboardTracker:
             with open(self.storage_file, 'r') as f:
                 return json.load(f)
         except (json.JSONDecodeError, IOError) as e:
-            print(f"⚠️ Error loading dashboard tracking data: {e}")
+            log.warning("⚠️ Error loading dashboard tracking data: %s", e)
             return {}
     
     def _save_records(self, records: Dict[str, dict]):
-        """Save records to storage"""
+        """Save records to storage (replaced atomically, so readers never see a partial file)"""
         try:
-            with open(self.storage_file, 'w') as f:
-                json.dump(records, f, indent=2, default=str)
+            with time_stage("tracker_write"):
+                self._ensure_storage_dir()
+                tmp_file = f"{self.storage_file}.{os.getpid()}.tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump(records, f, indent=2, default=str)
+                os.replace(tmp_file, self.storage_file)
         except IOError as e:
-            print(f"❌ Error saving dashboard tracking data: {e}")
+            log.error("❌ Error saving dashboard tracking data: %s", e)
     
+    @exclusive
     def start_processing(self, record_id: str, request_type: str, patient_name: Optional[str] = None, 
                         facility_name: Optional[str] = None, username: Optional[str] = None) -> bool:
         """Start tracking a new processing record"""
@@ -101,13 +121,14 @@ class DashboardTracker:
             records[instance_key] = record.to_dict()
             self._save_records(records)
             
-            print(f"📊 Started tracking: {instance_key}")
+            log.info("📊 Started tracking: %s", instance_key)
             return True
             
         except Exception as e:
-            print(f"❌ Error starting processing tracking: {e}")
+            log.error("❌ Error starting processing tracking: %s", e)
             return False
     
+    @exclusive
     def update_pdf_status(self, record_id: str, status: str, pdf_path: Optional[str] = None, 
                          error: Optional[str] = None, template_used: Optional[str] = None) -> bool:
         """Update PDF generation status"""
@@ -117,7 +138,7 @@ class DashboardTracker:
             # Find the most recent record for this record_id
             matching_key = self._find_recent_record(records, record_id)
             if not matching_key:
-                print(f"⚠️ No tracking record found for {record_id}")
+                log.warning("⚠️ No tracking record found for %s", record_id)
                 return False
             
             records[matching_key]['pdf_status'] = status
@@ -127,13 +148,14 @@ class DashboardTracker:
             
             self._save_records(records)
             
-            print(f"📊 Updated PDF status for {record_id}: {status}")
+            log.info("📊 Updated PDF status for %s: %s", record_id, status)
             return True
             
         except Exception as e:
-            print(f"❌ Error updating PDF status: {e}")
+            log.error("❌ Error updating PDF status: %s", e)
             return False
     
+    @exclusive
     def update_smartrequest_status(self, record_id: str, status: str, request_id: Optional[str] = None, 
                                   error: Optional[str] = None, payload: Optional[Dict[str, Any]] = None) -> bool:
         """Update SmartRequest status"""
@@ -143,7 +165,7 @@ class DashboardTracker:
             # Find the most recent record for this record_id
             matching_key = self._find_recent_record(records, record_id)
             if not matching_key:
-                print(f"⚠️ No tracking record found for {record_id}")
+                log.warning("⚠️ No tracking record found for %s", record_id)
                 return False
             
             records[matching_key]['smartrequest_sent'] = status in ['sent', 'success']
@@ -160,33 +182,64 @@ class DashboardTracker:
             
             self._save_records(records)
             
-            print(f"📊 Updated SmartRequest status for {record_id}: {status}")
+            log.info("📊 Updated SmartRequest status for %s: %s", record_id, status)
             return True
             
         except Exception as e:
-            print(f"❌ Error updating SmartRequest status: {e}")
+            log.error("❌ Error updating SmartRequest status: %s", e)
             return False
     
-    def complete_processing(self, record_id: str, duration: Optional[float] = None) -> bool:
-        """Mark processing as complete"""
+    @exclusive
+    def complete_processing(self, record_id: str, duration: Optional[float] = None,
+                            stage_timings: Optional[Dict[str, float]] = None) -> bool:
+        """Mark processing as complete, with its total duration and per-stage timings in seconds"""
         try:
             records = self._load_records()
             
             # Find the most recent record for this record_id
             matching_key = self._find_recent_record(records, record_id)
             if not matching_key:
-                print(f"⚠️ No tracking record found for {record_id}")
+                log.warning("⚠️ No tracking record found for %s", record_id)
                 return False
             
             records[matching_key]['processing_duration'] = duration
+            if stage_timings is not None:
+                records[matching_key]['stage_timings'] = {
+                    stage: round(seconds, 6) for stage, seconds in stage_timings.items()
+                }
             
             self._save_records(records)
             
-            print(f"📊 Completed processing for {record_id}")
+            log.info("📊 Completed processing for %s", record_id)
             return True
             
         except Exception as e:
-            print(f"❌ Error completing processing tracking: {e}")
+            log.error("❌ Error completing processing tracking: %s", e)
+            return False
+    
+    @exclusive
+    def add_downloaded_document(self, request_id: str, document_type: str, path: str) -> bool:
+        """Attach a downloaded document to the records that sent the SmartRequest request_id"""
+        try:
+            records = self._load_records()
+            
+            matching_keys = [key for key, data in records.items() if data.get('smartrequest_id') == request_id]
+            if not matching_keys:
+                log.warning("⚠️ No tracking record found for request %s", request_id)
+                return False
+            
+            for key in matching_keys:
+                documents = records[key].get('downloaded_documents') or {}
+                documents[document_type] = path
+                records[key]['downloaded_documents'] = documents
+            
+            self._save_records(records)
+            
+            log.info("📊 Added %s document for request %s", document_type, request_id)
+            return True
+            
+        except Exception as e:
+            log.error("❌ Error adding downloaded document: %s", e)
             return False
     
     def _find_recent_record(self, records: Dict[str, dict], record_id: str) -> Optional[str]:
@@ -210,7 +263,7 @@ class DashboardTracker:
             records = self._load_records()
             return [ProcessingRecord.from_dict(data) for data in records.values()]
         except Exception as e:
-            print(f"❌ Error getting all records: {e}")
+            log.error("❌ Error getting all records: %s", e)
             return []
     
     def get_records_by_status(self, pdf_status: Optional[str] = None, 
@@ -229,7 +282,7 @@ class DashboardTracker:
             
             return filtered_records
         except Exception as e:
-            print(f"❌ Error filtering records: {e}")
+            log.error("❌ Error filtering records: %s", e)
             return []
     
     def get_dashboard_summary(self) -> Dict[str, Any]:
@@ -261,7 +314,7 @@ class DashboardTracker:
             return summary
             
         except Exception as e:
-            print(f"❌ Error getting dashboard summary: {e}")
+            log.error("❌ Error getting dashboard summary: %s", e)
             return {}
 
 
@@ -276,6 +329,12 @@ def track_processing_start(record_id: str, request_type: str, patient_name: Opti
     return dashboard_tracker.start_processing(record_id, request_type, patient_name, facility_name, username)
 
 
+def track_processing_complete(record_id: str, duration: Optional[float] = None,
+                              stage_timings: Optional[Dict[str, float]] = None) -> bool:
+    """Convenience function to complete tracking"""
+    return dashboard_tracker.complete_processing(record_id, duration, stage_timings)
+
+
 def track_pdf_success(record_id: str, pdf_path: str, template_used: Optional[str] = None) -> bool:
     """Convenience function to track PDF success"""
     return dashboard_tracker.update_pdf_status(record_id, "success", pdf_path, None, template_used)
@@ -301,8 +360,14 @@ def track_smartrequest_error(record_id: str, error: str) -> bool:
     return dashboard_tracker.update_smartrequest_status(record_id, "error", None, error)
 
 
+def track_document_downloaded(request_id: str, document_type: str, path: str) -> bool:
+    """Convenience function to track a downloaded SmartRequest document"""
+    return dashboard_tracker.add_downloaded_document(request_id, document_type, path)
+
+
 if __name__ == "__main__":
     """Test the dashboard tracker"""
+    configure_logging()
     print("🧪 Testing Dashboard Tracker...")
     
     # Test creating a record
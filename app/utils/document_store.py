@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+Content-Addressed Document Store
+Generated PDFs keyed by a hash of the template file and the data rendered into
+it. The dated output paths (output/<MM_DD_YYYY>/<request_type>/<id>_<j>.pdf)
+are hard links to the stored object, so reprocessing a record with unchanged
+data costs neither a render nor the disk space of another copy.
+
+Objects live under output/.store/<first 2 hex>/<sha256>.pdf, on the same
+volume as the dated paths (hard links cannot cross volumes; where linking is
+not possible the file is copied instead). Objects are read-only, and a dated
+path is removed before a PDF is generated there again (remove_output), so a
+re-render never writes through a link into a stored document.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import sys
+from functools import lru_cache
+from typing import Optional
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+STORE_DIR = os.getenv("DOCUMENT_STORE_DIR") or os.path.join(os.getenv("OUTPUT_DIR") or "output", ".store")
+# Bump when rendering changes in a way the template and data hashes don't capture
+STORE_VERSION = "1"
+READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+
+@lru_cache(maxsize=16)
+def _file_sha256(path: str, mtime: float) -> str:
+    """Hex SHA-256 of a file, cached until its mtime changes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def document_key(template_path: str, data: dict) -> str:
+    """
+    Content key of a document: template version plus rendered data
+
+    Args:
+        template_path: Path of the DOCX template
+        data: Placeholder values filled into the template
+
+    Returns:
+        str: Hex SHA-256
+    """
+    digest = hashlib.sha256()
+    digest.update(STORE_VERSION.encode())
+    digest.update(_file_sha256(template_path, os.path.getmtime(template_path)).encode())
+    digest.update(json.dumps(data, sort_keys=True, default=str, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _make_writable(path: str):
+    """
+    Clear the read-only flag, which Windows requires before a file is replaced or removed
+
+    On a link this also clears it on the store object; the next add() or
+    link() of that object sets it again.
+    """
+    os.chmod(path, READ_ONLY | stat.S_IWUSR)
+
+
+def _link_or_copy(source: str, destination: str):
+    """Hard link source to destination (replacing it), copying where links are not supported"""
+    os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+    temp_path = f"{destination}.{os.getpid()}.tmp"
+    try:
+        os.link(source, temp_path)
+    except OSError:
+        shutil.copy2(source, temp_path)
+    try:
+        os.replace(temp_path, destination)
+    except PermissionError:
+        if sys.platform != "win32":
+            raise
+        _make_writable(destination)
+        os.replace(temp_path, destination)
+
+
+def remove_output(path: str):
+    """
+    Remove a dated output path before a document is generated there
+
+    The path may be a hard link to a store object; writing it in place would
+    change the stored document for every other path linked to it.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        if sys.platform != "win32":
+            raise
+        _make_writable(path)
+        os.remove(path)
+
+
+class DocumentStore:
+    """Generated documents stored once per content key"""
+
+    def __init__(self, store_dir: str = STORE_DIR):
+        self.store_dir = store_dir
+
+    def object_path(self, key: str) -> str:
+        return os.path.join(self.store_dir, key[:2], f"{key}.pdf")
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self.object_path(key))
+
+    def add(self, key: str, path: str) -> bool:
+        """
+        Store a freshly generated document under key (the file at path stays in place)
+
+        Returns:
+            bool: True if stored, False on error
+        """
+        try:
+            if not self.contains(key):
+                _link_or_copy(path, self.object_path(key))
+                log.debug("🗄️ Stored %s as %s", path, key)
+            os.chmod(self.object_path(key), READ_ONLY)
+            return True
+        except OSError as e:
+            log.warning("⚠️ Could not store %s in the document store: %s", path, e)
+            return False
+
+    def link(self, key: str, path: str) -> Optional[str]:
+        """
+        Make path a link to the stored document of key
+
+        Returns:
+            str: path, or None when the key is not stored or linking failed
+        """
+        source = self.object_path(key)
+        if not os.path.exists(source):
+            return None
+        try:
+            os.chmod(source, READ_ONLY)
+            if os.path.exists(path) and os.path.samefile(source, path):
+                return path
+            _link_or_copy(source, path)
+            return path
+        except OSError as e:
+            log.warning("⚠️ Could not link %s from the document store: %s", path, e)
+            return None
+
+
+# Global document store
+document_store = DocumentStore()
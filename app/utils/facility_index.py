@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+"""
+Datavant Facility Index
+Keyed, mtime-aware index over the Datavant facility CSV
+"""
+
+import csv
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Any
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+FACILITY_CSV_NAME = "Datavant_ Facility_List.csv"
+
+# Project root is two levels above this file (app/utils -> app -> root)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_NON_DIGITS = re.compile(r"\D")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def resolve_facility_csv_path() -> str:
+    """
+    Resolve the facility CSV location independently of the working directory
+
+    Order: DATAVANT_FACILITY_CSV env var, project root, current directory.
+
+    Returns:
+        Path to the first existing candidate (or the project root path if none exist)
+    """
+    candidates = [
+        os.getenv("DATAVANT_FACILITY_CSV"),
+        os.path.join(PROJECT_ROOT, FACILITY_CSV_NAME),
+        os.path.join(os.getcwd(), FACILITY_CSV_NAME),
+    ]
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    return os.path.join(PROJECT_ROOT, FACILITY_CSV_NAME)
+
+
+def normalize_site(site: Any) -> str:
+    """Normalize a site number to the zero-padded 5 digit CSV form (e.g. 101 -> '00101')"""
+    value = str(site or "").strip()
+    return value.zfill(5) if value.isdigit() else value
+
+
+def normalize_phone(phone: Any) -> str:
+    """Reduce a phone/fax number to its last 10 digits (drops formatting and a leading 1)"""
+    digits = _NON_DIGITS.sub("", str(phone or ""))
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits[-10:] if len(digits) >= 10 else digits
+
+
+def normalize_name(name: Any) -> str:
+    """Case-fold and collapse whitespace for name lookups"""
+    return _WHITESPACE.sub(" ", str(name or "")).strip().casefold()
+
+
+def _standardize_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """Map a raw CSV row to the Datavant API facility format"""
+    return {
+        'site': row.get('SITE', '').strip(),
+        'healthSystem': row.get('Health System ', '').strip(),  # Note the space after "System"
+        'siteName': row.get('SiteName', '').strip(),
+        'addressLine1': row.get('Address', '').strip(),
+        'addressLine2': row.get('Address2', '').strip() or None,
+        'city': row.get('City', '').strip(),
+        'state': row.get('State', '').strip(),
+        'zip': row.get('ZIP', '').strip(),
+        'phone': row.get('PHONE', '').strip(),
+        'fax': row.get('Fax', '').strip(),
+        # Additional fields for reference
+        'itemizedBills': row.get('ITEMIZED BILLS', '').strip(),
+        'records': row.get('RECORDS', '').strip(),
+        'radiology': row.get('RADIOLOGY', '').strip(),
+        'subpoena': row.get('SUBPOENA', '').strip()
+    }
+
+
+class FacilityIndex:
+    """In-memory facility index, rebuilt only when the CSV's mtime changes"""
+
+    def __init__(self, csv_path: Optional[str] = None):
+        self._explicit_path = csv_path
+        self._lock = threading.Lock()
+        self._loaded_mtime: Optional[float] = None
+        self._loaded_path: Optional[str] = None
+        self.facilities: List[Dict[str, Any]] = []
+        self.by_site_number: Dict[str, Dict[str, Any]] = {}
+        self.by_health_system_name: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_phone_number: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_fax_number: Dict[str, List[Dict[str, Any]]] = {}
+
+    @property
+    def csv_path(self) -> str:
+        return self._explicit_path or resolve_facility_csv_path()
+
+    def _ensure_loaded(self):
+        """(Re)build the index if the CSV is new or has been modified"""
+        path = self.csv_path
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError as e:
+            if self._loaded_mtime is None:
+                log.error("❌ Error loading Datavant facilities CSV: %s", e)
+                self._loaded_mtime = -1.0
+                self._loaded_path = path
+            return
+
+        if mtime == self._loaded_mtime and path == self._loaded_path:
+            return
+
+        with self._lock:
+            if mtime == self._loaded_mtime and path == self._loaded_path:
+                return
+            self._build(path, mtime)
+
+    def _build(self, path: str, mtime: float):
+        facilities = []
+        by_site: Dict[str, Dict[str, Any]] = {}
+        by_health_system: Dict[str, List[Dict[str, Any]]] = {}
+        by_phone: Dict[str, List[Dict[str, Any]]] = {}
+        by_fax: Dict[str, List[Dict[str, Any]]] = {}
+
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                for row in csv.DictReader(file):
+                    facility = _standardize_row(row)
+                    facilities.append(facility)
+
+                    site = normalize_site(facility['site'])
+                    if site:
+                        by_site.setdefault(site, facility)
+                    health_system = normalize_name(facility['healthSystem'])
+                    if health_system:
+                        by_health_system.setdefault(health_system, []).append(facility)
+                    phone = normalize_phone(facility['phone'])
+                    if phone:
+                        by_phone.setdefault(phone, []).append(facility)
+                    fax = normalize_phone(facility['fax'])
+                    if fax:
+                        by_fax.setdefault(fax, []).append(facility)
+        except Exception as e:
+            log.error("❌ Error loading Datavant facilities CSV: %s", e)
+            return
+
+        # Swap in the new index in one step so readers never see a partial build
+        self.facilities = facilities
+        self.by_site_number = by_site
+        self.by_health_system_name = by_health_system
+        self.by_phone_number = by_phone
+        self.by_fax_number = by_fax
+        self._loaded_mtime = mtime
+        self._loaded_path = path
+        log.info("✅ Loaded %s facilities from Datavant CSV", len(facilities))
+
+    def all(self) -> List[Dict[str, Any]]:
+        """All facilities in CSV order"""
+        self._ensure_loaded()
+        return self.facilities
+
+    def by_site(self, site_number: Any) -> Optional[Dict[str, Any]]:
+        """Facility for a site number; '101', '00101' and 101 are equivalent"""
+        self._ensure_loaded()
+        return self.by_site_number.get(normalize_site(site_number))
+
+    def by_health_system(self, health_system: str) -> List[Dict[str, Any]]:
+        """All facilities belonging to a health system (case/whitespace insensitive)"""
+        self._ensure_loaded()
+        return self.by_health_system_name.get(normalize_name(health_system), [])
+
+    def by_phone(self, phone: Any) -> List[Dict[str, Any]]:
+        """Facilities whose phone number matches, ignoring formatting"""
+        self._ensure_loaded()
+        return self.by_phone_number.get(normalize_phone(phone), [])
+
+    def by_fax(self, fax: Any) -> List[Dict[str, Any]]:
+        """Facilities whose fax number matches, ignoring formatting"""
+        self._ensure_loaded()
+        return self.by_fax_number.get(normalize_phone(fax), [])
+
+
+# Global facility index instance (built lazily on first lookup in each process)
+facility_index = FacilityIndex()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python
+"""
+Facility Matcher
+Ranks Datavant facility CSV sites against REDCap hospital fields
+(hos_name, hospital_phone_num, hospital_fax_num, hospital_address)
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+from utils.facility_index import PROJECT_ROOT, FacilityIndex, facility_index, normalize_phone
+from utils.file_lock import FileLock
+from utils.logger import configure_logging, get_logger
+
+log = get_logger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_ZIP = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+_STATE = re.compile(r"(?:,|\s)\s*([A-Z]{2})(?:\s+\d{5}(?:-\d{4})?)?\s*$")
+
+# Common abbreviations seen in hos_name entries
+ABBREVIATIONS = {
+    "st": "saint", "mt": "mount", "ctr": "center", "cntr": "center", "med": "medical",
+    "hosp": "hospital", "reg": "regional", "rgnl": "regional", "univ": "university",
+    "mem": "memorial", "hlth": "health", "hlthcare": "healthcare", "chldrns": "childrens",
+    "childrens": "childrens", "children": "childrens",
+}
+STOPWORDS = {"the", "of", "and", "at", "inc", "llc", "a", "an", "for"}
+
+# Weights used to blend the individual signals into a single score
+NAME_TOKEN_WEIGHT = 0.6
+NAME_TRIGRAM_WEIGHT = 0.4
+PHONE_BONUS = 0.3
+FAX_BONUS = 0.2
+ZIP_BONUS = 0.1
+STATE_BONUS = 0.05
+
+# Only the rarest query tokens are used to pull candidates from the token index
+MAX_BLOCKING_TOKENS = 3
+# Tokens appearing in more than this share of sites are too generic to block on
+COMMON_TOKEN_FRACTION = 0.05
+MIN_COMMON_TOKEN_POSTINGS = 50
+
+
+def tokenize(name: Any) -> List[str]:
+    """Lowercase, split on punctuation, expand abbreviations and drop stopwords"""
+    tokens = []
+    for token in _TOKEN.findall(str(name or "").lower()):
+        token = ABBREVIATIONS.get(token, token)
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def trigrams(name: Any) -> Set[str]:
+    """Character trigrams over the normalized, space-joined token string"""
+    text = f"  {' '.join(tokenize(name))} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def match_key(hos_name: Any, state: str = "") -> str:
+    """Cache key for a REDCap hos_name, scoped to a state when one is known"""
+    key = " ".join(tokenize(hos_name))
+    return f"{key}|{state.upper()}" if key and state else key
+
+
+def parse_zip(*texts: Any) -> str:
+    for text in texts:
+        match = _ZIP.search(str(text or ""))
+        if match:
+            return match.group(1)
+    return ""
+
+
+def parse_state(*texts: Any) -> str:
+    for text in texts:
+        match = _STATE.search(str(text or "").strip().upper())
+        if match:
+            return match.group(1)
+    return ""
+
+
+@dataclass
+class FacilityMatch:
+    """A ranked facility candidate"""
+    facility: Dict[str, Any]
+    score: float
+    reasons: List[str] = field(default_factory=list)
+    confirmed: bool = False
+
+    @property
+    def site(self) -> str:
+        return self.facility.get('site', '')
+
+
+class FacilityMatcher:
+    """Blocking + token/trigram index matcher over the facility index"""
+
+    def __init__(self, index: Optional[FacilityIndex] = None,
+                 cache_file: str = os.path.join(PROJECT_ROOT, "logs", "facility_matches.json"),
+                 auto_confirm_score: float = 0.9):
+        self.index = index or facility_index
+        self.cache_file = cache_file
+        self.auto_confirm_score = auto_confirm_score
+        self._lock = threading.Lock()
+        # The daemon's auto-confirmations and the CLI both update cache_file
+        self._confirm_lock = FileLock(f"{cache_file}.lock")
+        self._indexed_facilities: Optional[List[Dict[str, Any]]] = None
+        self._confirmed: Optional[Dict[str, str]] = None
+        self._confirmed_stat: Optional[Tuple[int, int]] = None
+
+        self._token_postings: Dict[str, List[int]] = {}
+        self._idf: Dict[str, float] = {}
+        self._facility_tokens: List[Set[str]] = []
+        self._facility_trigrams: List[Set[str]] = []
+        self._by_state: Dict[str, Set[int]] = {}
+        self._by_zip3: Dict[str, Set[int]] = {}
+        self._position: Dict[int, int] = {}
+
+    def _ensure_indexed(self) -> List[Dict[str, Any]]:
+        facilities = self.index.all()
+        if facilities is self._indexed_facilities:
+            return facilities
+        with self._lock:
+            if facilities is not self._indexed_facilities:
+                self._build(facilities)
+        return facilities
+
+    def _build(self, facilities: List[Dict[str, Any]]):
+        postings: Dict[str, List[int]] = {}
+        facility_tokens = []
+        facility_trigrams = []
+        by_state: Dict[str, Set[int]] = {}
+        by_zip3: Dict[str, Set[int]] = {}
+
+        for i, facility in enumerate(facilities):
+            tokens = set(tokenize(facility.get('siteName')))
+            facility_tokens.append(tokens)
+            facility_trigrams.append(trigrams(facility.get('siteName')))
+            for token in tokens:
+                postings.setdefault(token, []).append(i)
+            state = (facility.get('state') or '').upper()
+            if state:
+                by_state.setdefault(state, set()).add(i)
+            zip3 = (facility.get('zip') or '')[:3]
+            if len(zip3) == 3:
+                by_zip3.setdefault(zip3, set()).add(i)
+
+        total = max(len(facilities), 1)
+        self._idf = {token: math.log(1 + total / len(ids)) for token, ids in postings.items()}
+        self._token_postings = postings
+        self._facility_tokens = facility_tokens
+        self._facility_trigrams = facility_trigrams
+        self._by_state = by_state
+        self._by_zip3 = by_zip3
+        self._position = {id(facility): i for i, facility in enumerate(facilities)}
+        self._indexed_facilities = facilities
+
+    def _load_confirmed(self, force: bool = False) -> Dict[str, str]:
+        """Confirmed matches, re-read when the cache file changes (e.g. through the CLI)"""
+        try:
+            stat = os.stat(self.cache_file)
+            file_stat = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            file_stat = None
+        if self._confirmed is not None and file_stat == self._confirmed_stat and not force:
+            return self._confirmed
+        confirmed = {}
+        if file_stat is not None:
+            try:
+                with open(self.cache_file, 'r') as f:
+                    confirmed = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                log.warning("⚠️ Error loading facility match cache: %s", e)
+        self._confirmed, self._confirmed_stat = confirmed, file_stat
+        return confirmed
+
+    def _update_confirmed(self, key: str, site: Optional[str], overwrite: bool = True) -> bool:
+        """Set (or with site None, remove) one confirmed match, merged into the file's current contents"""
+        with self._confirm_lock:
+            confirmed = dict(self._load_confirmed(force=True))
+            if site is None:
+                if confirmed.pop(key, None) is None:
+                    return False
+            elif key in confirmed and not overwrite:
+                return confirmed[key] == site
+            else:
+                confirmed[key] = site
+            tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+                with open(tmp_file, 'w') as f:
+                    json.dump(confirmed, f, indent=2, sort_keys=True)
+                os.replace(tmp_file, self.cache_file)
+            except IOError as e:
+                log.error("❌ Error saving facility match cache: %s", e)
+                return False
+            self._load_confirmed(force=True)
+            return True
+
+    def confirm(self, hos_name: str, site: str, state: str = "", overwrite: bool = True) -> bool:
+        """
+        Record hos_name -> site as a confirmed match (persisted)
+
+        Args:
+            hos_name: REDCap hos_name
+            site: Datavant site number
+            state: Two-letter state the match applies to; without one the
+                   mapping applies to the hos_name in every state
+            overwrite: Replace an existing confirmation (False for automatic
+                       confirmations, which must not override an operator's)
+        """
+        key = match_key(hos_name, state)
+        if not key:
+            return False
+        return self._update_confirmed(key, site, overwrite)
+
+    def unconfirm(self, hos_name: str, state: str = "") -> bool:
+        """
+        Remove a confirmed hos_name mapping (e.g. a wrong auto-confirmation)
+
+        Returns:
+            bool: True if a mapping was removed
+        """
+        key = match_key(hos_name, state)
+        return bool(key) and self._update_confirmed(key, None)
+
+    def confirmed_site(self, hos_name: Any, state: str = "") -> Optional[str]:
+        """Confirmed site for hos_name in state, falling back to a state-less confirmation"""
+        confirmed = self._load_confirmed()
+        if state:
+            site = confirmed.get(match_key(hos_name, state))
+            if site:
+                return site
+        return confirmed.get(match_key(hos_name))
+
+    def _positions(self, facilities: List[Dict[str, Any]]) -> Set[int]:
+        positions = (self._position.get(id(f)) for f in facilities)
+        return {i for i in positions if i is not None}
+
+    def _candidate_ids(self, query_tokens: List[str], phone: str, fax: str,
+                       state: str, zip_code: str) -> Tuple[Set[int], Set[int], Set[int]]:
+        phone_ids = self._positions(self.index.by_phone(phone)) if phone else set()
+        fax_ids = self._positions(self.index.by_fax(fax)) if fax else set()
+
+        known = [t for t in set(query_tokens) if t in self._idf]
+        rarest = sorted(known, key=lambda t: self._idf[t], reverse=True)[:MAX_BLOCKING_TOKENS]
+        # Generic tokens ("hospital", "medical") would pull in most of the CSV
+        max_postings = max(MIN_COMMON_TOKEN_POSTINGS, int(len(self._facility_tokens) * COMMON_TOKEN_FRACTION))
+        selective = [t for t in rarest if len(self._token_postings[t]) <= max_postings]
+        rarest = selective or rarest[:1]
+        name_ids: Set[int] = set()
+        for token in rarest:
+            name_ids.update(self._token_postings[token])
+
+        # Narrow name candidates to the geographic block when one is known
+        block: Optional[Set[int]] = None
+        if zip_code and zip_code[:3] in self._by_zip3:
+            block = self._by_zip3[zip_code[:3]]
+        elif state and state in self._by_state:
+            block = self._by_state[state]
+        if block is not None:
+            blocked = name_ids & block
+            if blocked:
+                name_ids = blocked
+
+        return name_ids | phone_ids | fax_ids, phone_ids, fax_ids
+
+    def _score(self, i: int, query_tokens: Set[str], query_trigrams: Set[str],
+               query_weight: float, phone_ids: Set[int], fax_ids: Set[int],
+               state: str, zip_code: str) -> FacilityMatch:
+        facility = self._indexed_facilities[i]
+        reasons = []
+
+        shared = query_tokens & self._facility_tokens[i]
+        token_score = sum(self._idf.get(t, 0.0) for t in shared) / query_weight if query_weight else 0.0
+        facility_trigrams = self._facility_trigrams[i]
+        union = len(query_trigrams | facility_trigrams)
+        trigram_score = len(query_trigrams & facility_trigrams) / union if union else 0.0
+        score = NAME_TOKEN_WEIGHT * token_score + NAME_TRIGRAM_WEIGHT * trigram_score
+        if shared:
+            reasons.append(f"name:{score:.2f}")
+
+        if i in phone_ids:
+            score += PHONE_BONUS
+            reasons.append("phone")
+        if i in fax_ids:
+            score += FAX_BONUS
+            reasons.append("fax")
+        if zip_code and facility.get('zip', '')[:5] == zip_code:
+            score += ZIP_BONUS
+            reasons.append("zip")
+        elif state and (facility.get('state') or '').upper() == state:
+            score += STATE_BONUS
+            reasons.append("state")
+
+        return FacilityMatch(facility=facility, score=score, reasons=reasons)
+
+    def rank(self, hos_name: Any, phone: Any = None, fax: Any = None,
+             address: Any = None, city_state: Any = None, limit: int = 5) -> List[FacilityMatch]:
+        """
+        Rank facility candidates for REDCap hospital fields
+
+        Args:
+            hos_name: REDCap hos_name
+            phone: REDCap hospital_phone_num
+            fax: REDCap hospital_fax_num
+            address: REDCap hospital_address (used for ZIP/state blocking)
+            city_state: REDCap bc_birthplace_city_state, e.g. "Nashville, TN"
+            limit: Maximum number of candidates to return
+
+        Returns:
+            Candidates sorted by descending score; a confirmed match is always first
+        """
+        facilities = self._ensure_indexed()
+        if not facilities:
+            return []
+
+        state = parse_state(city_state, address)
+        results: List[FacilityMatch] = []
+        confirmed_site = self.confirmed_site(hos_name, state)
+        if confirmed_site:
+            facility = self.index.by_site(confirmed_site)
+            if facility is not None:
+                results.append(FacilityMatch(facility=facility, score=1.0, reasons=["confirmed"], confirmed=True))
+
+        phone = normalize_phone(phone)
+        fax = normalize_phone(fax)
+        zip_code = parse_zip(address)
+        query_tokens = tokenize(hos_name)
+        token_set = set(query_tokens)
+        query_trigrams = trigrams(hos_name)
+        query_weight = sum(self._idf.get(t, math.log(1 + len(facilities))) for t in token_set)
+
+        candidate_ids, phone_ids, fax_ids = self._candidate_ids(query_tokens, phone, fax, state, zip_code)
+        scored = [
+            self._score(i, token_set, query_trigrams, query_weight, phone_ids, fax_ids, state, zip_code)
+            for i in candidate_ids
+        ]
+        # Sort on the raw blended score so bonuses still break ties between exact names
+        scored.sort(key=lambda m: m.score, reverse=True)
+        for match in scored:
+            match.score = min(match.score, 1.0)
+
+        seen = {m.site for m in results}
+        for match in scored:
+            if match.site not in seen:
+                results.append(match)
+                seen.add(match.site)
+            if len(results) >= limit:
+                break
+        return results
+
+    def best_match(self, hos_name: Any, phone: Any = None, fax: Any = None,
+                   address: Any = None, city_state: Any = None,
+                   min_score: float = 0.6) -> Optional[FacilityMatch]:
+        """
+        Best candidate above min_score, auto-confirming high-confidence matches
+
+        Auto-confirmed matches are scoped to the state parsed from city_state or
+        address, so same-named hospitals in other states are still matched on
+        their own; without a state nothing is auto-confirmed.
+
+        Returns:
+            FacilityMatch or None if nothing scores at least min_score
+        """
+        ranked = self.rank(hos_name, phone, fax, address, city_state, limit=1)
+        if not ranked or ranked[0].score < min_score:
+            return None
+        best = ranked[0]
+        state = parse_state(city_state, address)
+        if not best.confirmed and state and best.score >= self.auto_confirm_score:
+            self.confirm(hos_name, best.site, state, overwrite=False)
+        return best
+
+
+# Global facility matcher instance
+facility_matcher = FacilityMatcher()
+
+
+if __name__ == "__main__":
+    """Command line interface for facility matching"""
+    configure_logging()
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Usage: python facility_matcher.py <command> [args...]")
+        print("Commands:")
+        print("  match <hos_name> [phone] [fax]    - Show ranked facility candidates")
+        print("  confirm <hos_name> <site> [state] - Confirm hos_name -> site mapping")
+        print("  unconfirm <hos_name> [state]      - Remove a confirmed mapping")
+        sys.exit(1)
+
+    command = sys.argv[1].lower()
+
+    if command == "match":
+        args = sys.argv[2:] + [None, None]
+        for match in facility_matcher.rank(args[0], args[1], args[2]):
+            facility = match.facility
+            print(f"   {match.score:.2f} {facility['site']} {facility['siteName']} "
+                  f"({facility['city']}, {facility['state']}) [{', '.join(match.reasons)}]")
+    elif command == "confirm":
+        if len(sys.argv) < 4:
+            print("❌ hos_name and site required")
+            sys.exit(1)
+        state = sys.argv[4] if len(sys.argv) > 4 else ""
+        success = facility_matcher.confirm(sys.argv[2], sys.argv[3], state)
+        sys.exit(0 if success else 1)
+    elif command == "unconfirm":
+        state = sys.argv[3] if len(sys.argv) > 3 else ""
+        success = facility_matcher.unconfirm(sys.argv[2], state)
+        if not success:
+            print(f"⚠️ No confirmed mapping for {sys.argv[2]} {state}".rstrip())
+        sys.exit(0 if success else 1)
+    else:
+        print(f"❌ Unknown command: {command}")
+        sys.exit(1)
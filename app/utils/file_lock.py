@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+File Lock
+Exclusive OS-level lock on a lock file, shared by threads and processes,
+for read-modify-write of the JSON files that main.py, the dashboards and
+download_documents.py all update
+"""
+
+import functools
+import os
+import sys
+import threading
+
+
+def lock_handle(handle, blocking: bool = True):
+    """
+    Lock an open file
+
+    Raises:
+        OSError: If blocking is False and another process holds the lock
+    """
+    if sys.platform == "win32":
+        import msvcrt
+        handle.seek(0)
+        if not blocking:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+        while True:
+            try:
+                # Retries for about 10 seconds before raising
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    else:
+        import fcntl
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def unlock_handle(handle):
+    """Release a lock taken with lock_handle()"""
+    if sys.platform == "win32":
+        import msvcrt
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class FileLock:
+    """
+    Blocking exclusive lock, usable as a context manager
+
+    Reentrant within a thread, so a locked method may call another one. The
+    OS releases the lock if the holding process dies.
+    """
+
+    def __init__(self, lock_file: str):
+        self.lock_file = lock_file
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def __enter__(self) -> "FileLock":
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                os.makedirs(os.path.dirname(self.lock_file) or ".", exist_ok=True)
+                handle = open(self.lock_file, "a+")
+                try:
+                    lock_handle(handle)
+                except BaseException:
+                    handle.close()
+                    raise
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._handle = handle
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                try:
+                    unlock_handle(self._handle)
+                finally:
+                    self._handle.close()
+                    self._handle = None
+        finally:
+            self._thread_lock.release()
+
+
+def exclusive(method):
+    """Method decorator: run the method while holding self._lock (a FileLock)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -1,11 +1,30 @@
 from dataclasses import fields, is_dataclass
-from typing import Type, List, Dict, Any
+from functools import lru_cache
+from typing import Type, List, Dict, Any, Optional, Collection
 from datetime import datetime
 import re
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# More comprehensive pattern that handles:
+# - Regular fields: key = 'value'
+# - Checkbox fields: key(number) = checked/unchecked
+# - Nested quotes and special characters
+_DETAILS_PATTERN = re.compile(r"(\w+(?:\(\d+\))?)\s*=\s*(?:'([^']*)'|\"([^\"]*)\"|([^,]+))")
+
+# REDCap's own log format: key = 'value' or key(n) = checked, joined by ", "
+_REDCAP_PAIR_PATTERN = re.compile(r"(\w+(?:\(\d+\))?) = (?:'([^']*)'|([^,'\"]+))")
+
+
+@lru_cache(maxsize=None)
+def field_names(model_class: Type) -> frozenset:
+    """Names of a dataclass's fields, computed once per class"""
+    return frozenset(f.name for f in fields(model_class))
 
 
 def filter_records(records: List[Dict[str, Any]], model_class: Type):
-    valid_field_names = {f.name for f in fields(model_class)}
+    valid_field_names = field_names(model_class)
     result = []
     for record in records:
         filtered_record = {k: v for k, v in record.items() if k in valid_field_names}
@@ -13,17 +32,45 @@ def filter_records(records: List[Dict[str, Any]], model_class: Type):
         try:
             result.append(model_class(**filtered_record))  # Can raise TypeError if required fields are missing
         except TypeError as e:
-            print(f"Skipping invalid record due to error: {e}\nRecord: {record}")
+            log.warning("Skipping invalid record due to error: %s", e)
+            log.debug("Record: %s", record)
 
     return result
 
-def parse_details(details_str: str, strict_mode: bool = False) -> Dict[str, Any]:
+def _parse_redcap_pairs(details_str: str, typed_fields: Optional[Collection[str]]) -> Optional[Dict[str, Any]]:
+    """
+    Fast path for details strings in REDCap's exact log format.
+    
+    Returns None unless the pairs cover the whole string back to back, which
+    is exactly when the general pattern would produce the same result.
+    """
+    result = {}
+    consumed = -2  # no ", " before the first pair
+    for key, quoted, bare in _REDCAP_PAIR_PATTERN.findall(details_str):
+        if bare:
+            raw_value = bare
+            consumed += len(key) + len(bare) + 5
+        else:
+            raw_value = quoted
+            consumed += len(key) + len(quoted) + 7
+        if typed_fields is None or key in typed_fields:
+            result[key] = _convert_value_cached(raw_value)
+        else:
+            result[key] = raw_value.strip()
+    if consumed != len(details_str):
+        return None
+    return result
+
+def parse_details(details_str: str, strict_mode: bool = False,
+                  typed_fields: Optional[Collection[str]] = None) -> Dict[str, Any]:
     """
     Advanced version with type conversion and validation.
     
     Args:
         details_str (str): The details string to parse
         strict_mode (bool): If True, raises exceptions on parsing errors
+        typed_fields: Only convert these keys; other values stay stripped strings.
+            None (default) converts every value.
         
     Returns:
         Dict[str, Any]: Parsed key-value pairs with type conversion
@@ -46,21 +93,18 @@ def parse_details(details_str: str, strict_mode: bool = False) -> Dict[str, Any]
                 raise ValueError(f"No key=value patterns found in: {details_str}")
             return {}
         
-        result = {}
+        fast_result = _parse_redcap_pairs(details_str, typed_fields)
+        if fast_result is not None:
+            return fast_result
         
-        # More comprehensive pattern that handles:
-        # - Regular fields: key = 'value'
-        # - Checkbox fields: key(number) = checked/unchecked
-        # - Nested quotes and special characters
-        pattern = r"(\w+(?:\(\d+\))?)\s*=\s*(?:'([^']*)'|\"([^\"]*)\"|([^,]+))"
-        
-        matches = re.findall(pattern, details_str)
+        result = {}
+        matches = _DETAILS_PATTERN.findall(details_str)
         
         if not matches:
             error_msg = f"No valid key=value pairs found in: {details_str}"
             if strict_mode:
                 raise ValueError(error_msg)
-            print(f"Error parsing details: {error_msg}")
+            log.error("Error parsing details: %s", error_msg)
             return {}
         
         for match in matches:
@@ -71,8 +115,10 @@ def parse_details(details_str: str, strict_mode: bool = False) -> Dict[str, Any]
                 continue
             
             # Type conversion
-            value = _convert_value_type(raw_value)
-            result[key] = value
+            if typed_fields is None or key in typed_fields:
+                result[key] = _convert_value_cached(raw_value)
+            else:
+                result[key] = raw_value
             
         return result
         
@@ -80,7 +126,7 @@ def parse_details(details_str: str, strict_mode: bool = False) -> Dict[str, Any]
         error_msg = f"Error parsing details '{details_str}': {e}"
         if strict_mode:
             raise ValueError(error_msg) from e
-        print(f'Error parsing details: {error_msg}')
+        log.error("Error parsing details: %s", error_msg)
         return {}
 
 def _convert_value_type(value_str: str) -> Any:
@@ -126,35 +172,42 @@ def _convert_value_type(value_str: str) -> Any:
     # Return as string
     return value_str
 
-def get_latest_records(records):
-    latest_records = {}
+# REDCap logs repeat a small set of values ('0', '1', checked, dates), and
+# every result is immutable, so conversions are shared across calls
+_convert_value_cached = lru_cache(maxsize=4096)(_convert_value_type)
 
+def get_latest_records(records):
+    """
+    Reduce log entries to the newest entry per record, with parsed details.
+    
+    Winners are chosen on the raw "%Y-%m-%d %H:%M" timestamp strings, which
+    order the same way as the times they represent; details are parsed only
+    once per winning entry.
+    """
+    winners = {}
     for rec in records:
         record_id = rec.get("record")
-        timestamp_str = rec.get("timestamp")
-        # Convert string to datetime object
-        timestamp = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M")
-
-        if record_id not in latest_records or timestamp > latest_records[record_id]['timestamp']:
-            rec_copy = rec.copy()
-            rec_copy['timestamp'] = timestamp
-            parsed_details = parse_details(rec.get('details', ''))
-
-            for key, value in parsed_details.items():
-                if value is None:
-                    parsed_details[key] = "0"
-                if value == "checked":
-                    parsed_details[key] = "1"
-                if value == "unchecked":
-                    parsed_details[key] = "0"
-            rec_copy['details'] = parsed_details
-            latest_records[record_id] = rec_copy
-
-    # Convert timestamp back to string if needed
-    for rec in latest_records.values():
-        rec['timestamp'] = rec['timestamp'].strftime("%Y-%m-%d %H:%M")
-
-    return list(latest_records.values())
+        current = winners.get(record_id)
+        # Ties keep the first entry seen
+        if current is None or rec.get("timestamp") > current.get("timestamp"):
+            winners[record_id] = rec
+
+    latest_records = []
+    for rec in winners.values():
+        rec_copy = rec.copy()
+        parsed_details = parse_details(rec.get('details', ''))
+
+        for key, value in parsed_details.items():
+            if value is None:
+                parsed_details[key] = "0"
+            if value == "checked":
+                parsed_details[key] = "1"
+            if value == "unchecked":
+                parsed_details[key] = "0"
+        rec_copy['details'] = parsed_details
+        latest_records.append(rec_copy)
+
+    return latest_records
 
 def merge_records(records: List[Dict]) -> Dict:
     merged = {}
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""
+REDCap Log Cursor
+Persisted high-water mark for log ingestion: the last processed log
+timestamp plus the entries already seen at that timestamp, so each run
+fetches only what changed since the previous one
+"""
+
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import configure_logging, get_logger
+
+log = get_logger(__name__)
+
+
+def entry_fingerprint(entry: Dict[str, Any]) -> str:
+    """
+    Identify a log entry within its timestamp
+
+    REDCap log timestamps only have minute precision, so the same record can
+    appear more than once per timestamp; the details hash tells those apart.
+    """
+    details = entry.get("details") or ""
+    digest = hashlib.sha1(details.encode("utf-8")).hexdigest()[:12]
+    return f"{entry.get('record', '')}|{digest}"
+
+
+class LogCursor:
+    """High-water mark of processed REDCap log entries"""
+
+    def __init__(self, state_file: str = "logs/log_cursor.json"):
+        self.state_file = state_file
+        self.timestamp: Optional[str] = None
+        self.seen: Set[str] = set()
+        self.updated_at: Optional[str] = None
+        self._load()
+
+    def _load(self):
+        """Load the cursor from storage"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            self.timestamp = state.get("timestamp")
+            self.seen = set(state.get("seen", []))
+            self.updated_at = state.get("updated_at")
+        except (json.JSONDecodeError, IOError) as e:
+            log.warning("⚠️ Error loading log cursor: %s", e)
+
+    def _save(self) -> bool:
+        """Write the cursor atomically so a crash never leaves a torn file"""
+        state = {
+            "timestamp": self.timestamp,
+            "seen": sorted(self.seen),
+            "updated_at": self.updated_at,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_file, self.state_file)
+            return True
+        except IOError as e:
+            log.error("❌ Error saving log cursor: %s", e)
+            return False
+
+    def begin_time(self, default: str) -> str:
+        """
+        beginTime for the next log request
+
+        Args:
+            default: Window start to use before the first checkpoint exists
+
+        Returns:
+            str: The cursor timestamp (inclusive), or default
+        """
+        return self.timestamp or default
+
+    def is_new(self, entry: Dict[str, Any]) -> bool:
+        """False for entries at or before the high-water mark that were already processed"""
+        if self.timestamp is None:
+            return True
+        timestamp = entry.get("timestamp", "")
+        if timestamp < self.timestamp:
+            return False
+        return timestamp != self.timestamp or entry_fingerprint(entry) not in self.seen
+
+    def filter_new(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop entries at or before the high-water mark that were already processed"""
+        return [entry for entry in entries if self.is_new(entry)]
+
+    def advance(self, entries: List[Dict[str, Any]]) -> bool:
+        """
+        Move the high-water mark past processed entries (never backwards)
+
+        Call only after the entries have been handled, so an interrupted run
+        is picked up again by the next one.
+
+        Returns:
+            bool: True if the cursor moved and was saved
+        """
+        timestamps = [entry.get("timestamp") for entry in entries if entry.get("timestamp")]
+        if not timestamps:
+            return False
+
+        latest = max(timestamps)
+        if self.timestamp is not None and latest < self.timestamp:
+            return False
+        if latest != self.timestamp:
+            self.timestamp = latest
+            self.seen = set()
+        self.seen.update(entry_fingerprint(entry) for entry in entries if entry.get("timestamp") == latest)
+        self.updated_at = datetime.now().isoformat()
+        if self._save():
+            log.info("📌 Log cursor advanced to %s (%s entries at that time)", self.timestamp, len(self.seen))
+            return True
+        return False
+
+    def advance_before(self, entries: List[Dict[str, Any]], failed_at: str) -> bool:
+        """
+        Checkpoint only the entries older than the first failed one
+
+        The failed record's entry (and everything after it) is fetched again by
+        the next run; records that did succeed are then skipped by the
+        processing ledger.
+
+        Args:
+            entries: Entries of the batch, e.g. LatestLogEntries.latest()
+            failed_at: Timestamp of the earliest entry whose record failed
+
+        Returns:
+            bool: True if the cursor moved and was saved
+        """
+        return self.advance([entry for entry in entries if (entry.get("timestamp") or "") < failed_at])
+
+    def reset(self):
+        """Forget the checkpoint; the next run falls back to the time_delta window"""
+        self.timestamp = None
+        self.seen = set()
+        self.updated_at = None
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+
+
+# Global log cursor instance
+log_cursor = LogCursor()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    if len(sys.argv) > 1 and sys.argv[1] == "reset":
+        log_cursor.reset()
+        print("✅ Log cursor reset")
+    else:
+        print(f"📌 Log cursor: {log_cursor.timestamp or 'not set'} "
+              f"({len(log_cursor.seen)} entries seen at that time, updated {log_cursor.updated_at})")
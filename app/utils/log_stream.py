@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+"""
+Streaming REDCap Log Reader
+Parses a JSON array of log entries incrementally from response chunks and
+reduces it to the latest entry per record as it goes, so memory grows with
+the number of distinct records rather than with the size of the log export
+"""
+
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# Compact the parse buffer once this much of it has been consumed
+_COMPACT_THRESHOLD = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(chunks: Iterable[Union[bytes, str]]) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array from a stream of chunks
+
+    Chunks may split anywhere, including inside a multi-byte character.
+    A top-level object instead of an array (REDCap's {"error": ...} reply)
+    raises ValueError.
+
+    Args:
+        chunks: bytes or str pieces of the response body, in order
+
+    Yields:
+        Each array element as soon as it is complete
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    started = False
+    finished = False
+    chunk_iter = iter(chunks)
+    eof = False
+
+    while not finished:
+        if not eof:
+            try:
+                chunk = next(chunk_iter)
+                buf += utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+            except StopIteration:
+                buf += utf8.decode(b"", final=True)
+                eof = True
+
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buf):
+                break
+
+            if not started:
+                if buf[pos] != "[":
+                    # Not an array: wait for the whole body and report it
+                    if not eof:
+                        break
+                    body = json.loads(buf[pos:])
+                    if isinstance(body, dict) and "error" in body:
+                        raise ValueError(f"REDCap error: {body['error']}")
+                    raise ValueError(f"Expected a JSON array, got {type(body).__name__}")
+                started = True
+                pos += 1
+                continue
+
+            if buf[pos] == ",":
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                finished = True
+                break
+
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                break
+            if end >= len(buf) and not eof:
+                # A number at the very end of the buffer may still be growing
+                break
+            yield value
+            pos = end
+
+        if pos > _COMPACT_THRESHOLD:
+            buf = buf[pos:]
+            pos = 0
+
+        if eof and not finished:
+            if not started:
+                return  # empty body
+            raise ValueError("Log response ended before the JSON array was closed")
+
+
+def iter_file_chunks(path: str, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    """Read a file in fixed-size chunks"""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class LatestLogEntries:
+    """
+    On-the-fly reduction of log entries to the newest entry per record
+
+    Also tracks the entries at the highest timestamp, which is all the log
+    cursor needs to checkpoint the batch.
+    """
+
+    def __init__(self, cursor=None):
+        """
+        Args:
+            cursor: Optional LogCursor; entries it has already seen are skipped
+        """
+        self.cursor = cursor
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self.watermark: Optional[str] = None
+        self.watermark_entries: List[Dict[str, Any]] = []
+        self.total = 0
+        self.skipped = 0
+        self.complete = True
+
+    def add(self, entry: Dict[str, Any]):
+        self.total += 1
+        if self.cursor is not None and not self.cursor.is_new(entry):
+            self.skipped += 1
+            return
+
+        timestamp = entry.get("timestamp") or ""
+        # "%Y-%m-%d %H:%M" timestamps order correctly as plain strings
+        if self.watermark is None or timestamp > self.watermark:
+            self.watermark = timestamp
+            self.watermark_entries = [entry]
+        elif timestamp == self.watermark:
+            self.watermark_entries.append(entry)
+
+        if not (entry.get("details") or "").strip():
+            return
+        record_id = entry.get("record")
+        current = self._latest.get(record_id)
+        # Ties keep the first entry, as get_latest_records does
+        if current is None or timestamp > current.get("timestamp", ""):
+            self._latest[record_id] = entry
+
+    def consume(self, entries: Iterable[Dict[str, Any]]) -> "LatestLogEntries":
+        """
+        Add every entry from an iterator
+
+        A failure part-way through marks the batch incomplete, so the cursor
+        is not advanced past entries that were never received.
+        """
+        try:
+            for entry in entries:
+                self.add(entry)
+        except Exception as e:
+            self.complete = False
+            log.error("❌ Log stream interrupted after %s entries: %s", self.total, e)
+        return self
+
+    def latest(self) -> List[Dict[str, Any]]:
+        """Newest raw log entry per record (details still unparsed)"""
+        return list(self._latest.values())
+
+    def __len__(self) -> int:
+        return len(self._latest)
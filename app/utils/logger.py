@@ -1,19 +1,153 @@
-from typing import List, Dict
-import pandas as pd
+from datetime import datetime
+from typing import List, Dict, Optional
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
 import os
+from dotenv import load_dotenv
+
+# All application loggers live under this name, so one handler and level cover them
+APP_LOGGER_NAME = "app"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is when the record is emitted (tests and tools swap it)"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def configure_logging(level: Optional[str] = None) -> logging.Logger:
+    """
+    Send application logs through a queue to a background thread writing stdout
+
+    Records are formatted on the calling thread only if their level is enabled;
+    the console write happens on the listener thread, so a slow terminal or
+    redirected pipe no longer stalls processing. Safe to call more than once.
+    Entry points call it from their __main__ block; a process that only
+    imports the modules gets no listener thread and leaves logging alone.
+
+    Args:
+        level: DEBUG, INFO, WARNING or ERROR; defaults to $LOG_LEVEL, then INFO.
+            DEBUG adds full request/response payloads, which contain PHI.
+
+    Returns:
+        logging.Logger: The application root logger
+    """
+    global _listener
+    load_dotenv()
+    app_logger = logging.getLogger(APP_LOGGER_NAME)
+    level_name = (level or os.getenv("LOG_LEVEL") or "INFO").upper()
+    app_logger.setLevel(getattr(logging, level_name, logging.INFO))
+
+    if _listener is None:
+        log_queue = queue.SimpleQueue()
+        console = _StdoutHandler()
+        console.setFormatter(logging.Formatter("%(message)s"))
+        _listener = logging.handlers.QueueListener(log_queue, console)
+        _listener.start()
+        app_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        app_logger.propagate = False
+        atexit.register(shutdown_logging)
+    return app_logger
+
+
+def shutdown_logging():
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        app_logger = logging.getLogger(APP_LOGGER_NAME)
+        for handler in list(app_logger.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                app_logger.removeHandler(handler)
+
+
+def reset_logging():
+    """
+    Forget the logging set up by the parent of a forked process
+
+    The child inherits the parent's QueueHandler but not its listener thread,
+    so its records would queue up unread. Call configure_logging() afterwards.
+    """
+    global _listener
+    _listener = None
+    app_logger = logging.getLogger(APP_LOGGER_NAME)
+    for handler in list(app_logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            app_logger.removeHandler(handler)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Logger for a module, e.g. get_logger(__name__)
+
+    Use %-style arguments rather than f-strings so payloads are only
+    serialized when the level is enabled:
+        log.debug("details response %s", data)
+    """
+    return logging.getLogger(f"{APP_LOGGER_NAME}.{name}")
+
 
 class PandasCSVLogger:
-    def __init__(self, filepath: str, columns: List[str]):
-        self.filepath = filepath
+    """
+    Appends rows to a CSV file
+
+    The file (with its header) and pandas are only touched on the first row,
+    so module-level loggers cost nothing to import.
+
+    The path may contain strftime codes, e.g. "logs/pdfs/logs_%Y%m%d.csv".
+    They are filled in on every write, so a long-running daemon rolls over to
+    a new file each day; per_cycle loggers use the time the current cycle
+    started (see new_cycle()) and get one file per cycle.
+    """
+
+    # Start of the current processing cycle; one-shot runs are a single cycle
+    _cycle_started = datetime.now()
+
+    def __init__(self, filepath: str, columns: List[str], per_cycle: bool = False):
+        self.filepath_pattern = filepath
         self.columns = columns
+        self.per_cycle = per_cycle
+        self._initialized_path: Optional[str] = None
+
+    @classmethod
+    def new_cycle(cls):
+        """Start a new cycle: per_cycle loggers write to a new file from now on"""
+        cls._cycle_started = datetime.now()
+
+    @property
+    def filepath(self) -> str:
+        when = PandasCSVLogger._cycle_started if self.per_cycle else datetime.now()
+        return when.strftime(self.filepath_pattern)
+
+    def _initialize(self, filepath: str):
+        import pandas as pd
+
         # Ensure parent directory exists
-        dir_path = os.path.dirname(os.path.abspath(self.filepath))
+        dir_path = os.path.dirname(os.path.abspath(filepath))
         os.makedirs(dir_path, exist_ok=True)
         # Initialize CSV file with headers if it doesn't exist
-        if not os.path.exists(self.filepath):
+        if not os.path.exists(filepath):
             df = pd.DataFrame(columns=pd.Index(self.columns))
-            df.to_csv(self.filepath, index=False)
+            df.to_csv(filepath, index=False)
+        self._initialized_path = filepath
 
     def log(self, row: Dict[str, str]):
+        import pandas as pd
+
+        filepath = self.filepath
+        if filepath != self._initialized_path:
+            self._initialize(filepath)
         df = pd.DataFrame([row], columns=pd.Index(self.columns))
-        df.to_csv(self.filepath, mode='a', header=False, index=False)
+        df.to_csv(filepath, mode='a', header=False, index=False)
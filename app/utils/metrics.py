@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+"""
+Process Metrics
+Counters, gauges and latency histograms for the processing run, exported in
+the Prometheus text format by the dashboards' /metrics endpoints.
+
+Each process (main.py, the outbox drainer) keeps its own registry. The entry
+points that serve metrics call metrics.persist() from __main__; the registry
+is then written to logs/metrics/<process>.json (or $METRICS_DIR/<process>.json)
+at the end of every cycle, at exit, and at most every AUTOSAVE_SECONDS while
+it is updating. Counters and histograms are reloaded from that file on start,
+so they keep counting across one-shot cron runs. The dashboards merge the
+files at scrape time, labelled by process. A process that only imports the
+module (tests, tools) counts in memory and writes nothing.
+"""
+
+import atexit
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import get_logger
+from utils.timing import DEFAULT_BUCKETS, Histogram, stage_timings
+
+log = get_logger(__name__)
+
+METRICS_DIR = os.getenv("METRICS_DIR", "logs/metrics")
+AUTOSAVE_SECONDS = 10.0
+
+# name -> (type, help); only these names are accepted
+METRICS = {
+    "medicos_cycles_total": ("counter", "Processing cycles completed"),
+    "medicos_records_total": ("counter", "Records seen per cycle, by request type"),
+    "medicos_records_dead_lettered_total": ("counter", "Records given up on after repeated failures"),
+    "medicos_documents_processed_total": ("counter", "Documents processed"),
+    "medicos_last_cycle_timestamp_seconds": ("gauge", "Unix time the last cycle finished"),
+    "medicos_last_cycle_duration_seconds": ("gauge", "Wall time of the last cycle"),
+    "medicos_stage_duration_seconds": ("histogram", "Duration of a processing stage"),
+    "medicos_smartrequest_requests_total": ("counter", "SmartRequest submissions by outcome"),
+    "medicos_smartrequest_token_refreshes_total": ("counter", "SmartRequest access token requests by outcome"),
+    "medicos_smartrequest_retries_total": ("counter", "SmartRequest calls retried after a 429/503, by status"),
+    "medicos_emails_total": ("counter", "Emails handed to the SMTP relay by outcome"),
+    "medicos_email_queue_depth": ("gauge", "Emails waiting in the background dispatchers"),
+    "medicos_outbox_items": ("gauge", "Outbox items by status"),
+    "medicos_document_store_total": ("counter", "Generated PDFs by document store outcome (hit: render skipped)"),
+    "medicos_documents_downloaded_total": ("counter", "SmartRequest document downloads by outcome"),
+    "medicos_download_bytes_total": ("counter", "Bytes of SmartRequest documents downloaded"),
+}
+
+
+def label_key(labels: Dict[str, str]) -> str:
+    """Prometheus label set, e.g. 'outcome="error",stage="fill_template"'"""
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _histogram_to_dict(histogram: Histogram) -> dict:
+    return {"buckets": list(histogram.buckets), "bucket_counts": histogram.bucket_counts,
+            "count": histogram.count, "sum": histogram.sum, "min": histogram.min, "max": histogram.max}
+
+
+def _histogram_from_dict(data: dict) -> Histogram:
+    histogram = Histogram(data["buckets"])
+    histogram.bucket_counts = list(data["bucket_counts"])
+    histogram.count, histogram.sum = data["count"], data["sum"]
+    histogram.min, histogram.max = data.get("min"), data.get("max")
+    return histogram
+
+
+class MetricsRegistry:
+    """In-memory metrics of one process, persisted as a JSON snapshot"""
+
+    def __init__(self, process: str, metrics_dir: str = METRICS_DIR, autosave_seconds: float = AUTOSAVE_SECONDS,
+                 persistent: bool = True):
+        self.process = process
+        self.snapshot_file = os.path.join(metrics_dir, f"{process}.json")
+        self.autosave_seconds = autosave_seconds
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, float]] = {}
+        self._gauges: Dict[str, Dict[str, float]] = {}
+        self._histograms: Dict[str, Dict[str, Histogram]] = {}
+        self._dirty = False
+        self._last_save = time.monotonic()
+        if persistent:
+            self._load()
+
+    def persist(self):
+        """
+        Reload the snapshot and keep writing it: periodically, on save() and at exit
+
+        Called from the __main__ block of the entry points whose metrics the
+        dashboards serve, before anything is counted.
+        """
+        if self.persistent:
+            return
+        self.persistent = True
+        self._load()
+        atexit.register(self.save)
+
+    def _load(self):
+        if not os.path.exists(self.snapshot_file):
+            return
+        try:
+            with open(self.snapshot_file) as f:
+                snapshot = json.load(f)
+            self._counters = snapshot.get("counters", {})
+            self._gauges = snapshot.get("gauges", {})
+            self._histograms = {
+                name: {labels: _histogram_from_dict(data) for labels, data in series.items()}
+                for name, series in snapshot.get("histograms", {}).items()
+            }
+        except (OSError, ValueError, KeyError) as e:
+            log.warning("⚠️ Ignoring unreadable metrics snapshot %s: %s", self.snapshot_file, e)
+
+    def _check(self, name: str, metric_type: str):
+        if METRICS.get(name, (None,))[0] != metric_type:
+            raise ValueError(f"Unknown {metric_type} metric: {name}")
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add to a counter"""
+        self._check(name, "counter")
+        key = label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+            self._dirty = True
+        self._maybe_save()
+
+    def set(self, name: str, value: float, **labels):
+        """Set a gauge"""
+        self._check(name, "gauge")
+        with self._lock:
+            self._gauges.setdefault(name, {})[label_key(labels)] = value
+            self._dirty = True
+        self._maybe_save()
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a value (seconds) in a histogram"""
+        self._check(name, "histogram")
+        key = label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(DEFAULT_BUCKETS)
+            histogram.observe(value)
+            self._dirty = True
+        self._maybe_save()
+
+    def _maybe_save(self):
+        if self.persistent and self.autosave_seconds is not None and time.monotonic() - self._last_save >= self.autosave_seconds:
+            self.save()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "process": self.process,
+                "pid": os.getpid(),
+                "updated_at": time.time(),
+                "counters": {name: dict(series) for name, series in self._counters.items()},
+                "gauges": {name: dict(series) for name, series in self._gauges.items()},
+                "histograms": {
+                    name: {labels: _histogram_to_dict(h) for labels, h in series.items()}
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def save(self) -> bool:
+        """Write the snapshot atomically if anything changed since the last save"""
+        if not self.persistent or not self._dirty:
+            return False
+        try:
+            snapshot = self.snapshot()
+            self._dirty = False
+            self._last_save = time.monotonic()
+            os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
+            tmp_path = f"{self.snapshot_file}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_file)
+            return True
+        except OSError as e:
+            log.error("❌ Error saving metrics snapshot: %s", e)
+            return False
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _with_labels(name: str, labels: str, extra: str = "") -> str:
+    combined = ",".join(part for part in (labels, extra) if part)
+    return f"{name}{{{combined}}}" if combined else name
+
+
+def render_prometheus(snapshots: List[dict], extra_gauges: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+    """
+    Prometheus text exposition of the given process snapshots
+
+    Args:
+        snapshots: MetricsRegistry.snapshot() dicts, one per process
+        extra_gauges: Gauges computed at scrape time, {name: {label_key: value}}
+
+    Returns:
+        str: Exposition text (version 0.0.4)
+    """
+    lines = []
+    for name, (metric_type, help_text) in METRICS.items():
+        samples = []
+        for snapshot in snapshots:
+            process_label = f'process="{_escape(snapshot.get("process", "unknown"))}"'
+            if metric_type == "histogram":
+                for labels, data in sorted(snapshot.get("histograms", {}).get(name, {}).items()):
+                    series_labels = ",".join(part for part in (process_label, labels) if part)
+                    cumulative = 0
+                    for bound, bucket_count in zip(list(data["buckets"]) + [float("inf")], data["bucket_counts"]):
+                        cumulative += bucket_count
+                        le_label = label_key({"le": _format_value(bound)})
+                        samples.append(f"{_with_labels(name + '_bucket', series_labels, le_label)} {cumulative}")
+                    samples.append(f'{_with_labels(name + "_sum", series_labels)} {_format_value(data["sum"])}')
+                    samples.append(f'{_with_labels(name + "_count", series_labels)} {data["count"]}')
+            else:
+                section = "counters" if metric_type == "counter" else "gauges"
+                for labels, value in sorted(snapshot.get(section, {}).get(name, {}).items()):
+                    samples.append(f"{_with_labels(name, ','.join(p for p in (process_label, labels) if p))} "
+                                   f"{_format_value(value)}")
+        for labels, value in sorted((extra_gauges or {}).get(name, {}).items()):
+            samples.append(f"{_with_labels(name, labels)} {_format_value(value)}")
+        if samples:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def load_snapshots(metrics_dir: str = METRICS_DIR) -> List[dict]:
+    """Every process snapshot written under metrics_dir"""
+    snapshots = []
+    for path in sorted(glob.glob(os.path.join(metrics_dir, "*.json"))):
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError) as e:
+            log.warning("⚠️ Skipping unreadable metrics snapshot %s: %s", path, e)
+    return snapshots
+
+
+def render_metrics_page(metrics_dir: str = METRICS_DIR) -> str:
+    """/metrics body for the dashboards: process snapshots plus live outbox depth"""
+    from utils.outbox import outbox
+
+    extra_gauges = {"medicos_outbox_items": {
+        label_key({"status": status}): count for status, count in outbox.stats().items()
+    }}
+    return render_prometheus(load_snapshots(metrics_dir), extra_gauges)
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Global registry of this process, named after the entry script (main, outbox_drainer, ...)
+metrics = MetricsRegistry(os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python",
+                          persistent=False)
+stage_timings.add_listener(
+    lambda stage, seconds: metrics.observe("medicos_stage_duration_seconds", seconds, stage=stage))
+
+
+if __name__ == "__main__":
+    print(render_metrics_page(), end="")
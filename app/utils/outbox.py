@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+"""
+Outbound Work Queue
+SQLite-backed outbox for side effects (SmartRequest submissions, emails)
+that failed during a run, retried with exponential backoff by the drainer
+"""
+
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+KIND_SMARTREQUEST = "smartrequest"
+KIND_EMAIL = "email"
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_DEAD = "dead"
+# Not retried automatically: an operator checks whether the side effect happened
+STATUS_REVIEW = "review"
+
+DEFAULT_BASE_DELAY = 60          # seconds before the first retry
+DEFAULT_MAX_DELAY = 6 * 60 * 60  # never wait more than 6 hours between retries
+DEFAULT_MAX_ATTEMPTS = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    idempotency_key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+def make_key(record_id: str, request_type: str) -> str:
+    """Idempotency key: '<mg_idpreg>_<j>:<request type>'"""
+    return f"{record_id}:{request_type}"
+
+
+class NeedsReview(Exception):
+    """Raised by a drain handler when repeating the item could duplicate its side effect"""
+
+
+@dataclass
+class OutboxItem:
+    """A queued outbound side effect"""
+    idempotency_key: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str
+    attempts: int
+    next_attempt_at: float
+    last_error: Optional[str] = None
+
+
+class Outbox:
+    """Persistent queue of outbound side effects keyed for idempotency"""
+
+    def __init__(self, db_path: str = "logs/outbox.sqlite3",
+                 base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        with self._lock:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = self._connect()
+            try:
+                with conn:
+                    return conn.execute(sql, params).rowcount
+            finally:
+                conn.close()
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = self._connect()
+            try:
+                # A transaction, so UPDATE ... RETURNING statements are committed too
+                with conn:
+                    return conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+
+    def enqueue(self, key: str, kind: str, payload: Dict[str, Any], error: Optional[str] = None,
+                status: str = STATUS_PENDING) -> bool:
+        """
+        Queue a side effect for retry (or, with STATUS_REVIEW, for an operator)
+
+        A key that is already pending or in review is left untouched, except
+        that a review replaces a pending retry. A done or dead item with the
+        same key is a new failure (e.g. the record's next request) and is
+        queued again with the new payload and a fresh attempt count.
+
+        Returns:
+            bool: True if the item was queued
+        """
+        now = time.time()
+        try:
+            inserted = self._execute(
+                "INSERT INTO outbox (idempotency_key, kind, payload, status, attempts, "
+                "next_attempt_at, last_error, created_at, updated_at) VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?) "
+                "ON CONFLICT(idempotency_key) DO UPDATE SET kind = excluded.kind, payload = excluded.payload, "
+                "status = excluded.status, attempts = 0, next_attempt_at = excluded.next_attempt_at, "
+                "last_error = excluded.last_error, updated_at = excluded.updated_at "
+                "WHERE outbox.status NOT IN (?, ?) OR (excluded.status = ? AND outbox.status = ?)",
+                (key, kind, json.dumps(payload, default=str), status,
+                 now + self.base_delay, error, now, now, STATUS_PENDING, STATUS_REVIEW,
+                 STATUS_REVIEW, STATUS_PENDING)
+            )
+            if inserted and status == STATUS_REVIEW:
+                log.warning("⚠️ Queued %s for manual review: %s (%s)", kind, key, error)
+            elif inserted:
+                log.info("📥 Queued %s for retry: %s", kind, key)
+            return bool(inserted)
+        except sqlite3.Error as e:
+            log.error("❌ Error queueing %s %s: %s", kind, key, e)
+            return False
+
+    def mark_done(self, key: str) -> bool:
+        """Mark an item as delivered (no-op for unknown keys)"""
+        return bool(self._execute(
+            "UPDATE outbox SET status = ?, last_error = NULL, updated_at = ? WHERE idempotency_key = ?",
+            (STATUS_DONE, time.time(), key)
+        ))
+
+    def mark_failed(self, key: str, error: str) -> str:
+        """
+        Record a failed attempt and schedule the next one
+
+        A single UPDATE, so attempts from main.py and the drainer are all counted.
+        The delay doubles per attempt up to max_delay.
+
+        Returns:
+            str: New status (pending, or dead once max_attempts is reached)
+        """
+        now = time.time()
+        # Jitter spreads retries of items that failed together
+        jitter = random.uniform(0.8, 1.2)
+        rows = self._query(
+            "UPDATE outbox SET attempts = attempts + 1, "
+            "status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END, "
+            "next_attempt_at = ? + MIN(? * (1 << MIN(attempts, 30)), ?) * ?, "
+            "last_error = ?, updated_at = ? WHERE idempotency_key = ? RETURNING status",
+            (self.max_attempts, STATUS_DEAD, STATUS_PENDING,
+             now, self.base_delay, self.max_delay, jitter, error, now, key)
+        )
+        return rows[0]["status"] if rows else STATUS_DEAD
+
+    def mark_review(self, key: str, error: str) -> bool:
+        """Stop retrying an item until an operator releases or resolves it"""
+        return bool(self._execute(
+            "UPDATE outbox SET status = ?, last_error = ?, updated_at = ? WHERE idempotency_key = ?",
+            (STATUS_REVIEW, error, time.time(), key)
+        ))
+
+    def release(self, key: str) -> bool:
+        """Retry an item in review on the next drain (the operator found no earlier delivery)"""
+        now = time.time()
+        return bool(self._execute(
+            "UPDATE outbox SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ? "
+            "WHERE idempotency_key = ? AND status = ?",
+            (STATUS_PENDING, now, now, key, STATUS_REVIEW)
+        ))
+
+    def in_review(self) -> List[OutboxItem]:
+        """Items waiting for an operator, oldest first"""
+        if not os.path.exists(self.db_path):
+            return []
+        rows = self._query("SELECT * FROM outbox WHERE status = ? ORDER BY updated_at", (STATUS_REVIEW,))
+        return [self._to_item(row) for row in rows]
+
+    def get(self, key: str) -> Optional[OutboxItem]:
+        rows = self._query("SELECT * FROM outbox WHERE idempotency_key = ?", (key,))
+        return self._to_item(rows[0]) if rows else None
+
+    def due(self, limit: int = 100, now: Optional[float] = None) -> List[OutboxItem]:
+        """Pending items whose next attempt time has passed, oldest first"""
+        rows = self._query(
+            "SELECT * FROM outbox WHERE status = ? AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+            (STATUS_PENDING, now if now is not None else time.time(), limit)
+        )
+        return [self._to_item(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Item counts by status"""
+        counts = {STATUS_PENDING: 0, STATUS_DONE: 0, STATUS_DEAD: 0, STATUS_REVIEW: 0}
+        if not os.path.exists(self.db_path):
+            return counts
+        for row in self._query("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+    def drain(self, handlers: Dict[str, Callable[[Dict[str, Any]], bool]], limit: int = 100) -> Dict[str, int]:
+        """
+        Attempt every due item once
+
+        Args:
+            handlers: Map of kind -> callable(payload) returning True on success;
+                      raising NeedsReview moves the item to manual review
+            limit: Maximum number of items to attempt
+
+        Returns:
+            Counts of delivered, failed, dead and review items
+        """
+        result = {"delivered": 0, "failed": 0, "dead": 0, "review": 0}
+        for item in self.due(limit):
+            handler = handlers.get(item.kind)
+            if handler is None:
+                continue
+            try:
+                ok = handler(item.payload)
+                error = None if ok else "handler returned failure"
+            except NeedsReview as e:
+                self.mark_review(item.idempotency_key, str(e))
+                result["review"] += 1
+                log.warning("⚠️ %s %s needs manual review: %s", item.kind, item.idempotency_key, e)
+                continue
+            except Exception as e:
+                ok, error = False, str(e)
+
+            if ok:
+                self.mark_done(item.idempotency_key)
+                result["delivered"] += 1
+                log.info("✅ Delivered queued %s: %s", item.kind, item.idempotency_key)
+            elif self.mark_failed(item.idempotency_key, error) == STATUS_DEAD:
+                result["dead"] += 1
+                log.error("💀 Giving up on %s %s after %s attempts: %s",
+                          item.kind, item.idempotency_key, item.attempts + 1, error)
+            else:
+                result["failed"] += 1
+                log.warning("⚠️ Retry failed for %s %s: %s", item.kind, item.idempotency_key, error)
+        return result
+
+    @staticmethod
+    def _to_item(row: sqlite3.Row) -> OutboxItem:
+        return OutboxItem(
+            idempotency_key=row["idempotency_key"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            status=row["status"],
+            attempts=row["attempts"],
+            next_attempt_at=row["next_attempt_at"],
+            last_error=row["last_error"],
+        )
+
+
+# Global outbox instance
+outbox = Outbox()
+
+
+def enqueue_failed_email(to_email: str, subject: str, body: str, error: Any, key: Optional[str] = None) -> bool:
+    """Email dispatcher failure callback: keep the message for the drainer"""
+    if key is None:
+        digest = hashlib.sha1(f"{to_email}\n{subject}\n{body}".encode("utf-8")).hexdigest()[:16]
+        key = make_key(digest, "email")
+    return outbox.enqueue(key, KIND_EMAIL, {"to_email": to_email, "subject": subject, "body": body}, str(error))
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+Processing Ledger
+Remembers which record states were already handled, so an unchanged record
+is not regenerated (PDF + Datavant submission) on every run
+
+Within a record, each document's side effects (PDF, SmartRequest, email)
+are recorded as steps, so retrying a record that partly failed only repeats
+what did not succeed. A record state that keeps failing is dead-lettered
+after MAX_RECORD_ATTEMPTS runs and no longer holds back the log cursor.
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+STATUS_PROCESSED = "processed"
+STATUS_FAILED = "failed"
+STATUS_DEAD = "dead"
+MAX_RECORD_ATTEMPTS = int(os.getenv("RECORD_MAX_ATTEMPTS", "5"))
+
+# Ledger key of the record being processed, and whether its steps are redone (forced)
+_current_record: contextvars.ContextVar[Optional[tuple]] = contextvars.ContextVar(
+    "current_ledger_record", default=None)
+
+
+def relevant_fields(details: Dict[str, Any]) -> Dict[str, Any]:
+    """The REDCap fields that drive processing (mr_* request, date and needs fields)"""
+    return {key: value for key, value in details.items() if key.startswith("mr_")}
+
+
+def fields_hash(details: Dict[str, Any]) -> str:
+    """Stable hash of the relevant fields, independent of key order"""
+    payload = json.dumps(relevant_fields(details), sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def ledger_key(record_id: str, request_type: str, details: Dict[str, Any]) -> str:
+    """Ledger key: '<record>:<request type>:<fields hash>'"""
+    return f"{record_id}:{request_type}:{fields_hash(details)}"
+
+
+class ProcessingLedger:
+    """Append-only ledger of processed (record, request type, field state) keys"""
+
+    def __init__(self, ledger_file: str = "logs/processing_ledger.jsonl",
+                 max_attempts: int = MAX_RECORD_ATTEMPTS):
+        self.ledger_file = ledger_file
+        self.max_attempts = max_attempts
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Load existing entries; a torn last line from a crash is ignored"""
+        if not os.path.exists(self.ledger_file):
+            return
+        try:
+            with open(self.ledger_file, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._entries[entry["key"]] = entry
+        except IOError as e:
+            log.warning("⚠️ Error loading processing ledger: %s", e)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def status(self, record_id: str, request_type: str, details: Dict[str, Any]) -> Optional[str]:
+        """processed, failed (will be retried) or dead; None for a new record state"""
+        entry = self.get(record_id, request_type, details)
+        return entry.get("status", STATUS_PROCESSED) if entry else None
+
+    def is_processed(self, record_id: str, request_type: str, details: Dict[str, Any]) -> bool:
+        """True if this record was already processed with the same field values"""
+        return self.status(record_id, request_type, details) == STATUS_PROCESSED
+
+    def get(self, record_id: str, request_type: str, details: Dict[str, Any]) -> Optional[dict]:
+        return self._entries.get(ledger_key(record_id, request_type, details))
+
+    def _append(self, entry: dict) -> bool:
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.ledger_file) or ".", exist_ok=True)
+                with open(self.ledger_file, 'a') as f:
+                    f.write(json.dumps(entry) + "\n")
+            except IOError as e:
+                log.error("❌ Error writing processing ledger: %s", e)
+                return False
+            self._entries[entry["key"]] = entry
+        return True
+
+    def mark_processed(self, record_id: str, request_type: str, details: Dict[str, Any]) -> bool:
+        """
+        Record that a record state was fully processed
+
+        Returns:
+            bool: True if the entry was written
+        """
+        return self._append({
+            "key": ledger_key(record_id, request_type, details),
+            "record": record_id,
+            "request_type": request_type,
+            "processed_at": datetime.now().isoformat(),
+        })
+
+    def mark_failed(self, record_id: str, request_type: str, details: Dict[str, Any]) -> str:
+        """
+        Count a failed attempt at a record state
+
+        Returns:
+            str: failed, or dead once max_attempts runs have failed (the state
+                 is then skipped like a processed one until it is forced)
+        """
+        previous = self.get(record_id, request_type, details) or {}
+        attempts = previous.get("attempts", 0) + 1 if previous.get("status") == STATUS_FAILED else 1
+        status = STATUS_DEAD if attempts >= self.max_attempts else STATUS_FAILED
+        self._append({
+            "key": ledger_key(record_id, request_type, details),
+            "record": record_id,
+            "request_type": request_type,
+            "status": status,
+            "attempts": attempts,
+            "processed_at": datetime.now().isoformat(),
+        })
+        return status
+
+    @contextmanager
+    def record(self, record_id: str, request_type: str, details: Dict[str, Any],
+               redo: bool = False) -> Iterator[None]:
+        """Attribute the document steps checked and marked in this block to a record state"""
+        token = _current_record.set((ledger_key(record_id, request_type, details), redo))
+        try:
+            yield
+        finally:
+            _current_record.reset(token)
+
+    def step_key(self, document: str, step: str) -> Optional[str]:
+        """
+        Key of one side effect of one document ('<mg_idpreg>_<j>', e.g. "pdf") of
+        the current record(); None outside of one. Capture it before handing
+        the work to another context (e.g. a render pool callback).
+        """
+        current = _current_record.get()
+        return f"{current[0]}|{document}|{step}" if current else None
+
+    def step_done(self, key: Optional[str]) -> bool:
+        """True if the step already succeeded in an earlier attempt (never while redoing)"""
+        current = _current_record.get()
+        if key is None or (current and current[1]):
+            return False
+        return key in self._entries
+
+    def mark_step_done(self, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        return self._append({"key": key, "processed_at": datetime.now().isoformat()})
+
+
+def should_skip(ledger: ProcessingLedger, record_id: str, request_type: str, details: Dict[str, Any],
+                force_all: bool = False, force_records: Iterable[str] = ()) -> bool:
+    """True if the record state was processed (or dead-lettered) and is not forced"""
+    if force_all or record_id in force_records:
+        return False
+    return ledger.status(record_id, request_type, details) in (STATUS_PROCESSED, STATUS_DEAD)
+
+
+# Global ledger instance
+processing_ledger = ProcessingLedger()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+"""
+Run Profiler
+Profiles a processing run and writes the results under logs/profiles/:
+
+    <run>.txt        per-function table (calls/samples, self and cumulative time)
+    <run>.collapsed  "frame;frame;frame weight" lines for flamegraph.pl / speedscope
+    <run>.prof       raw cProfile stats for pstats / snakeviz (cprofile mode only)
+
+Modes (main.py --profile[=mode]):
+    sample    a background thread samples the processing thread's stack every
+              --profile_interval ms (default 5); overhead stays around 1-2%
+    cprofile  deterministic cProfile; exact call counts, but it slows Python-heavy
+              code noticeably; its collapsed stacks are rebuilt from the caller graph
+
+--profile_every=N profiles only every Nth record (and not the fetch/parse
+before them), to keep the overhead of long runs small.
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+PROFILE_DIR = "logs/profiles"
+MODES = ("sample", "cprofile")
+DEFAULT_SAMPLE_INTERVAL = 0.005
+# Rows in the per-function table
+TOP_FUNCTIONS = 60
+# Frames kept per sampled or rebuilt stack (deep recursion is cut at the root)
+MAX_STACK_DEPTH = 128
+
+
+def _frame_label(filename: str, line: int, name: str) -> str:
+    # ';' separates frames in the collapsed format
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ",")
+
+
+class SamplingProfiler:
+    """Samples one thread's call stack at a fixed interval while active"""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._thread_id: Optional[int] = None
+        self._active = threading.Event()
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def enable(self):
+        """Start sampling the calling thread"""
+        self._thread_id = threading.get_ident()
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+            self._sampler.start()
+        self._active.set()
+
+    def disable(self):
+        self._active.clear()
+
+    def close(self):
+        self._active.clear()
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1)
+            self._sampler = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            if not self._active.is_set():
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            frames = []
+            while frame is not None and len(frames) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                frames.append(_frame_label(code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+                self.samples += 1
+
+    def collapsed(self) -> Dict[str, int]:
+        """Collapsed stacks weighted by sample count"""
+        return dict(self.stacks)
+
+    def function_table(self) -> List[str]:
+        """Functions by inclusive sample count, with self samples and estimated time"""
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms "
+                 f"(~{self.samples * self.interval:.2f} s profiled)",
+                 f"{'incl':>7} {'incl %':>7} {'self':>7} {'self %':>7}  function"]
+        total = max(self.samples, 1)
+        for frame, count in inclusive.most_common(TOP_FUNCTIONS):
+            lines.append(f"{count:>7} {100 * count / total:>6.1f}% {own[frame]:>7} "
+                         f"{100 * own[frame] / total:>6.1f}%  {frame}")
+        return lines
+
+
+def collapse_pstats(stats: pstats.Stats) -> Dict[str, int]:
+    """
+    Rebuild collapsed stacks (weights in microseconds) from cProfile's caller graph
+
+    cProfile only keeps caller -> callee totals, so a function's time is split
+    between its call paths in proportion to the time each caller spent in it.
+    """
+    raw = stats.stats
+    children: Dict[Tuple, List[Tuple[Tuple, float]]] = defaultdict(list)
+    for func, (_, _, _, cumulative, callers) in raw.items():
+        for caller, edge in callers.items():
+            children[caller].append((func, edge[3]))
+
+    collapsed: Counter = Counter()
+
+    def walk(func: Tuple, path: List[str], on_path: set, share: float):
+        _, _, own_time, cumulative, _ = raw[func]
+        path = path + [_frame_label(*func)]
+        weight = int(own_time * share * 1_000_000)
+        if weight:
+            collapsed[";".join(path)] += weight
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for child, edge_time in children.get(func, ()):
+            child_cumulative = raw[child][3]
+            if child in on_path or not child_cumulative or not edge_time:
+                continue
+            walk(child, path, on_path | {child}, share * edge_time / child_cumulative)
+
+    # Roots: time not accounted for by any recorded caller (e.g. called from the
+    # frame that enabled the profiler)
+    for func, (_, _, _, cumulative, callers) in raw.items():
+        called_time = sum(edge[3] for edge in callers.values())
+        if cumulative and cumulative - called_time > 1e-6:
+            walk(func, [], {func}, (cumulative - called_time) / cumulative)
+        elif not callers:
+            walk(func, [], {func}, 1.0)
+    return dict(collapsed)
+
+
+class RunProfiler:
+    """
+    Optional profiling of main.py runs; a no-op unless a mode is set
+
+    Args:
+        mode: "sample", "cprofile" or None (disabled)
+        every: Only profile every Nth record (None profiles whole cycles)
+        interval: Seconds between stack samples in sample mode
+        profile_dir: Where the results are written
+    """
+
+    def __init__(self, mode: Optional[str] = None, every: Optional[int] = None,
+                 interval: float = DEFAULT_SAMPLE_INTERVAL, profile_dir: str = PROFILE_DIR):
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.every = every if every and every > 1 else None
+        self.interval = interval
+        self.profile_dir = profile_dir
+        self._profiler = None
+        self._records_seen = 0
+        self._records_profiled = 0
+
+    @classmethod
+    def from_args(cls) -> "RunProfiler":
+        """--profile[=sample|cprofile], --profile_every=N, --profile_interval=<ms>"""
+        from services.external_api_service import parse_arg
+
+        mode = parse_arg("profile", "sample" if "--profile" in sys.argv else None)
+        every = parse_arg("profile_every", None)
+        interval = float(parse_arg("profile_interval", str(DEFAULT_SAMPLE_INTERVAL * 1000))) / 1000
+        return cls(mode, int(every) if every else None, interval)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    def _start(self):
+        self._profiler = SamplingProfiler(self.interval) if self.mode == "sample" else cProfile.Profile()
+        self._records_seen = 0
+        self._records_profiled = 0
+
+    def wrap(self, run: Callable) -> Callable:
+        """Decorator: profile each call of run (one cycle) and write its results"""
+        @functools.wraps(run)
+        def profiled(*args, **kwargs):
+            if not self.enabled:
+                return run(*args, **kwargs)
+            self._start()
+            started = time.perf_counter()
+            if self.every is None:
+                self._profiler.enable()
+            try:
+                return run(*args, **kwargs)
+            finally:
+                self._profiler.disable()
+                self.write(time.perf_counter() - started)
+        return profiled
+
+    @contextmanager
+    def record(self) -> Iterator[bool]:
+        """Profile the enclosed record if it is one of the sampled ones (with --profile_every)"""
+        sampled = self.enabled and self.every is not None and self._profiler is not None \
+            and self._records_seen % self.every == 0
+        self._records_seen += 1
+        if not sampled:
+            yield False
+            return
+        self._records_profiled += 1
+        self._profiler.enable()
+        try:
+            yield True
+        finally:
+            self._profiler.disable()
+
+    def write(self, duration: float) -> Optional[str]:
+        """
+        Write the table, collapsed stacks (and .prof) of the finished cycle
+
+        Returns:
+            str: Path prefix of the written files, or None on error
+        """
+        profiler, self._profiler = self._profiler, None
+        prefix = os.path.join(self.profile_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self.mode}")
+        scope = (f"{self._records_profiled} of {self._records_seen} records (every {self.every})"
+                 if self.every else "whole cycle")
+        header = [f"profile mode={self.mode} scope={scope} wall={duration:.2f}s"]
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            if isinstance(profiler, SamplingProfiler):
+                profiler.close()
+                table = profiler.function_table()
+                collapsed = profiler.collapsed()
+            else:
+                profiler.dump_stats(f"{prefix}.prof")
+                stream = io.StringIO()
+                stats = pstats.Stats(profiler, stream=stream)
+                stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+                table = stream.getvalue().splitlines()
+                collapsed = collapse_pstats(stats)
+            with open(f"{prefix}.txt", "w") as f:
+                f.write("\n".join(header + table) + "\n")
+            with open(f"{prefix}.collapsed", "w") as f:
+                for stack, weight in sorted(collapsed.items()):
+                    f.write(f"{stack} {weight}\n")
+            log.info("🔬 Profile (%s) written to %s.{txt,collapsed}", scope, prefix)
+            return prefix
+        except OSError as e:
+            log.error("❌ Error writing profile: %s", e)
+            return None
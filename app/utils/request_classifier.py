@@ -0,0 +1,147 @@
+"""
+Batch request-state classification
+
+Decides, for every RedcapResponseFirst record of a window in one pass, which
+request it represents. The conditions live in REQUEST_RULES and use the same
+value predicates as utils.validators, so a record gets the same type as
+trying is_first_request, is_second_request_manual_not_received and
+is_second_request_partial_received in turn - without re-extracting details
+or rescanning them for "needs" keys per validator, and without a log line per
+check.
+
+A pandas implementation evaluates each predicate once per distinct value of
+a column instead of once per record. It is opt-in: while details arrive as
+one dict per record, building the DataFrame costs more than the checks it
+vectorizes (see benchmarks/bench_request_classifier.py), so the python
+engine stays the default.
+"""
+
+import importlib.util
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from models.redcap_response_first import RedcapResponseFirst
+from utils.validators import _extract_details, _is_falsy_value, _is_truthy_value, is_truthy_or_checked
+
+# Checked without importing: pandas is only loaded when the pandas engine runs
+PANDAS_AVAILABLE = importlib.util.find_spec("pandas") is not None
+
+PREDICATES = {
+    "checked": is_truthy_or_checked,
+    "truthy": _is_truthy_value,
+    "falsy": _is_falsy_value,
+}
+
+# Derived field: whether any detail key containing "needs" has a truthy value
+NEEDS = "@needs"
+
+# (request_type, ((field, predicate), ...)); the first rule whose conditions all hold wins
+REQUEST_RULES = (
+    ("first_request", (("mr_request", "checked"), ("mr_request_dt", "truthy"), ("mr_request_dt_2", "falsy"))),
+    ("second_request_complete", (("mr_request_2", "checked"), ("mr_request_dt_2", "truthy"), (NEEDS, "falsy"))),
+    ("second_request_partial", (("mr_request_2", "checked"), ("mr_request_dt_2", "truthy"), (NEEDS, "truthy"))),
+)
+
+
+def _has_needs(details: Dict[str, Any]) -> bool:
+    return any("needs" in key and _is_truthy_value(value) for key, value in details.items())
+
+
+def _classify_rows(rows: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """Record-at-a-time evaluation of REQUEST_RULES"""
+    results = []
+    for details in rows:
+        needs = None
+        request_type = None
+        for rule_type, conditions in REQUEST_RULES:
+            for field_name, predicate in conditions:
+                if field_name == NEEDS:
+                    if needs is None:
+                        needs = _has_needs(details)
+                    value = needs
+                else:
+                    value = details.get(field_name)
+                if not PREDICATES[predicate](value):
+                    break
+            else:
+                request_type = rule_type
+                break
+        results.append(request_type)
+    return results
+
+
+def _evaluate_column(column, predicate) -> "np.ndarray":
+    """
+    Apply a predicate to a column, calling it once per distinct value
+
+    Absent keys (NaN in the frame) are evaluated as None, as details.get()
+    would return. parse_details never produces NaN itself.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(column)
+    outcomes = np.array([predicate(value) for value in uniques] + [predicate(None)], dtype=bool)
+    return outcomes[codes]
+
+
+def _classify_frame(rows: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """Columnar evaluation of REQUEST_RULES with pandas"""
+    import numpy as np
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(rows)
+    count = len(rows)
+
+    needs = np.zeros(count, dtype=bool)
+    for name in frame.columns:
+        if "needs" in str(name):
+            needs |= _evaluate_column(frame[name], _is_truthy_value)
+
+    results = np.full(count, None, dtype=object)
+    unmatched = np.ones(count, dtype=bool)
+    for rule_type, conditions in REQUEST_RULES:
+        matches = unmatched.copy()
+        for field_name, predicate in conditions:
+            check = PREDICATES[predicate]
+            if field_name == NEEDS:
+                matches &= np.array([check(False), check(True)])[needs.astype(int)]
+            elif field_name in frame.columns:
+                matches &= _evaluate_column(frame[field_name], check)
+            elif not check(None):
+                matches[:] = False
+        results[matches] = rule_type
+        unmatched &= ~matches
+    return results.tolist()
+
+
+def classify_requests(records: List[RedcapResponseFirst], engine: str = "python") -> List[Optional[str]]:
+    """
+    Classify a window of records by request type
+
+    Args:
+        records: RedcapResponseFirst records with parsed details
+        engine: "python" or "pandas"
+
+    Returns:
+        List[Optional[str]]: Request type per record, in order; None when no
+        rule matches
+
+    Raises:
+        ValueError: If a record's details cannot be extracted
+    """
+    if engine == "pandas" and not PANDAS_AVAILABLE:
+        raise ValueError("pandas engine requested but pandas is not installed")
+    if engine not in ("python", "pandas"):
+        raise ValueError(f"Unknown classifier engine: {engine}")
+
+    rows = [_extract_details(record) for record in records]
+    if not rows:
+        return []
+    return _classify_frame(rows) if engine == "pandas" else _classify_rows(rows)
+
+
+def summarize(request_types: List[Optional[str]]) -> str:
+    """One-line count per request type, e.g. 'first_request=3, none=1'"""
+    counts = Counter(request_type or "none" for request_type in request_types)
+    return ", ".join(f"{request_type}={count}" for request_type, count in sorted(counts.items()))
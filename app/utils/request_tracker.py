@@ -6,10 +6,20 @@ Provides functionality to track and manage SmartRequest IDs
 
 import json
 import os
+import sys
 from datetime import datetime
 from typing import Dict, Optional, List
 from dataclasses import dataclass, asdict
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_lock import FileLock, exclusive
+from utils.logger import configure_logging, get_logger
+from utils.timing import time_stage
+
+log = get_logger(__name__)
+
 
 @dataclass
 class RequestRecord:
@@ -22,6 +32,7 @@ class RequestRecord:
     updated_at: str
     patient_name: Optional[str] = None
     facility_name: Optional[str] = None
+    documents: Optional[Dict[str, dict]] = None  # document type -> {path, sha256, bytes, downloaded_at}
     
     def to_dict(self) -> dict:
         return asdict(self)
@@ -36,7 +47,9 @@ class SmartRequestTracker:
     
     def __init__(self, storage_file: str = "logs/smartrequest_tracker.json"):
         self.storage_file = storage_file
-        self._ensure_storage_dir()
+        # Held around every read-modify-write: main.py, the dashboards and
+        # download_documents.py update the same file from separate processes
+        self._lock = FileLock(f"{storage_file}.lock")
         
     def _ensure_storage_dir(self):
         """Ensure the storage directory exists"""
@@ -51,17 +64,22 @@ class SmartRequestTracker:
             with open(self.storage_file, 'r') as f:
                 return json.load(f)
         except (json.JSONDecodeError, IOError) as e:
-            print(f"⚠️ Error loading request tracker data: {e}")
+            log.warning("⚠️ Error loading request tracker data: %s", e)
             return {}
     
     def _save_records(self, records: Dict[str, dict]):
-        """Save records to storage"""
+        """Save records to storage (replaced atomically, so readers never see a partial file)"""
         try:
-            with open(self.storage_file, 'w') as f:
-                json.dump(records, f, indent=2, default=str)
+            with time_stage("tracker_write"):
+                self._ensure_storage_dir()
+                tmp_file = f"{self.storage_file}.{os.getpid()}.tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump(records, f, indent=2, default=str)
+                os.replace(tmp_file, self.storage_file)
         except IOError as e:
-            print(f"❌ Error saving request tracker data: {e}")
+            log.error("❌ Error saving request tracker data: %s", e)
     
+    @exclusive
     def add_request(
         self, 
         request_id: str, 
@@ -101,13 +119,14 @@ class SmartRequestTracker:
             records[request_id] = record.to_dict()
             self._save_records(records)
             
-            print(f"📝 Added request tracking: {request_id} -> {record_id}")
+            log.info("📝 Added request tracking: %s -> %s", request_id, record_id)
             return True
             
         except Exception as e:
-            print(f"❌ Error adding request to tracker: {e}")
+            log.error("❌ Error adding request to tracker: %s", e)
             return False
     
+    @exclusive
     def update_request_status(self, request_id: str, status: str) -> bool:
         """
         Update the status of a tracked request
@@ -123,7 +142,7 @@ class SmartRequestTracker:
             records = self._load_records()
             
             if request_id not in records:
-                print(f"⚠️ Request ID {request_id} not found in tracker")
+                log.warning("⚠️ Request ID %s not found in tracker", request_id)
                 return False
             
             records[request_id]['status'] = status
@@ -131,11 +150,53 @@ class SmartRequestTracker:
             
             self._save_records(records)
             
-            print(f"📝 Updated request {request_id} status to: {status}")
+            log.info("📝 Updated request %s status to: %s", request_id, status)
+            return True
+            
+        except Exception as e:
+            log.error("❌ Error updating request status: %s", e)
+            return False
+    
+    @exclusive
+    def record_download(self, request_id: str, document_type: str, path: str,
+                        sha256: str, size: int) -> bool:
+        """
+        Record a downloaded document of a tracked request
+        
+        Args:
+            request_id: SmartRequest API request ID
+            document_type: Document type (MEDICAL_RECORD, REQUEST_LETTER, INVOICE, ...)
+            path: Where the document was stored
+            sha256: Hex SHA-256 of the file
+            size: File size in bytes
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            records = self._load_records()
+            
+            if request_id not in records:
+                log.warning("⚠️ Request ID %s not found in tracker", request_id)
+                return False
+            
+            documents = records[request_id].get('documents') or {}
+            documents[document_type] = {
+                "path": path,
+                "sha256": sha256,
+                "bytes": size,
+                "downloaded_at": datetime.now().isoformat()
+            }
+            records[request_id]['documents'] = documents
+            records[request_id]['updated_at'] = datetime.now().isoformat()
+            
+            self._save_records(records)
+            
+            log.info("📥 Recorded %s download for request %s: %s", document_type, request_id, path)
             return True
             
         except Exception as e:
-            print(f"❌ Error updating request status: {e}")
+            log.error("❌ Error recording download: %s", e)
             return False
     
     def get_request(self, request_id: str) -> Optional[RequestRecord]:
@@ -157,7 +218,7 @@ class SmartRequestTracker:
             return RequestRecord.from_dict(records[request_id])
             
         except Exception as e:
-            print(f"❌ Error getting request: {e}")
+            log.error("❌ Error getting request: %s", e)
             return None
     
     def get_requests_by_record_id(self, record_id: str) -> List[RequestRecord]:
@@ -181,7 +242,7 @@ class SmartRequestTracker:
             return matches
             
         except Exception as e:
-            print(f"❌ Error getting requests by record ID: {e}")
+            log.error("❌ Error getting requests by record ID: %s", e)
             return []
     
     def list_all_requests(self) -> List[RequestRecord]:
@@ -196,7 +257,7 @@ class SmartRequestTracker:
             return [RequestRecord.from_dict(data) for data in records.values()]
             
         except Exception as e:
-            print(f"❌ Error listing all requests: {e}")
+            log.error("❌ Error listing all requests: %s", e)
             return []
     
     def get_requests_by_status(self, status: str) -> List[RequestRecord]:
@@ -220,9 +281,10 @@ class SmartRequestTracker:
             return matches
             
         except Exception as e:
-            print(f"❌ Error getting requests by status: {e}")
+            log.error("❌ Error getting requests by status: %s", e)
             return []
     
+    @exclusive
     def remove_request(self, request_id: str) -> bool:
         """
         Remove a request from tracking
@@ -239,14 +301,14 @@ class SmartRequestTracker:
             if request_id in records:
                 del records[request_id]
                 self._save_records(records)
-                print(f"🗑️ Removed request tracking: {request_id}")
+                log.info("🗑️ Removed request tracking: %s", request_id)
                 return True
             else:
-                print(f"⚠️ Request ID {request_id} not found in tracker")
+                log.warning("⚠️ Request ID %s not found in tracker", request_id)
                 return False
                 
         except Exception as e:
-            print(f"❌ Error removing request: {e}")
+            log.error("❌ Error removing request: %s", e)
             return False
 
 
@@ -295,6 +357,7 @@ def update_smartrequest_status(request_id: str, status: str) -> bool:
 
 if __name__ == "__main__":
     """Command line interface for request tracking"""
+    configure_logging()
     import sys
     
     if len(sys.argv) < 2:
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+"""
+Cycle Scheduler
+Interval and cron-expression schedules, a cross-process cycle lock and a
+loop that runs a job on schedule until asked to stop
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_lock import lock_handle, unlock_handle
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> Set[int]:
+    """Expand one cron field ('*', '5', '1-5', '*/15', '0-30/10', '1,15') into its values"""
+    values: Set[int] = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            step = int(step_str)
+            if step < 1:
+                raise ValueError(f"Invalid cron step: {field}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_str, end_str = part.split("-", 1)
+            start, end = int(start_str), int(end_str)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field out of range {low}-{high}: {field}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Standard 5-field cron expression: minute hour day-of-month month day-of-week"""
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        self.expression = expression
+        self.minutes = _parse_cron_field(parts[0], 0, 59)
+        self.hours = _parse_cron_field(parts[1], 0, 23)
+        self.days = _parse_cron_field(parts[2], 1, 31)
+        self.months = _parse_cron_field(parts[3], 1, 12)
+        # Cron counts Sunday as 0 (and 7); Python's weekday() counts Monday as 0
+        self.weekdays = {(d - 1) % 7 for d in _parse_cron_field(parts[4], 0, 7)}
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = moment.weekday() in self.weekdays
+        # Like cron: when both day fields are restricted, either one may match
+        if not self._any_day and not self._any_weekday:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Four years covers every valid expression (Feb 29 included)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+    def __str__(self) -> str:
+        return f"cron '{self.expression}'"
+
+
+class IntervalSchedule:
+    """Fixed delay between the starts of consecutive cycles"""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+
+    def next_after(self, moment: datetime) -> datetime:
+        return moment + timedelta(seconds=self.seconds)
+
+    def __str__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+class CycleLock:
+    """
+    Exclusive lock on a file, held for the length of one cycle
+
+    Uses an OS-level lock, so it is released automatically if the process
+    dies, and it also keeps a cron-started run from overlapping the daemon.
+    """
+
+    def __init__(self, lock_file: str = "logs/main.lock"):
+        self.lock_file = lock_file
+        self._handle = None
+
+    def acquire(self) -> bool:
+        """Try to take the lock without waiting"""
+        os.makedirs(os.path.dirname(self.lock_file) or ".", exist_ok=True)
+        handle = open(self.lock_file, "a+")
+        try:
+            lock_handle(handle, blocking=False)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._handle = handle
+        return True
+
+    def release(self):
+        if self._handle is None:
+            return
+        try:
+            unlock_handle(self._handle)
+        finally:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def run_scheduled(job: Callable[[], None], schedule, stop_event: threading.Event,
+                  lock: Optional[CycleLock] = None, run_immediately: bool = True):
+    """
+    Run job on schedule until stop_event is set
+
+    A cycle that is still running when the next one is due simply delays it;
+    cycles never overlap, and with a lock they never overlap another process.
+
+    Args:
+        job: One processing cycle
+        schedule: CronSchedule or IntervalSchedule
+        stop_event: Set (e.g. from a SIGTERM handler) to stop after the current cycle
+        lock: Optional cross-process lock taken around each cycle
+        run_immediately: Run a cycle at startup instead of waiting for the first slot
+    """
+    next_run = datetime.now() if run_immediately else schedule.next_after(datetime.now())
+    while not stop_event.is_set():
+        delay = (next_run - datetime.now()).total_seconds()
+        if delay > 0 and stop_event.wait(delay):
+            break
+
+        started = datetime.now()
+        if lock is not None and not lock.acquire():
+            log.info("⏳ Previous cycle still running (lock %s), skipping this slot", lock.lock_file)
+        else:
+            try:
+                job()
+            except Exception as e:
+                log.error("❌ Cycle failed: %s", e)
+            finally:
+                if lock is not None:
+                    lock.release()
+
+        next_run = schedule.next_after(started)
+        if next_run <= datetime.now():
+            # The cycle overran its slot: start the next one from now
+            next_run = schedule.next_after(datetime.now())
+        log.info("💤 Next cycle at %s (%s)", next_run.strftime('%Y-%m-%d %H:%M:%S'), schedule)
+
+
+def upcoming(schedule, count: int = 5, start: Optional[datetime] = None) -> List[datetime]:
+    """The next few run times, for checking an expression"""
+    moment = start or datetime.now()
+    runs = []
+    for _ in range(count):
+        moment = schedule.next_after(moment)
+        runs.append(moment)
+    return runs
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python scheduler.py '<cron expression>'")
+        sys.exit(1)
+    for run in upcoming(CronSchedule(sys.argv[1])):
+        print(f"🕒 {run.strftime('%Y-%m-%d %H:%M (%a)')}")
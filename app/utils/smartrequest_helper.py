@@ -13,6 +13,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from services.smartrequest_service import SmartRequestService
 from services.external_api_service import get_smartrequest_status, get_smartrequest_download_url, cancel_smartrequest
+from utils.logger import configure_logging
 
 
 def validate_smartrequest_config() -> bool:
@@ -186,6 +187,7 @@ def get_request_reasons_for_company(company_id: int) -> List[Dict[str, Any]]:
 
 if __name__ == "__main__":
     """Command line interface for SmartRequest utilities"""
+    configure_logging()
     if len(sys.argv) < 2:
         print("Usage: python smartrequest_helper.py <command> [args...]")
         print("Commands:")
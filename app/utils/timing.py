@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+Per-stage timing for the processing hot path
+
+Wrap a stage in time_stage("fill_template") to record its duration in that
+stage's histogram. Inside record_timing() the durations are also summed per
+record, so each tracked document gets its own stage breakdown. At the end of
+a run the p50/p95/p99 summary is logged and appended to
+logs/run_summaries.jsonl.
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Bucket upper bounds in seconds, 1 ms to 2 min
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+RUN_SUMMARY_FILE = "logs/run_summaries.jsonl"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles are interpolated within a bucket"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.bucket_counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate the q-quantile (0..1)
+
+        Returns:
+            float: Estimated value in seconds, within [min, max]; None if empty
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.bucket_counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(estimate, self.min), self.max)
+            seen += bucket_count
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class RecordTimings:
+    """Stage durations of one record, summed when a stage runs more than once"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        self.total: Optional[float] = None
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+_current_record: contextvars.ContextVar[Optional[RecordTimings]] = contextvars.ContextVar(
+    "current_record_timings", default=None)
+
+
+class StageTimings:
+    """Histogram per stage, shared by every thread of the process"""
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, float], None]] = []
+        self.started_at = datetime.now()
+
+    def add_listener(self, listener: Callable[[str, float], None]):
+        """Also pass every observation to listener(stage, seconds), e.g. the metrics registry"""
+        self._listeners.append(listener)
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+        current = _current_record.get()
+        if current is not None:
+            current.add(stage, seconds)
+        for listener in self._listeners:
+            listener(stage, seconds)
+
+    def __len__(self) -> int:
+        return len(self._histograms)
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {stage: histogram.to_dict() for stage, histogram in sorted(self._histograms.items())}
+
+    def format_summary(self) -> List[str]:
+        """Table lines: stage, count, p50/p95/p99 and max in milliseconds"""
+        lines = [f"{'stage':<18} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for stage, stats in self.summary().items():
+            lines.append(f"{stage:<18} {stats['count']:>6} " + " ".join(
+                f"{stats[key] * 1000:>9.1f}" for key in ("p50", "p95", "p99", "max")))
+        return lines
+
+    def write_summary(self, path: str = RUN_SUMMARY_FILE, **extra) -> dict:
+        """Append this run's summary as one JSON line"""
+        entry = {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            **extra,
+            "stages": self.summary(),
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self.started_at = datetime.now()
+
+
+# Global stage timings instance
+stage_timings = StageTimings()
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """Time the enclosed block as one observation of stage (also when it raises)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_timings.observe(stage, time.perf_counter() - started)
+
+
+@contextmanager
+def record_timing(timings: Optional[RecordTimings] = None) -> Iterator[RecordTimings]:
+    """
+    Collect the stages timed in this block (same thread) for one record
+
+    Pass the record's timings to add to them later, e.g. when its PDF render
+    finishes on a worker process after the record's own block has ended.
+    """
+    timings = timings or RecordTimings()
+    token = _current_record.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_record.reset(token)
+        timings.total = time.perf_counter() - timings.started
+
+
+if __name__ == "__main__":
+    # Print the most recent run summaries
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    if not os.path.exists(RUN_SUMMARY_FILE):
+        print(f"⚠️ No run summaries yet ({RUN_SUMMARY_FILE})")
+    else:
+        with open(RUN_SUMMARY_FILE) as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        for entry in entries[-count:]:
+            print(f"📊 Run {entry['started_at']} -> {entry['finished_at']}"
+                  f" ({entry.get('documents', '?')} documents)")
+            for stage, stats in entry["stages"].items():
+                print(f"   {stage:<18} n={stats['count']:<5} p50={stats['p50'] * 1000:.1f}ms "
+                      f"p95={stats['p95'] * 1000:.1f}ms p99={stats['p99'] * 1000:.1f}ms")
@@ -1,9 +1,8 @@
 from typing import Dict, Any, Optional, Union
-#import logging
 from models.redcap_response_first import RedcapResponseFirst
+from utils.logger import get_logger
 
-#logger = logging.getLogger(__name__)
-#logger.setLevel(logging.DEBUG)
+log = get_logger(__name__)
 
 def _extract_details(data: RedcapResponseFirst) -> Dict[str, Any]:
     """
@@ -27,7 +26,7 @@ def _extract_details(data: RedcapResponseFirst) -> Dict[str, Any]:
             # Fallback - try to convert to dict if it's a different type
             return dict(data.details) if data.details else {}
     except Exception as e:
-        print(f"❌ Failed to extract details from data object: {e}")
+        log.error("❌ Failed to extract details from data object: %s", e)
         raise ValueError(f"Invalid details format in data object: {e}")
 
 def _is_truthy_value(value: Any) -> bool:
@@ -87,15 +86,13 @@ def is_first_request(data: RedcapResponseFirst) -> bool:
         
         result = mr_request_valid and mr_request_dt_valid and mr_request_dt_2_empty
         
-        print(f"ℹ️ is_first_request: mr_request={details.get('mr_request')}, "
-                    f"mr_request_dt={details.get('mr_request_dt')}, "
-                    f"mr_request_dt_2={details.get('mr_request_dt_2')}, "
-                    f"result={result}")
+        log.debug("ℹ️ is_first_request: mr_request=%s, mr_request_dt=%s, mr_request_dt_2=%s, result=%s",
+                  details.get('mr_request'), details.get('mr_request_dt'), details.get('mr_request_dt_2'), result)
         
         return result
         
     except Exception as e:
-        print(f"❌ Error in is_first_request: {e}")
+        log.error("❌ Error in is_first_request: %s", e)
         raise ValueError(f"Failed to validate first request: {e}")
 
 def is_second_request_manual_not_received(data: RedcapResponseFirst) -> bool:
@@ -122,15 +119,14 @@ def is_second_request_manual_not_received(data: RedcapResponseFirst) -> bool:
         mr_needs_valid = has_medical_record_needs(data)
         result = mr_request_2_valid and mr_request_dt_2_valid and not mr_needs_valid 
         
-        print(f"ℹ️ is_second_request_manual_not_received: mr_request_2={details.get('mr_request_2')}, "
-                    f"mr_request_dt_2={details.get('mr_request_dt_2')}, "
-                    f"mr_received={details.get('mr_received')}, "
-                    f"result={result}")
+        log.debug("ℹ️ is_second_request_manual_not_received: mr_request_2=%s, mr_request_dt_2=%s, "
+                  "mr_received=%s, result=%s",
+                  details.get('mr_request_2'), details.get('mr_request_dt_2'), details.get('mr_received'), result)
         
         return result
         
     except Exception as e:
-        print(f"❌ Error in is_second_request_manual_not_received: {e}")
+        log.error("❌ Error in is_second_request_manual_not_received: %s", e)
         raise ValueError(f"Failed to validate second request manual not received: {e}")
 
 def is_second_request_partial_received(data: RedcapResponseFirst) -> bool:
@@ -164,14 +160,14 @@ def is_second_request_partial_received(data: RedcapResponseFirst) -> bool:
         mr_needs_valid = has_medical_record_needs(data)
         result = (mr_request_2_valid and mr_request_dt_2_valid and mr_needs_valid)
         
-        print(f"ℹ️ is_second_request_partial_received: mr_request_2={details.get('mr_request_2')}, "
-                    f"mr_request_dt_2={details.get('mr_request_dt_2')}, "
-                    f"has_medical_record_needs={mr_needs_valid}")
+        log.debug("ℹ️ is_second_request_partial_received: mr_request_2=%s, mr_request_dt_2=%s, "
+                  "has_medical_record_needs=%s",
+                  details.get('mr_request_2'), details.get('mr_request_dt_2'), mr_needs_valid)
         
         return result
         
     except Exception as e:
-        print(f"❌ Error in is_second_request_partial_received: {e}")
+        log.error("❌ Error in is_second_request_partial_received: %s", e)
         raise ValueError(f"Failed to validate second request partial received: {e}")
 
 def is_all_records_received(data: RedcapResponseFirst) -> bool:
@@ -199,14 +195,13 @@ def is_all_records_received(data: RedcapResponseFirst) -> bool:
         
         result = mr_received_valid and mr_rec_all_complete
         
-        print(f"ℹ️ is_all_records_received: mr_received={details.get('mr_received')}, "
-                    f"mr_rec_all={details.get('mr_rec_all')}, "
-                    f"result={result}")
+        log.debug("ℹ️ is_all_records_received: mr_received=%s, mr_rec_all=%s, result=%s",
+                  details.get('mr_received'), details.get('mr_rec_all'), result)
         
         return result
         
     except Exception as e:
-        print(f"❌ Error in is_all_records_received: {e}")
+        log.error("❌ Error in is_all_records_received: %s", e)
         raise ValueError(f"Failed to validate all records received: {e}")
 
 def get_request_status(data: RedcapResponseFirst) -> str:
@@ -231,7 +226,7 @@ def get_request_status(data: RedcapResponseFirst) -> str:
         else:
             return "Unknown status"
     except Exception as e:
-        print(f"❌ Error getting request status: {e}")
+        log.error("❌ Error getting request status: %s", e)
         return "Error determining status"
 
 # Validation function to check data integrity
@@ -273,7 +268,7 @@ def validate_data_integrity(data: RedcapResponseFirst) -> Dict[str, Any]:
         }
         
     except Exception as e:
-        print(f"❌ Error validating data integrity: {e}")
+        log.error("❌ Error validating data integrity: %s", e)
         return {
             "valid": False,
             "error": str(e),
@@ -331,11 +326,10 @@ def has_medical_record_needs(data: RedcapResponseFirst) -> bool:
                     has_needs = True
                     active_needs.append(field_name)
         
-        print(f"ℹ️ has_medical_record_needs: active_needs={active_needs}, "
-              f"result={has_needs}")
+        log.debug("ℹ️ has_medical_record_needs: active_needs=%s, result=%s", active_needs, has_needs)
         
         return has_needs
         
     except Exception as e:
-        print(f"❌ Error in has_medical_record_needs: {e}")
+        log.error("❌ Error in has_medical_record_needs: %s", e)
         raise ValueError(f"Failed to validate medical record needs: {e}")
\ No newline at end of file
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Import-time benchmark of the CLI and dashboard entry points.
+
+Each module is imported in a fresh interpreter with `python -X importtime`;
+the best cumulative time of --runs runs is reported together with the
+imports that cost the most on their own (self time), which is where to look
+when start-up gets slow again.
+
+Usage:
+    python benchmarks/bench_import_time.py [--runs=5] [--top=8]
+        [--modules=main,simple_dashboard,dashboard_server,utils.smartrequest_helper,outbox_drainer]
+"""
+
+import os
+import subprocess
+import sys
+
+# Add app directory to path
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.insert(0, APP_DIR)
+
+from services.external_api_service import parse_arg
+
+DEFAULT_MODULES = "main,simple_dashboard,dashboard_server,utils.smartrequest_helper,outbox_drainer"
+
+
+def import_times(module: str) -> list:
+    """
+    One -X importtime run of `import module`
+
+    Returns:
+        list: (self microseconds, cumulative microseconds, imported name) per import
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=APP_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        times.append((int(self_us), int(cumulative_us), name.strip()))
+    return times
+
+
+def bench_module(module: str, runs: int) -> dict:
+    best_total, best_times = None, []
+    for _ in range(runs):
+        times = import_times(module)
+        total = next(cumulative for _, cumulative, name in reversed(times) if name == module)
+        if best_total is None or total < best_total:
+            best_total, best_times = total, times
+    return {"module": module, "total_ms": best_total / 1000,
+            "heaviest": sorted(best_times, reverse=True)}
+
+
+if __name__ == "__main__":
+    runs = int(parse_arg("runs", "5"))
+    top = int(parse_arg("top", "8"))
+    modules = [m for m in parse_arg("modules", DEFAULT_MODULES).split(",") if m.strip()]
+
+    print(f"⏱️ Import time, best of {runs} runs")
+    for module in modules:
+        result = bench_module(module, runs)
+        print(f"\n📦 {module}: {result['total_ms']:.0f} ms")
+        for self_us, cumulative_us, name in result["heaviest"][:top]:
+            print(f"   {self_us / 1000:>7.1f} ms self {cumulative_us / 1000:>8.1f} ms total  {name}")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Benchmark for get_latest_records on synthetic REDCap logs where busy
+records have many log lines. Compares the original reduction (strptime and
+parse_details for every entry that wins at the time) with the current one
+(winners chosen on raw timestamps, details parsed once per winner).
+
+Usage:
+    python benchmarks/bench_latest_records.py [--entries=50000] [--records=500]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from fake_responses import generate_fake_log_responses
+from utils.filters import get_latest_records, parse_details
+
+
+def legacy_get_latest_records(records):
+    """get_latest_records as it was before winners were picked on raw strings"""
+    latest_records = {}
+    for rec in records:
+        record_id = rec.get("record")
+        timestamp = datetime.strptime(rec.get("timestamp"), "%Y-%m-%d %H:%M")
+        if record_id not in latest_records or timestamp > latest_records[record_id]['timestamp']:
+            rec_copy = rec.copy()
+            rec_copy['timestamp'] = timestamp
+            parsed_details = parse_details(rec.get('details', ''))
+            for key, value in parsed_details.items():
+                if value is None:
+                    parsed_details[key] = "0"
+                if value == "checked":
+                    parsed_details[key] = "1"
+                if value == "unchecked":
+                    parsed_details[key] = "0"
+            rec_copy['details'] = parsed_details
+            latest_records[record_id] = rec_copy
+    for rec in latest_records.values():
+        rec['timestamp'] = rec['timestamp'].strftime("%Y-%m-%d %H:%M")
+    return list(latest_records.values())
+
+
+def best_time(func, entries, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(entries)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    entry_count, record_count = 50000, 500
+    for arg in sys.argv[1:]:
+        if arg.startswith("--entries="):
+            entry_count = int(arg.split("=", 1)[1])
+        elif arg.startswith("--records="):
+            record_count = int(arg.split("=", 1)[1])
+
+    entries = generate_fake_log_responses(entry_count, record_count, seed=42)
+    # REDCap exports the log newest first
+    entries.sort(key=lambda e: e["timestamp"], reverse=True)
+
+    key = lambda rec: rec["record"]
+    assert sorted(get_latest_records(entries), key=key) == sorted(legacy_get_latest_records(entries), key=key)
+
+    print(f"📊 get_latest_records: {entry_count} log entries over {record_count} records (identical output verified)")
+    for order, data in (("newest first", entries), ("oldest first", entries[::-1])):
+        legacy = best_time(legacy_get_latest_records, data)
+        current = best_time(get_latest_records, data)
+        print(f"   {order:<13} legacy {entry_count / legacy:>10,.0f} entries/s   "
+              f"current {entry_count / current:>10,.0f} entries/s   ({legacy / current:.1f}x)")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+End-to-end benchmark of app/main.py in local mode on synthetic REDCap windows.
+
+For each window size a log export (generate_fake_log_responses) and matching
+record export (generate_fake_detail_rows, the rows behind
+generate_fake_detail_record) are written to a scratch directory, and one
+`main.py --once` run processes them there with SmartRequestFaker standing in
+for the Datavant API. Reported per size: records and documents per second,
+per-stage p50/p95/p99 (from the run's logs/run_summaries.jsonl) and the peak
+RSS of the run. Documents are the PDFs the dashboard tracker recorded as
+generated; a run in which any PDF failed (or main.py exited non-zero) is
+marked invalid, and the benchmark then exits with status 1. Results are saved
+as JSON; pass --compare to diff against an earlier result file.
+
+The scratch directory keeps the runs away from the real logs/ and output/, so
+the log cursor and processing ledger start empty every time.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--sizes=100,1000,10000] [--seed=42]
+        [--entries_per_record=2] [--output=logs/benchmarks/pipeline_<time>.json]
+        [--compare=<earlier result>.json] [--keep]
+"""
+
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Add app directory to path
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'app'))
+
+from fake_responses import generate_fake_detail_rows, generate_fake_log_record, generate_fake_log_responses
+from services.external_api_service import LOG_SAMPLE_FILE_ENV, RECORD_SAMPLE_FILE_ENV, parse_arg
+
+DEFAULT_SIZES = "100,1000,10000"
+
+
+def write_window(directory: str, record_count: int, entries_per_record: int, seed: int):
+    """Synthetic log and record exports for record_count records"""
+    entries = generate_fake_log_responses(record_count * entries_per_record, record_count, seed=seed)
+    # Every record of the window has at least one entry
+    rng = random.Random(seed)
+    missing = {f"TNSC{i:09d}" for i in range(record_count)} - {entry["record"] for entry in entries}
+    entries += [generate_fake_log_record(record_id, rng=rng) for record_id in sorted(missing)]
+    # REDCap exports the log newest first
+    entries.sort(key=lambda e: e["timestamp"], reverse=True)
+    record_ids = sorted({entry["record"] for entry in entries})
+    rows = [row for record_id in record_ids for row in generate_fake_detail_rows(record_id)]
+
+    log_path = os.path.join(directory, "response_1_sample.json")
+    record_path = os.path.join(directory, "response_2_sample.json")
+    with open(log_path, "w") as f:
+        json.dump(entries, f)
+    with open(record_path, "w") as f:
+        json.dump(rows, f)
+    return log_path, record_path, len(entries), len(record_ids)
+
+
+def run_pipeline(workdir: str, log_path: str, record_path: str):
+    """
+    One main.py run inside workdir
+
+    Returns:
+        tuple: (exit code, wall seconds, peak RSS in MB or None)
+    """
+    env = dict(os.environ, ENV="local", PDF_THROTTLE_SECONDS="0",
+               SMTP_SERVER="127.0.0.1", SMTP_PORT="1",  # refused at once: emails go to the outbox
+               **{LOG_SAMPLE_FILE_ENV: log_path, RECORD_SAMPLE_FILE_ENV: record_path})
+    command = [sys.executable, os.path.join(REPO_ROOT, "app", "main.py"), "--once"]
+    with open(os.path.join(workdir, "main_output.log"), "w") as output:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=workdir, env=env, stdout=output, stderr=subprocess.STDOUT)
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(process.pid, 0)
+            wall = time.perf_counter() - started
+            process.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is in KB on Linux, bytes on macOS
+            peak_rss = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+        else:
+            process.wait()
+            wall = time.perf_counter() - started
+            peak_rss = None
+    return process.returncode, wall, peak_rss
+
+
+def read_run_summary(workdir: str) -> dict:
+    path = os.path.join(workdir, "logs", "run_summaries.jsonl")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else {}
+
+
+def read_pdf_outcomes(workdir: str) -> tuple:
+    """
+    PDFs generated and failed in the run, from the dashboard tracker's pdf_status
+
+    Returns:
+        tuple: (generated, failed)
+    """
+    path = os.path.join(workdir, "logs", "dashboard_tracking.json")
+    if not os.path.exists(path):
+        return 0, 0
+    with open(path) as f:
+        statuses = [record.get("pdf_status") for record in json.load(f).values()]
+    return statuses.count("success"), statuses.count("error")
+
+
+def bench_size(record_count: int, entries_per_record: int, seed: int, keep: bool) -> dict:
+    workdir = tempfile.mkdtemp(prefix=f"bench_pipeline_{record_count}_")
+    try:
+        # Templates are looked up relative to the working directory
+        os.symlink(os.path.join(REPO_ROOT, "assets"), os.path.join(workdir, "assets"))
+        started = time.perf_counter()
+        log_path, record_path, entry_count, record_count = write_window(
+            workdir, record_count, entries_per_record, seed)
+        generate_seconds = time.perf_counter() - started
+
+        exit_code, wall, peak_rss = run_pipeline(workdir, log_path, record_path)
+        summary = read_run_summary(workdir)
+        documents, failed = read_pdf_outcomes(workdir)
+        return {
+            "records": record_count,
+            "log_entries": entry_count,
+            "documents": documents,
+            "documents_failed": failed,
+            "exit_code": exit_code,
+            "valid": exit_code == 0 and failed == 0 and documents > 0,
+            "generate_seconds": round(generate_seconds, 3),
+            "wall_seconds": round(wall, 3),
+            "records_per_second": round(record_count / wall, 3) if wall else None,
+            "documents_per_second": round(documents / wall, 3) if wall else None,
+            "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+            "stages": summary.get("stages", {}),
+            "workdir": workdir if keep else None,
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_result(result: dict):
+    rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/a"
+    print(f"📊 {result['records']} records ({result['log_entries']} log entries): "
+          f"{result['records_per_second']:,.2f} records/s, {result['documents']} documents in "
+          f"{result['wall_seconds']:.1f}s, peak RSS {rss}"
+          + (f"  ⚠️ exit code {result['exit_code']}" if result["exit_code"] else ""))
+    if not result["valid"]:
+        print(f"   ❌ Invalid run: {result['documents_failed']} PDFs failed, {result['documents']} generated")
+    print(f"   {'stage':<18} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage, stats in result["stages"].items():
+        print(f"   {stage:<18} {stats['count']:>7} " + " ".join(
+            f"{stats[key] * 1000:>9.1f}" for key in ("p50", "p95", "p99")))
+    if result["workdir"]:
+        print(f"   kept {result['workdir']}")
+
+
+def print_comparison(results: list, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = {entry["records"]: entry for entry in json.load(f)["results"]}
+    print(f"\n🔁 Compared with {baseline_path}")
+    for result in results:
+        before = baseline.get(result["records"])
+        if not result["valid"] or (before and before.get("valid") is False):
+            print(f"   {result['records']:>6} records: skipped, invalid run")
+            continue
+        if not before or not before.get("records_per_second") or not result["records_per_second"]:
+            print(f"   {result['records']:>6} records: no baseline")
+            continue
+        speedup = result["records_per_second"] / before["records_per_second"]
+        print(f"   {result['records']:>6} records: {before['records_per_second']:,.2f} -> "
+              f"{result['records_per_second']:,.2f} records/s ({speedup:.2f}x)")
+        for stage, stats in result["stages"].items():
+            old = before.get("stages", {}).get(stage)
+            if old and old.get("p50") and stats.get("p50"):
+                print(f"          {stage:<18} p50 {old['p50'] * 1000:>9.1f} -> {stats['p50'] * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in parse_arg("sizes", DEFAULT_SIZES).split(",") if size.strip()]
+    seed = int(parse_arg("seed", "42"))
+    entries_per_record = int(parse_arg("entries_per_record", "2"))
+    output_path = parse_arg("output", os.path.join(
+        "logs", "benchmarks", f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"))
+    baseline_path = parse_arg("compare", None)
+    keep = "--keep" in sys.argv
+
+    print(f"🚀 Pipeline benchmark: windows of {', '.join(map(str, sizes))} records")
+    results = []
+    for size in sizes:
+        result = bench_size(size, entries_per_record, seed, keep)
+        print_result(result)
+        results.append(result)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "entries_per_record": entries_per_record,
+            "results": results,
+        }, f, indent=2)
+    print(f"💾 Results saved to {output_path}")
+
+    if baseline_path:
+        print_comparison(results, baseline_path)
+
+    invalid = [result["records"] for result in results if not result["valid"]]
+    if invalid:
+        print(f"❌ Invalid results (PDF failures or errors) for {', '.join(map(str, invalid))} records")
+        sys.exit(1)
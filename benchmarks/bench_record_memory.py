@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Memory benchmark for the REDCap record models: bytes per instance held in a
+batch, for the slotted models and for an otherwise identical copy with a
+per-instance __dict__ (how they were declared before). Field values are
+shared between both runs, so the difference is the per-record overhead.
+
+Usage:
+    python benchmarks/bench_record_memory.py [--records=5000]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field, fields
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from fake_responses import generate_fake_detail_record, generate_fake_log_responses
+from models.redcap_response_first import RedcapResponseFirst
+from models.redcap_response_second import RedcapResponseSecond
+from utils.filters import get_latest_records
+
+
+def unslotted_copy(model_class):
+    """Same fields, defaults and methods as model_class, without __slots__"""
+    namespace = {"__annotations__": dict(model_class.__annotations__)}
+    for f in fields(model_class):
+        namespace[f.name] = field(default=f.default, metadata=f.metadata)
+    for name in ("__post_init__", "to_dict"):
+        if hasattr(model_class, name):
+            namespace[name] = getattr(model_class, name)
+    return dataclass(type(f"Legacy{model_class.__name__}", (), namespace))
+
+
+def bytes_per_record(model_class, rows) -> float:
+    tracemalloc.start()
+    batch = [model_class(**row) for row in rows]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del batch
+    return allocated / len(rows)
+
+
+def best_time(model_class, rows, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for row in rows:
+            model_class(**row)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    record_count = 5000
+    for arg in sys.argv[1:]:
+        if arg.startswith("--records="):
+            record_count = int(arg.split("=", 1)[1])
+
+    # Faker is slow; a few hundred distinct records are repeated to fill the batch
+    samples = generate_fake_detail_record("P000000001", count=min(record_count, 200))
+    second_rows = [{f.name: getattr(rec, f.name) for f in fields(RedcapResponseSecond)} for rec in samples]
+    second_rows = (second_rows * (record_count // len(second_rows) + 1))[:record_count]
+    first_rows = get_latest_records(generate_fake_log_responses(record_count, record_count, seed=42))
+
+    print(f"📊 Record model memory over {record_count} records held in one batch")
+    for model_class, rows in ((RedcapResponseSecond, second_rows), (RedcapResponseFirst, first_rows)):
+        legacy_class = unslotted_copy(model_class)
+        for row in rows[:50]:
+            assert legacy_class(**row).to_dict() == model_class(**row).to_dict()
+
+        legacy_bytes = bytes_per_record(legacy_class, rows)
+        current_bytes = bytes_per_record(model_class, rows)
+        legacy_time = best_time(legacy_class, rows)
+        current_time = best_time(model_class, rows)
+        print(f"   {model_class.__name__:<22} __dict__ {legacy_bytes:>8,.0f} B/record   "
+              f"slots {current_bytes:>8,.0f} B/record   ({legacy_bytes / current_bytes:.1f}x less)   "
+              f"build {len(rows) / legacy_time:>9,.0f} -> {len(rows) / current_time:>9,.0f} records/s")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Benchmark for request-type classification of a window of records: the
+per-record validator chain main.py used to run, against the batch
+classifier's python and pandas engines.
+
+Usage:
+    python benchmarks/bench_request_classifier.py [--records=20000]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from fake_responses import generate_fake_log_responses
+from models.redcap_response_first import RedcapResponseFirst
+from utils.filters import filter_records, get_latest_records
+from utils.request_classifier import PANDAS_AVAILABLE, classify_requests
+from utils.validators import (is_first_request, is_second_request_manual_not_received,
+                              is_second_request_partial_received)
+
+
+def legacy_classify(records):
+    """One validator call after another per record, each printing its checks"""
+    validators = (
+        ("first_request", is_first_request),
+        ("second_request_complete", is_second_request_manual_not_received),
+        ("second_request_partial", is_second_request_partial_received),
+    )
+    result = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for record in records:
+            result.append(next((name for name, matches in validators if matches(record)), None))
+    return result
+
+
+def best_time(func, records, repeats: int = 3, **kwargs) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(records, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    record_count = 20000
+    for arg in sys.argv[1:]:
+        if arg.startswith("--records="):
+            record_count = int(arg.split("=", 1)[1])
+
+    entries = generate_fake_log_responses(record_count, record_count, seed=42)
+    records = filter_records(get_latest_records(entries), RedcapResponseFirst)
+
+    expected = legacy_classify(records)
+    runs = [("validators (legacy)", legacy_classify, {}),
+            ("classify_requests python", classify_requests, {"engine": "python"})]
+    if PANDAS_AVAILABLE:
+        runs.append(("classify_requests pandas", classify_requests, {"engine": "pandas"}))
+    for _, func, kwargs in runs[1:]:
+        assert func(records, **kwargs) == expected
+
+    print(f"📊 Request classification of {len(records)} records (identical output verified)")
+    baseline = None
+    for name, func, kwargs in runs:
+        elapsed = best_time(func, records, **kwargs)
+        baseline = baseline or elapsed
+        print(f"   {name:<26} {len(records) / elapsed:>10,.0f} records/s  ({baseline / elapsed:.1f}x)")
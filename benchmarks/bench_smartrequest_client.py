@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Benchmark of the SmartRequest client against the local HTTP simulator
+(app/fake_smartrequest_server.py): create_request throughput and latency for
+several client thread counts under a latency/throttling profile, plus how
+many calls were throttled (429), failed (503) and retried.
+
+Usage:
+    python benchmarks/bench_smartrequest_client.py [--requests=200] [--threads=1,4,16]
+        [--profile=sandbox] [--rate_limit=20:40] [--failures=create:0.01]
+"""
+
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from fake_smartrequest_server import FakeSmartRequestServer, start_in_background
+from services.external_api_service import parse_arg
+from services.smartrequest_faker import create_fake_smartrequest_payload
+from services.smartrequest_service import SmartRequestOutcomeUnknown, SmartRequestService
+from utils.logger import configure_logging
+from utils.timing import Histogram
+
+
+def run(server: FakeSmartRequestServer, request_count: int, threads: int) -> dict:
+    client = SmartRequestService()
+    client.use_faker = False
+    client.base_url = server.url
+    client.client_id, client.client_secret = "bench", "bench"
+    payloads = [create_fake_smartrequest_payload() for _ in range(request_count)]
+    latencies = Histogram()
+    server.stats.clear()
+
+    def submit(payload):
+        started = time.perf_counter()
+        try:
+            result = client.create_request(payload)
+        except SmartRequestOutcomeUnknown:
+            result = None
+        latencies.observe(time.perf_counter() - started)
+        return result is not None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        succeeded = sum(pool.map(submit, payloads))
+    wall = time.perf_counter() - started
+    return {
+        "threads": threads,
+        "requests_per_second": request_count / wall,
+        "succeeded": succeeded,
+        "latency": latencies.to_dict(),
+        "throttled": server.stats["create_429"],
+        "unavailable": server.stats["create_503"],
+    }
+
+
+if __name__ == "__main__":
+    request_count = int(parse_arg("requests", "200"))
+    thread_counts = [int(n) for n in parse_arg("threads", "1,4,16").split(",")]
+    profile = parse_arg("profile", "sandbox")
+    # Retry warnings would drown the table
+    configure_logging("ERROR")
+    logging.getLogger("urllib3").setLevel(logging.ERROR)
+
+    server = FakeSmartRequestServer(("127.0.0.1", 0), profile,
+                                    latency=parse_arg("latency", None),
+                                    failures=parse_arg("failures", None),
+                                    rate_limit=parse_arg("rate_limit", None), seed=42)
+    start_in_background(server)
+    print(f"📊 create_request x {request_count} against the {profile} profile ({server.url})")
+    print(f"   {'threads':>7} {'req/s':>8} {'ok':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'429s':>5} {'503s':>5}")
+    try:
+        for threads in thread_counts:
+            result = run(server, request_count, threads)
+            latency = result["latency"]
+            print(f"   {threads:>7} {result['requests_per_second']:>8.1f} {result['succeeded']:>5} "
+                  f"{latency['p50'] * 1000:>8.0f} {latency['p95'] * 1000:>8.0f} {latency['p99'] * 1000:>8.0f} "
+                  f"{result['throttled']:>5} {result['unavailable']:>5}")
+    finally:
+        server.shutdown()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Test script for the SmartRequest document downloader: concurrent downloads,
+resume after an interrupted transfer, checksum verification and bandwidth limit.
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from fake_smartrequest_server import FakeSmartRequestServer, start_in_background
+from services.document_downloader import FULFILLED_STATUS, BandwidthLimiter, DocumentDownloader
+from services.smartrequest_service import SmartRequestService
+from utils.request_tracker import SmartRequestTracker
+
+DOCUMENT_TYPES = ["MEDICAL_RECORD", "REQUEST_LETTER", "INVOICE"]
+
+
+def setup(tmp, server, **kwargs):
+    client = SmartRequestService()
+    client.use_faker = False
+    client.base_url = server.url
+    client.client_id, client.client_secret = "client", "secret"
+    tracker = SmartRequestTracker(os.path.join(tmp, "tracker.json"))
+    for i in range(4):
+        tracker.add_request(f"10{i}", f"TNSC00000000{i}")
+        tracker.update_request_status(f"10{i}", FULFILLED_STATUS)
+    tracker.add_request("200", "TNSC000000009")  # still "Created": nothing to download
+    downloader = DocumentDownloader(client, tracker, os.path.join(tmp, "downloads"),
+                                    document_types=DOCUMENT_TYPES, **kwargs)
+    return downloader, tracker
+
+
+def test_concurrent_downloads():
+    print("📥 Testing document downloader...")
+    server = FakeSmartRequestServer(("127.0.0.1", 0), "ideal", seed=1, file_size=200 * 1024)
+    start_in_background(server)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            downloader, tracker = setup(tmp, server, workers=4)
+            assert len(downloader.pending_downloads()) == 12
+
+            result = downloader.run()
+            assert result["downloaded"] == 12 and result["failed"] == 0, result
+            assert result["bytes"] == 12 * 200 * 1024
+
+            record = tracker.get_request("102")
+            document = record.documents["INVOICE"]
+            assert document["path"] == os.path.join(tmp, "downloads", "TNSC000000002", "102_invoice.pdf")
+            with open(document["path"], "rb") as f:
+                content = f.read()
+            assert content == server.document("102", "invoice")
+            assert document["sha256"] == hashlib.sha256(content).hexdigest()
+            assert not [name for _, _, files in os.walk(tmp) for name in files if name.endswith(".part")]
+
+            # Everything is recorded: a second run has nothing to do
+            assert downloader.pending_downloads() == []
+            assert downloader.run()["downloaded"] == 0
+            print("✅ 12 documents downloaded concurrently and recorded in the tracker")
+    finally:
+        server.shutdown()
+
+
+def test_resume_after_interrupted_download():
+    server = FakeSmartRequestServer(("127.0.0.1", 0), "ideal", seed=2, file_size=300 * 1024,
+                                    file_drop_rate=1.0)
+    start_in_background(server)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            downloader, tracker = setup(tmp, server, workers=2)
+            downloader.document_types = ["MEDICAL_RECORD"]
+            record = tracker.get_request("100")
+            path = downloader.document_path(record, "MEDICAL_RECORD")
+
+            # Every transfer is cut off halfway: the part file grows on each run
+            assert downloader.run()["failed"] == 4
+            assert 0 < os.path.getsize(path + ".part") <= 150 * 1024
+            server.file_drop_rate = 0.0
+            result = downloader.run()
+            assert result["downloaded"] == 4, result
+            assert server.stats["file_206"] == 4
+            with open(path, "rb") as f:
+                assert f.read() == server.document("100", "medical_record")
+            print("✅ Interrupted downloads resume with a Range request")
+    finally:
+        server.shutdown()
+
+
+def test_checksum_mismatch_discards_part_file():
+    server = FakeSmartRequestServer(("127.0.0.1", 0), "ideal", seed=3, file_size=64 * 1024)
+    start_in_background(server)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            downloader, tracker = setup(tmp, server)
+            record = tracker.get_request("101")
+            path = downloader.document_path(record, "MEDICAL_RECORD")
+            os.makedirs(os.path.dirname(path))
+            # A corrupt prefix: resuming after it yields the wrong digest
+            with open(path + ".part", "wb") as f:
+                f.write(b"X" * 1024)
+
+            url = server.file_url("101", "MEDICAL_RECORD")
+            assert downloader.download_file(url, path) is None
+            assert not os.path.exists(path) and not os.path.exists(path + ".part")
+            assert downloader.download_file(url, path)["sha256"] == hashlib.sha256(
+                server.document("101", "medical_record")).hexdigest()
+            print("✅ Checksum mismatch discards the partial file and the retry succeeds")
+    finally:
+        server.shutdown()
+
+
+def test_bandwidth_limiter():
+    limiter = BandwidthLimiter(400 * 1024)
+    started = time.perf_counter()
+    for _ in range(4):
+        limiter.consume(50 * 1024)
+    elapsed = time.perf_counter() - started
+    assert 0.45 <= elapsed < 1.5, elapsed
+    print(f"✅ 200 KB at 400 KB/s took {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    test_concurrent_downloads()
+    test_resume_after_interrupted_download()
+    test_checksum_mismatch_discards_part_file()
+    test_bandwidth_limiter()
+    print("\n✅ All document downloader tests passed!")
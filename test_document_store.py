@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Test script for the content-addressed document store.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+import docx2pdf
+
+import services.pdf_service as pdf_service_module
+from services.pdf_service import PDFService
+from utils.document_store import DocumentStore, document_key
+
+
+def test_document_key():
+    print("🗄️ Testing document store...")
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.docx")
+        with open(template, "wb") as f:
+            f.write(b"template v1")
+        data = {"mg_idpreg": "TNSC000000001", "bc_momnamefirst": "Ann", "mr_request_days": 7}
+
+        key = document_key(template, data)
+        assert key == document_key(template, dict(reversed(list(data.items()))))
+        assert key != document_key(template, dict(data, bc_momnamefirst="Anne"))
+
+        # A new template version changes every key
+        time.sleep(0.01)
+        with open(template, "wb") as f:
+            f.write(b"template v2")
+        os.utime(template, (time.time() + 1, time.time() + 1))
+        assert key != document_key(template, data)
+        print("✅ Keys follow the template contents and the data, not the key order")
+
+
+def test_add_and_link():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DocumentStore(os.path.join(tmp, ".store"))
+        key = "ab" + "0" * 62
+        assert not store.contains(key)
+        assert store.link(key, os.path.join(tmp, "a.pdf")) is None
+
+        generated = os.path.join(tmp, "10_01_2026", "first_request", "TNSC000000001_0.pdf")
+        os.makedirs(os.path.dirname(generated))
+        with open(generated, "wb") as f:
+            f.write(b"%PDF-1.4 generated")
+        assert store.add(key, generated)
+        assert store.contains(key)
+        assert store.object_path(key) == os.path.join(tmp, ".store", "ab", f"{key}.pdf")
+
+        # Next day: the dated path is a link to the same file
+        next_day = os.path.join(tmp, "10_02_2026", "first_request", "TNSC000000001_0.pdf")
+        assert store.link(key, next_day) == next_day
+        assert os.path.samefile(next_day, store.object_path(key))
+        assert os.path.samefile(generated, store.object_path(key))
+        with open(next_day, "rb") as f:
+            assert f.read() == b"%PDF-1.4 generated"
+
+        # Linking over an older file replaces it; linking again is a no-op
+        assert store.link(key, generated) == generated
+        assert store.link(key, next_day) == next_day
+        assert not [name for name in os.listdir(os.path.dirname(next_day)) if name.endswith(".tmp")]
+        assert not os.stat(store.object_path(key)).st_mode & 0o222, "stored objects are read-only"
+        print("✅ Stored PDFs are linked into dated paths")
+
+
+def test_render_over_link():
+    renders = iter([b"%PDF-1.4 generated", b"%PDF-1.4 changed data"])
+
+    def fake_convert(source, destination):
+        with open(destination, "wb") as f:
+            f.write(next(renders))
+
+    original_convert = docx2pdf.convert
+    docx2pdf.convert = fake_convert
+    with tempfile.TemporaryDirectory() as tmp:
+        original_output_dir = pdf_service_module.output_dir
+        pdf_service_module.output_dir = tmp
+        try:
+            store = DocumentStore(os.path.join(tmp, ".store"))
+            key = "cd" + "0" * 62
+            service = PDFService()
+            first = service.convert_to_pdf(os.path.join(tmp, "in.docx"), "first_request", "TNSC000000001_0")
+            assert store.add(key, first)
+
+            # Same day, the record's data changed: the new PDF must not overwrite the stored one
+            second = service.convert_to_pdf(os.path.join(tmp, "in.docx"), "first_request", "TNSC000000001_0")
+            assert second == first
+            with open(second, "rb") as f:
+                assert f.read() == b"%PDF-1.4 changed data"
+            with open(store.object_path(key), "rb") as f:
+                assert f.read() == b"%PDF-1.4 generated"
+        finally:
+            pdf_service_module.output_dir = original_output_dir
+            docx2pdf.convert = original_convert
+    print("✅ Re-rendering a linked path leaves the stored PDF unchanged")
+
+
+if __name__ == "__main__":
+    test_document_key()
+    test_add_and_link()
+    test_render_over_link()
+    print("\n✅ All document store tests passed!")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Test script for the pooled SMTP email dispatcher.
+Uses an in-process fake SMTP class so no mail relay is needed.
+"""
+
+import os
+import smtplib
+import sys
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from services import email_dispatcher
+from services.email_dispatcher import EmailDispatcher
+
+
+class FakeSMTP:
+    """Records connections and messages; can be told to drop the next send"""
+    connections = 0
+    messages = []
+    drop_next = False
+    refuse_next = False
+
+    def __init__(self, server, port, timeout=None):
+        FakeSMTP.connections += 1
+
+    def send_message(self, msg):
+        if FakeSMTP.drop_next:
+            FakeSMTP.drop_next = False
+            raise smtplib.SMTPServerDisconnected("connection dropped")
+        if FakeSMTP.refuse_next:
+            FakeSMTP.refuse_next = False
+            raise smtplib.SMTPRecipientsRefused({msg['To']: (550, b"mailbox unavailable")})
+        FakeSMTP.messages.append(msg)
+
+    def quit(self):
+        pass
+
+    @classmethod
+    def reset(cls):
+        cls.connections = 0
+        cls.messages = []
+        cls.drop_next = False
+        cls.refuse_next = False
+
+
+def _dispatcher():
+    FakeSMTP.reset()
+    email_dispatcher.smtplib.SMTP = FakeSMTP
+    return EmailDispatcher("smtp.test", 25, "sender@test")
+
+
+def test_connection_reused():
+    """Many messages share one SMTP connection"""
+    print("📧 Testing connection reuse...")
+    dispatcher = _dispatcher()
+    try:
+        for i in range(20):
+            assert dispatcher.send("to@test", f"Subject {i}", "body")
+        assert FakeSMTP.connections == 1
+        assert len(FakeSMTP.messages) == 20
+    finally:
+        email_dispatcher.smtplib.SMTP = smtplib.SMTP
+    print("✅ 20 messages over 1 connection")
+
+
+def test_reconnect_on_failure():
+    """A dropped connection is re-opened and the message retried"""
+    dispatcher = _dispatcher()
+    try:
+        assert dispatcher.send("to@test", "first", "body")
+        FakeSMTP.drop_next = True
+        assert dispatcher.send("to@test", "second", "body")
+        assert FakeSMTP.connections == 2
+        assert [m['Subject'] for m in FakeSMTP.messages] == ["first", "second"]
+    finally:
+        email_dispatcher.smtplib.SMTP = smtplib.SMTP
+
+
+def test_permanent_failure_not_retried():
+    """A refused recipient fails at once instead of reconnecting"""
+    dispatcher = _dispatcher()
+    failures = []
+    dispatcher.on_failure = lambda *args: failures.append(args)
+    try:
+        FakeSMTP.refuse_next = True
+        assert not dispatcher.send("nobody@test", "refused", "body", "key-1")
+        assert FakeSMTP.connections == 1
+        assert FakeSMTP.messages == []
+        assert isinstance(failures[0][3], smtplib.SMTPRecipientsRefused)
+        assert failures[0][4] == "key-1"
+    finally:
+        email_dispatcher.smtplib.SMTP = smtplib.SMTP
+
+
+def test_background_queue():
+    """Queued messages are delivered by the worker thread"""
+    print("📨 Testing background queue...")
+    dispatcher = _dispatcher()
+    try:
+        for i in range(10):
+            dispatcher.submit("to@test", f"Queued {i}", "body")
+        dispatcher.close()
+        assert len(FakeSMTP.messages) == 10
+        assert dispatcher.pending == 0
+    finally:
+        email_dispatcher.smtplib.SMTP = smtplib.SMTP
+    print("✅ Background queue delivered all messages")
+
+
+if __name__ == "__main__":
+    test_connection_reused()
+    test_reconnect_on_failure()
+    test_permanent_failure_not_retried()
+    test_background_queue()
+    print("\n✅ All email dispatcher tests passed!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Test script for the Datavant facility index (site/health system/phone/fax lookups).
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from utils.facility_index import FacilityIndex, normalize_phone, normalize_site
+
+CSV_HEADER = "SITE,Health System ,SiteName,Address,Address2,City,State,ZIP,PHONE,Fax,ITEMIZED BILLS,RECORDS,RADIOLOGY,SUBPOENA\n"
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(CSV_HEADER)
+        for row in rows:
+            f.write(",".join(row) + "\n")
+
+
+def _sample_rows():
+    return [
+        ["00101", "Vanderbilt Health", "Vanderbilt University Medical Center", "1211 Medical Center Dr", "",
+         "Nashville", "TN", "37232", "(615) 322-5000", "615-343-1000", "Y", "Y", "N", "N"],
+        ["00102", "vanderbilt  health", "Vanderbilt Wilson County Hospital", "1411 W Baddour Pkwy", "",
+         "Lebanon", "TN", "37087", "615.444.8262", "1-615-443-2500", "Y", "Y", "N", "N"],
+        ["02450", "Erlanger Health", "Erlanger Baroness Hospital", "975 E 3rd St", "",
+         "Chattanooga", "TN", "37403", "4237787000", "4237787001", "Y", "Y", "Y", "N"],
+    ]
+
+
+def test_normalizers():
+    """Site numbers pad to 5 digits and phone numbers reduce to 10 digits"""
+    print("🔢 Testing normalizers...")
+    assert normalize_site("101") == "00101"
+    assert normalize_site(101) == "00101"
+    assert normalize_site("00101") == "00101"
+    assert normalize_phone("(615) 322-5000") == "6153225000"
+    assert normalize_phone("1-615-443-2500") == "6154432500"
+    print("✅ Normalizers working")
+
+
+def test_index_lookups():
+    """Every key type resolves in one dictionary lookup"""
+    print("🏥 Testing facility index lookups...")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "facilities.csv")
+        _write_csv(csv_path, _sample_rows())
+        index = FacilityIndex(csv_path)
+
+        assert len(index.all()) == 3
+        assert index.by_site("101")['siteName'] == "Vanderbilt University Medical Center"
+        assert index.by_site("2450")['city'] == "Chattanooga"
+        assert index.by_site("99999") is None
+        assert len(index.by_health_system("Vanderbilt Health")) == 2
+        assert index.by_phone("615-322-5000")[0]['site'] == "00101"
+        assert index.by_fax("(615) 443-2500")[0]['site'] == "00102"
+        assert index.by_phone("000") == []
+    print("✅ Facility index lookups working")
+
+
+def test_reload_on_mtime_change():
+    """The index is rebuilt only when the CSV is modified"""
+    print("🔄 Testing mtime-based reload...")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "facilities.csv")
+        rows = _sample_rows()
+        _write_csv(csv_path, rows[:1])
+        index = FacilityIndex(csv_path)
+        first = index.all()
+        assert len(first) == 1
+        assert index.all() is first  # unchanged file -> same list, no re-read
+
+        _write_csv(csv_path, rows)
+        future = time.time() + 5
+        os.utime(csv_path, (future, future))
+        assert len(index.all()) == 3
+        assert index.by_site("02450") is not None
+    print("✅ Index reloaded after CSV change")
+
+
+def test_missing_csv():
+    """A missing CSV yields an empty index instead of raising"""
+    index = FacilityIndex("/nonexistent/facilities.csv")
+    assert index.all() == []
+    assert index.by_site("00101") is None
+
+
+if __name__ == "__main__":
+    test_normalizers()
+    test_index_lookups()
+    test_reload_on_mtime_change()
+    test_missing_csv()
+    print("\n✅ All facility index tests passed!")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Test script for matching REDCap hos_name/phone/fax to Datavant facility sites.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from utils.facility_index import FacilityIndex
+from utils.facility_matcher import FacilityMatcher, tokenize, parse_state, parse_zip
+
+CSV_HEADER = "SITE,Health System ,SiteName,Address,Address2,City,State,ZIP,PHONE,Fax,ITEMIZED BILLS,RECORDS,RADIOLOGY,SUBPOENA\n"
+ROWS = [
+    ["00101", "Ascension", "Saint Thomas Midtown Hospital", "2000 Church St", "", "Nashville", "TN", "37236", "6152845555", "6152845556", "Y", "Y", "N", "N"],
+    ["00102", "Ascension", "Saint Thomas West Hospital", "4220 Harding Pike", "", "Nashville", "TN", "37205", "6152225000", "6152225001", "Y", "Y", "N", "N"],
+    ["00103", "Erlanger", "Erlanger Baroness Hospital", "975 E 3rd St", "", "Chattanooga", "TN", "37403", "4237787000", "4237787001", "Y", "Y", "N", "N"],
+    ["00104", "Baptist", "Baptist Memorial Hospital", "6019 Walnut Grove Rd", "", "Memphis", "TN", "38120", "9012265000", "9012265001", "Y", "Y", "N", "N"],
+    ["00105", "Baptist", "Baptist Memorial Hospital", "1 Baptist Dr", "", "Jackson", "MS", "39202", "6019681000", "6019681001", "Y", "Y", "N", "N"],
+]
+
+
+def _make_matcher(tmp):
+    csv_path = os.path.join(tmp, "facilities.csv")
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write(CSV_HEADER)
+        for row in ROWS:
+            f.write(",".join(row) + "\n")
+    return FacilityMatcher(FacilityIndex(csv_path), cache_file=os.path.join(tmp, "matches.json"))
+
+
+def test_normalization():
+    """Abbreviations expand and address parts are extracted"""
+    assert tokenize("St. Thomas Midtown Hosp") == ["saint", "thomas", "midtown", "hospital"]
+    assert parse_state("Nashville, TN") == "TN"
+    assert parse_zip("2000 Church St, Nashville, TN 37236-0001") == "37236"
+
+
+def test_name_match():
+    """An abbreviated hos_name ranks the right site first"""
+    print("🏥 Testing name matching...")
+    with tempfile.TemporaryDirectory() as tmp:
+        matcher = _make_matcher(tmp)
+        ranked = matcher.rank("St Thomas Midtown")
+        assert ranked[0].site == "00101"
+        assert ranked[0].score > ranked[1].score
+    print("✅ Name matching working")
+
+
+def test_phone_and_state_disambiguate():
+    """Phone digits and state blocking pick between identically named sites"""
+    with tempfile.TemporaryDirectory() as tmp:
+        matcher = _make_matcher(tmp)
+        assert matcher.rank("Baptist Memorial Hospital", phone="(601) 968-1000")[0].site == "00105"
+        assert matcher.rank("Baptist Memorial Hospital", city_state="Memphis, TN")[0].site == "00104"
+
+
+def test_confirmed_cache():
+    """Confirmed matches are returned first and persisted across matcher instances"""
+    print("💾 Testing confirmed match cache...")
+    with tempfile.TemporaryDirectory() as tmp:
+        matcher = _make_matcher(tmp)
+        assert matcher.confirm("Midtown Campus", "00101")
+        fresh = _make_matcher(tmp)
+        best = fresh.best_match("midtown  campus")
+        assert best is not None and best.confirmed and best.site == "00101"
+    print("✅ Confirmed match cache working")
+
+
+def test_auto_confirm_is_scoped_to_state():
+    """An auto-confirmed match in one state does not capture a same-named hospital elsewhere"""
+    with tempfile.TemporaryDirectory() as tmp:
+        matcher = _make_matcher(tmp)
+        assert matcher.best_match("Baptist Memorial Hospital", city_state="Memphis, TN").site == "00104"
+        assert matcher.best_match("Baptist Memorial Hospital").confirmed is False
+        fresh = _make_matcher(tmp)
+        assert fresh.best_match("Baptist Memorial Hospital", city_state="Memphis, TN").confirmed
+        best = fresh.best_match("Baptist Memorial Hospital", city_state="Jackson, MS")
+        assert best.site == "00105" and not best.confirmed
+
+
+def test_operator_confirmation_wins():
+    """A CLI confirmation made while the daemon runs is seen, kept and can be undone"""
+    with tempfile.TemporaryDirectory() as tmp:
+        daemon, cli = _make_matcher(tmp), _make_matcher(tmp)
+        assert daemon.best_match("Baptist Memorial Hospital", city_state="Jackson, MS").site == "00105"
+        assert daemon.best_match("Baptist Memorial Hospital", city_state="Jackson, MS").confirmed
+
+        # The operator corrects the mapping; the daemon's cached copy must not overwrite it
+        assert cli.confirm("Baptist Memorial Hospital", "00104", "MS")
+        assert cli.confirm("St Thomas Midtown", "00101")
+        assert daemon.best_match("Baptist Memorial Hospital", city_state="Jackson, MS").site == "00104"
+        assert not daemon.confirm("Baptist Memorial Hospital", "00105", "MS", overwrite=False)
+        assert _make_matcher(tmp).confirmed_site("St Thomas Midtown") == "00101"
+
+        assert cli.unconfirm("Baptist Memorial Hospital", "MS")
+        assert not cli.unconfirm("Baptist Memorial Hospital", "MS")
+        assert daemon.confirmed_site("Baptist Memorial Hospital", "MS") is None
+        assert daemon.confirmed_site("St Thomas Midtown") == "00101"
+
+
+def test_no_match_below_threshold():
+    with tempfile.TemporaryDirectory() as tmp:
+        matcher = _make_matcher(tmp)
+        assert matcher.best_match("Completely Unknown Clinic") is None
+
+
+def test_ranking_speed():
+    """Ranking over a few thousand facilities stays in the millisecond range"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "facilities.csv")
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write(CSV_HEADER)
+            for i in range(5000):
+                f.write(f"{i:05d},System {i % 50},Facility {i} Regional Medical Center,{i} Main St,,City{i},TN,37{i % 1000:03d},615{i:07d},616{i:07d},Y,Y,N,N\n")
+        matcher = FacilityMatcher(FacilityIndex(csv_path), cache_file=os.path.join(tmp, "matches.json"))
+        matcher.rank("warm up")
+        start = time.perf_counter()
+        for i in range(100):
+            matcher.rank(f"Facility {i * 7} Regional Med Ctr", phone=f"615{i * 7:07d}")
+        per_record_ms = (time.perf_counter() - start) * 1000 / 100
+        print(f"⏱️ {per_record_ms:.2f} ms per record")
+        assert matcher.rank("Facility 42 Regional Med Ctr")[0].site == "00042"
+        assert per_record_ms < 50
+
+
+if __name__ == "__main__":
+    test_normalization()
+    test_name_match()
+    test_phone_and_state_disambiguate()
+    test_confirmed_cache()
+    test_auto_confirm_is_scoped_to_state()
+    test_operator_confirmation_wins()
+    test_no_match_below_threshold()
+    test_ranking_speed()
+    print("\n✅ All facility matcher tests passed!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Test script for the fake REDCap API server against the real fetch functions.
+"""
+
+import os
+import sys
+
+import requests
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+import services.external_api_service as external_api_service
+from fake_redcap_server import FakeRedcapData, FakeRedcapServer, start_in_background
+from models.redcap_response_first import RedcapResponseFirst
+
+DATA = FakeRedcapData(record_count=50, entries_per_record=3, window_hours=2, seed=7)
+
+
+def serve(**behaviour) -> FakeRedcapServer:
+    server = FakeRedcapServer(("127.0.0.1", 0), DATA, page_size=10, **behaviour)
+    start_in_background(server)
+    return server
+
+
+def point_client_at(server):
+    external_api_service.env = "dev"
+    external_api_service.end_point = server.url
+
+
+def test_log_and_record_exports():
+    print("🧪 Testing fake REDCap server...")
+    server = serve(token="secret")
+    original = (external_api_service.env, external_api_service.end_point, external_api_service.token)
+    try:
+        point_client_at(server)
+        external_api_service.token = "secret"
+        external_api_service.details_data["token"] = "secret"
+
+        # Streamed in chunks of 10 entries, all within the window
+        entries = list(external_api_service.iter_log_data_from_api("2000-01-01 00:00", "2999-01-01 00:00"))
+        assert entries == DATA.log_entries and len(entries) == 150
+        newest = DATA.log_entries[0]["timestamp"]
+        assert all(e["timestamp"] == newest for e in external_api_service.iter_log_data_from_api(newest))
+
+        record = RedcapResponseFirst(record=DATA.record_ids[0], timestamp=newest, username="u", action="", details={})
+        rows = external_api_service.get_record_data_from_api(record)
+        assert len(rows) == 1 and rows[0]["mg_idpreg"] == DATA.record_ids[0]
+        # Only the requested fields come back, like REDCap
+        assert set(rows[0]) == {v for k, v in external_api_service.details_data.items() if k.startswith("fields[")}
+        assert rows == external_api_service.get_record_data_from_api(record)
+
+        external_api_service.details_data["token"] = "wrong"
+        assert external_api_service.get_record_data_from_api(record) == []
+        assert server.stats["forbidden"] == 1
+    finally:
+        external_api_service.env, external_api_service.end_point, external_api_service.token = original
+        external_api_service.details_data["token"] = original[2]
+        server.shutdown()
+    print("✅ Log and record exports work over HTTP")
+
+
+def test_injected_failures():
+    server = serve(error_rate=1.0)
+    try:
+        response = requests.post(server.url, data={"content": "log"})
+        assert response.status_code == 500
+    finally:
+        server.shutdown()
+
+    server = serve(drop_rate=1.0)
+    original = (external_api_service.env, external_api_service.end_point)
+    try:
+        point_client_at(server)
+        try:
+            list(external_api_service.iter_log_data_from_api("2000-01-01 00:00", "2999-01-01 00:00"))
+            assert False, "truncated stream accepted"
+        except (requests.exceptions.ChunkedEncodingError, ValueError):
+            pass
+        # The non-streaming wrapper reports it and returns nothing
+        assert external_api_service.get_log_data_from_api("2000-01-01 00:00") == []
+        assert server.stats["dropped_streams"] == 2
+    finally:
+        external_api_service.env, external_api_service.end_point = original
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_log_and_record_exports()
+    test_injected_failures()
+    print("\n✅ All fake REDCap server tests passed!")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Test script for the HTTP SmartRequest simulator and the client's retry handling.
+"""
+
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from fake_smartrequest_server import FakeSmartRequestServer, Latency, start_in_background
+from services.smartrequest_faker import create_fake_smartrequest_payload
+from services.smartrequest_service import SmartRequestOutcomeUnknown, SmartRequestService, retry_after_seconds
+
+
+def client_for(server: FakeSmartRequestServer) -> SmartRequestService:
+    client = SmartRequestService()
+    client.use_faker = False
+    client.base_url = server.url
+    client.client_id, client.client_secret = "client", "secret"
+    client.max_retry_delay = 0.1
+    return client
+
+
+def test_round_trip_and_token_refresh():
+    print("🎭 Testing SmartRequest simulator...")
+    server = FakeSmartRequestServer(("127.0.0.1", 0), "ideal", seed=1)
+    start_in_background(server)
+    try:
+        client = client_for(server)
+        created = client.create_request(create_fake_smartrequest_payload())
+        request_id = created["requestId"]
+        assert "authorizationForms" not in created
+        assert client.get_request_status(request_id)["requestId"] == request_id
+        assert request_id in client.get_download_url(request_id, "ALL")
+        assert client.cancel_request(request_id, "duplicate")
+        assert client.get_record_types()
+
+        # The server forgets its tokens: the client re-authenticates once and carries on
+        server.expire_tokens()
+        assert client.get_request_status(request_id)["requestId"] == request_id
+        assert server.stats["auth_requests"] == 2 and server.stats["status_401"] == 1
+
+        # Concurrent 401s: the first thread refreshes the token, the others reuse it
+        server.expire_tokens()
+        threads = [threading.Thread(target=client.get_request_status, args=(request_id,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert server.stats["auth_requests"] == 3
+    finally:
+        server.shutdown()
+    print("✅ Client and simulator agree on every endpoint")
+
+
+def test_throttling_and_failures_are_retried():
+    server = FakeSmartRequestServer(("127.0.0.1", 0), "ideal", rate_limit="20:1", seed=1)
+    start_in_background(server)
+    try:
+        client = client_for(server)
+        assert client.authenticate()
+        # The bucket holds one request: the next ones get 429 + Retry-After and are retried
+        started = time.monotonic()
+        for _ in range(3):
+            assert client.get_request_status("1001") is not None
+        assert server.stats["status_429"] >= 1
+        assert time.monotonic() - started < 2  # Retry-After is capped by max_retry_delay
+    finally:
+        server.shutdown()
+
+    server = FakeSmartRequestServer(("127.0.0.1", 0), "ideal", failures="create:1.0,status:1.0", seed=1)
+    start_in_background(server)
+    try:
+        client = client_for(server)
+        client.max_retries = 2
+        # A 503 on POST /request may follow a created request: never repeated
+        try:
+            client.create_request(create_fake_smartrequest_payload())
+            assert False, "a 503 on POST /request must be reported as an unknown outcome"
+        except SmartRequestOutcomeUnknown:
+            pass
+        assert server.stats["create_requests"] == 1 and server.stats["create_503"] == 1
+        # Status lookups are safe to repeat
+        assert client.get_request_status("1001") is None
+        assert server.stats["status_requests"] == 3 and server.stats["status_503"] == 3
+    finally:
+        server.shutdown()
+
+
+def test_latency_and_retry_after_parsing():
+    import random
+    rng = random.Random(3)
+    assert Latency.parse("fixed:20").sample(rng) == 0.02
+    assert all(0.01 <= Latency.parse("uniform:10:30").sample(rng) <= 0.03 for _ in range(50))
+    samples = sorted(Latency.parse("lognormal:100:0.5").sample(rng) for _ in range(999))
+    assert 0.08 < samples[499] < 0.12
+
+    class Response:
+        def __init__(self, value):
+            self.headers = {"Retry-After": value} if value is not None else {}
+
+    assert retry_after_seconds(Response("3")) == 3.0
+    assert 8 <= retry_after_seconds(Response(formatdate(time.time() + 10, usegmt=True))) <= 10
+    assert retry_after_seconds(Response(None)) is None
+    assert retry_after_seconds(Response("soon")) is None
+
+
+if __name__ == "__main__":
+    test_round_trip_and_token_refresh()
+    test_throttling_and_failures_are_retried()
+    test_latency_and_retry_after_parsing()
+    print("\n✅ All SmartRequest simulator tests passed!")
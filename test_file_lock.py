@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Test script for the tracker file lock: concurrent processes must not lose updates.
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+
+from utils.file_lock import FileLock
+from utils.request_tracker import SmartRequestTracker
+
+PER_WORKER = 20
+
+
+def add_requests(storage_file, worker):
+    tracker = SmartRequestTracker(storage_file)
+    for i in range(PER_WORKER):
+        assert tracker.add_request(f"REQ_{worker}_{i}", f"RECORD_{worker}_{i}", "first_request")
+
+
+def test_concurrent_tracker_writers():
+    print("🔒 Testing tracker writes from several processes...")
+    with tempfile.TemporaryDirectory() as tmp:
+        storage_file = os.path.join(tmp, "logs", "smartrequest_tracker.json")
+        workers = [multiprocessing.Process(target=add_requests, args=(storage_file, w)) for w in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert all(worker.exitcode == 0 for worker in workers)
+
+        with open(storage_file) as f:
+            records = json.load(f)
+        assert len(records) == 4 * PER_WORKER, f"lost updates: {len(records)} records"
+        assert not [name for name in os.listdir(os.path.dirname(storage_file)) if name.endswith(".tmp")]
+    print(f"✅ 4 processes added {4 * PER_WORKER} requests without losing any")
+
+
+def test_lock_is_reentrant():
+    with tempfile.TemporaryDirectory() as tmp:
+        lock = FileLock(os.path.join(tmp, "nested", "tracker.lock"))
+        with lock:
+            with lock:
+                pass
+            assert lock._handle is not None
+        assert lock._handle is None
+    print("✅ The lock can be re-entered by the thread holding it")
+
+
+if __name__ == "__main__":
+    test_concurrent_tracker_writers()
+    test_lock_is_reentrant()
+    print("\n✅ All file lock tests passed!")
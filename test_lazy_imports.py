@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Test that the CLI and dashboard entry points import without the heavy
+optional libraries (pandas, python-docx, docx2pdf, faker), which are only
+loaded when the code that needs them runs.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app')
+sys.path.insert(0, APP_DIR)
+
+from utils.logger import PandasCSVLogger
+
+HEAVY_MODULES = ("pandas", "numpy", "docx", "docx2pdf", "faker", "fake_responses")
+
+
+def loaded_heavy_modules(module):
+    script = (f"import sys; import {module}; "
+              f"print('loaded:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", script], cwd=APP_DIR,
+                            capture_output=True, text=True, env=dict(os.environ, ENV="local"))
+    assert result.returncode == 0, result.stderr
+    loaded = result.stdout.strip().splitlines()[-1][len("loaded:"):]
+    return [m for m in loaded.split(",") if m]
+
+
+def test_entry_points_skip_heavy_imports():
+    print("🧪 Testing lazy imports...")
+    for module in ("main", "simple_dashboard", "utils.smartrequest_helper", "outbox_drainer"):
+        loaded = loaded_heavy_modules(module)
+        assert loaded == [], f"import {module} loaded {loaded}"
+        print(f"✅ import {module} loads none of {', '.join(HEAVY_MODULES)}")
+
+
+def test_csv_logger_writes_on_first_row():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nested", "rows.csv")
+        csv_logger = PandasCSVLogger(path, ["record_id", "status"])
+        assert not os.path.exists(os.path.dirname(path))
+
+        csv_logger.log({"record_id": "TNSC000000001", "status": "ok"})
+        csv_logger.log({"record_id": "TNSC000000002", "status": "error"})
+        with open(path) as f:
+            lines = f.read().splitlines()
+        assert lines == ["record_id,status", "TNSC000000001,ok", "TNSC000000002,error"], lines
+        print("✅ PandasCSVLogger creates the file and header on the first row")
+
+
+def test_csv_logger_rolls_over():
+    """Dated file names are filled in per write (per cycle for per_cycle loggers), not at import"""
+    import utils.logger as logger_module
+    from datetime import datetime as real_datetime
+
+    class FakeDatetime(real_datetime):
+        current = real_datetime(2025, 6, 1, 23, 59, 59)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logger_module.datetime = FakeDatetime
+        try:
+            daily = PandasCSVLogger(os.path.join(tmp, "pdfs_%Y%m%d.csv"), ["record_id"])
+            run = PandasCSVLogger(os.path.join(tmp, "run_%Y%m%d_%H%M%S.csv"), ["record_id"], per_cycle=True)
+            PandasCSVLogger.new_cycle()
+            daily.log({"record_id": "TNSC000000001"})
+            FakeDatetime.current = real_datetime(2025, 6, 2, 0, 0, 1)
+            daily.log({"record_id": "TNSC000000002"})
+            run.log({"record_id": "TNSC000000002"})
+            PandasCSVLogger.new_cycle()
+            run.log({"record_id": "TNSC000000003"})
+        finally:
+            logger_module.datetime = real_datetime
+            PandasCSVLogger.new_cycle()
+        assert sorted(os.listdir(tmp)) == ["pdfs_20250601.csv", "pdfs_20250602.csv",
+                                           "run_20250601_235959.csv", "run_20250602_000001.csv"], os.listdir(tmp)
+        with open(os.path.join(tmp, "pdfs_20250602.csv")) as f:
+            assert f.read().splitlines() == ["record_id", "TNSC000000002"]
+        print("✅ PandasCSVLogger rolls over to a new dated file per day and per cycle")
+
+
+if __name__ == "__main__":
+    test_entry_points_skip_heavy_imports()
+    test_csv_logger_writes_on_first_row()
+    test_csv_logger_rolls_over()
+    print("\n✅ All lazy import tests passed!")
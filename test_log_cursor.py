@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Test script for the persisted REDCap log cursor.
+"""
+
+import os
+import sys
+import tempfile
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from utils.log_cursor import LogCursor
+
+
+def _entry(timestamp, record, details="mr_request = '1'"):
+    return {"timestamp": timestamp, "record": record, "details": details}
+
+
+def _cursor() -> LogCursor:
+    return LogCursor(os.path.join(tempfile.mkdtemp(), "log_cursor.json"))
+
+
+def test_first_run_uses_default_window():
+    cursor = _cursor()
+    assert cursor.begin_time("2025-06-22 13:00") == "2025-06-22 13:00"
+    entries = [_entry("2025-06-22 14:30", "A")]
+    assert cursor.filter_new(entries) == entries
+
+
+def test_resume_skips_processed_entries():
+    """Overlapping runs only see entries newer than the checkpoint"""
+    print("📌 Testing log cursor resume...")
+    cursor = _cursor()
+    first_run = [_entry("2025-06-22 14:29", "A"), _entry("2025-06-22 14:30", "B")]
+    assert cursor.advance(first_run)
+
+    # Reload from disk as the next run would
+    cursor = LogCursor(cursor.state_file)
+    assert cursor.begin_time("2025-06-22 13:00") == "2025-06-22 14:30"
+
+    second_run = first_run + [
+        _entry("2025-06-22 14:30", "C"),                        # same minute, new record
+        _entry("2025-06-22 14:30", "B", "mr_request = '2'"),   # same minute, record changed again
+        _entry("2025-06-22 14:31", "A"),
+    ]
+    new_entries = cursor.filter_new(second_run)
+    assert [(e["record"], e["timestamp"]) for e in new_entries] == [
+        ("C", "2025-06-22 14:30"), ("B", "2025-06-22 14:30"), ("A", "2025-06-22 14:31")
+    ]
+    print("✅ Already processed entries skipped")
+
+
+def test_advance_never_moves_backwards():
+    cursor = _cursor()
+    cursor.advance([_entry("2025-06-22 14:30", "A")])
+    assert not cursor.advance([_entry("2025-06-21 09:00", "B")])
+    assert cursor.timestamp == "2025-06-22 14:30"
+
+    # More entries at the same minute extend the seen set
+    cursor.advance([_entry("2025-06-22 14:30", "C")])
+    assert len(cursor.seen) == 2
+    assert cursor.filter_new([_entry("2025-06-22 14:30", "A"), _entry("2025-06-22 14:30", "C")]) == []
+
+
+def test_advance_before_failure():
+    """Only entries older than a failed record are checkpointed"""
+    cursor = _cursor()
+    entries = [_entry("2025-06-22 14:28", "A"), _entry("2025-06-22 14:29", "B"),
+               _entry("2025-06-22 14:30", "FAILED"), _entry("2025-06-22 14:31", "C")]
+    assert cursor.advance_before(entries, "2025-06-22 14:30")
+    assert cursor.timestamp == "2025-06-22 14:29"
+    assert [e["record"] for e in cursor.filter_new(entries)] == ["FAILED", "C"]
+
+    # Nothing succeeded before the failure: the cursor stays put
+    assert not cursor.advance_before(entries, "2025-06-22 14:28")
+    assert cursor.timestamp == "2025-06-22 14:29"
+
+
+if __name__ == "__main__":
+    test_first_run_uses_default_window()
+    test_resume_skips_processed_entries()
+    test_advance_never_moves_backwards()
+    test_advance_before_failure()
+    print("\n✅ All log cursor tests passed!")
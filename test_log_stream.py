@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Test script for streaming REDCap log parsing and on-the-fly latest-record reduction.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from utils.filters import get_latest_records
+from utils.log_cursor import LogCursor
+from utils.log_stream import LatestLogEntries, iter_json_array
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), 'app', 'response_1_sample.json')
+
+ENTRIES = [
+    {"timestamp": "2025-06-22 14:30", "record": "A", "details": "mr_request = '1', mr_note = 'café'"},
+    {"timestamp": "2025-06-22 14:31", "record": "B", "details": "mr_request = '1'"},
+    {"timestamp": "2025-06-22 14:29", "record": "A", "details": "mr_request = '0'"},
+    {"timestamp": "2025-06-22 14:31", "record": "C", "details": ""},
+    {"timestamp": "2025-06-22 14:32", "record": "A", "details": "mr_request_2 = '1'"},
+]
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_any_chunk_boundary():
+    """Elements are decoded correctly wherever the chunks split"""
+    print("🌊 Testing streaming JSON parser...")
+    body = json.dumps(ENTRIES, ensure_ascii=False, indent=1).encode("utf-8")
+    for size in (1, 2, 3, 7, 64, len(body)):
+        assert list(iter_json_array(_chunks(body, size))) == ENTRIES
+    assert list(iter_json_array([b"[1, 22", b"3, 4]"])) == [1, 223, 4]
+    assert list(iter_json_array([b"  [ ]  "])) == []
+    assert list(iter_json_array([])) == []
+    print("✅ Parser handles every chunk size")
+
+
+def test_errors():
+    for chunks in ([b'{"error": "You do not have permissions"}'], [b'[{"a": 1}, {"b":']):
+        try:
+            list(iter_json_array(chunks))
+            assert False, f"no error for {chunks}"
+        except ValueError:
+            pass
+
+
+def test_reduction_matches_get_latest_records():
+    """Streaming reduction yields the same records as the list-based path"""
+    print("🔎 Testing latest-record reduction...")
+    with open(SAMPLE_PATH, "rb") as f:
+        sample = json.load(f)
+    for entries in (ENTRIES, sample):
+        expected = get_latest_records([e for e in entries if e["details"].strip()])
+        batch = LatestLogEntries().consume(iter(entries))
+        assert get_latest_records(batch.latest()) == expected
+        assert batch.total == len(entries)
+    print("✅ Reduction matches get_latest_records")
+
+
+def test_watermark_and_cursor():
+    cursor = LogCursor(os.path.join(tempfile.mkdtemp(), "log_cursor.json"))
+    batch = LatestLogEntries(cursor).consume(iter(ENTRIES))
+    assert batch.watermark == "2025-06-22 14:32"
+    assert len(batch.watermark_entries) == 1
+    cursor.advance(batch.watermark_entries)
+
+    again = LatestLogEntries(cursor).consume(iter(ENTRIES))
+    assert again.skipped == len(ENTRIES) and len(again) == 0
+
+
+def test_interrupted_stream_is_incomplete():
+    def broken():
+        yield ENTRIES[0]
+        raise ConnectionError("connection reset")
+
+    batch = LatestLogEntries().consume(broken())
+    assert not batch.complete
+    assert len(batch) == 1
+
+
+if __name__ == "__main__":
+    test_any_chunk_boundary()
+    test_errors()
+    test_reduction_matches_get_latest_records()
+    test_watermark_and_cursor()
+    test_interrupted_stream_is_incomplete()
+    print("\n✅ All log stream tests passed!")
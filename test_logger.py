@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Test script for the queue-backed application logger.
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from utils.logger import configure_logging, get_logger, shutdown_logging
+
+
+class Payload:
+    """Counts how often it is rendered"""
+    renders = 0
+
+    def __str__(self):
+        Payload.renders += 1
+        return "payload"
+
+
+def test_debug_payloads_are_lazy():
+    print("🪵 Testing application logger...")
+    log = get_logger("test_logger")
+    assert log.name == "app.test_logger"
+
+    configure_logging("INFO")
+    log.debug("details response %s", Payload())
+    assert Payload.renders == 0
+
+    configure_logging("DEBUG")
+    log.debug("details response %s", Payload())
+    assert Payload.renders >= 1
+    configure_logging("INFO")
+    print("✅ Debug payloads are only rendered when enabled")
+
+
+def test_records_reach_stdout():
+    log = get_logger("test_logger")
+    configure_logging("INFO")
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        log.info("📄 Generating PDF for %s_%s", "P1", 0)
+        log.debug("hidden %s", "payload")
+        shutdown_logging()
+    configure_logging()
+    assert output.getvalue() == "📄 Generating PDF for P1_0\n"
+
+
+def test_import_leaves_logging_alone():
+    """Importing the app starts no listener thread; entry points configure logging"""
+    code = ("import threading, main, outbox_drainer, utils.logger as logger; "
+            "print(logger._listener is None, threading.active_count())")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+    assert result.stdout.split() == ["True", "1"], result.stdout + result.stderr
+
+
+if __name__ == "__main__":
+    test_debug_payloads_are_lazy()
+    test_records_reach_stdout()
+    test_import_leaves_logging_alone()
+    print("\n✅ All logger tests passed!")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Test script for the process metrics registry and the Prometheus exposition.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from utils.metrics import MetricsRegistry, load_snapshots, render_prometheus
+from utils.timing import stage_timings, time_stage
+
+
+def test_counters_persist_across_runs():
+    print("📈 Testing process metrics...")
+    directory = tempfile.mkdtemp()
+    registry = MetricsRegistry("main", directory, autosave_seconds=None)
+    registry.inc("medicos_documents_processed_total", 3)
+    registry.inc("medicos_smartrequest_requests_total", outcome="created")
+    registry.observe("medicos_stage_duration_seconds", 0.02, stage="fill_template")
+    assert registry.save() and not registry.save()
+
+    # The next one-shot run picks up where this one stopped
+    registry = MetricsRegistry("main", directory, autosave_seconds=None)
+    registry.inc("medicos_documents_processed_total", 2)
+    registry.observe("medicos_stage_duration_seconds", 3.0, stage="fill_template")
+    registry.save()
+    [snapshot] = load_snapshots(directory)
+    assert snapshot["counters"]["medicos_documents_processed_total"][""] == 5
+    assert snapshot["histograms"]["medicos_stage_duration_seconds"]['stage="fill_template"']["count"] == 2
+
+    try:
+        registry.inc("medicos_unknown_total")
+        assert False, "unknown metric accepted"
+    except ValueError:
+        pass
+    print("✅ Counters and histograms survive a restart")
+
+
+def test_prometheus_exposition():
+    main = MetricsRegistry("main", tempfile.mkdtemp(), autosave_seconds=None)
+    main.inc("medicos_documents_processed_total", 4)
+    for seconds in (0.004, 0.2, 7.0):
+        main.observe("medicos_stage_duration_seconds", seconds, stage="convert_to_pdf")
+    drainer = MetricsRegistry("outbox_drainer", tempfile.mkdtemp(), autosave_seconds=None)
+    drainer.inc("medicos_emails_total", outcome="sent")
+
+    text = render_prometheus([main.snapshot(), drainer.snapshot()],
+                             {"medicos_outbox_items": {'status="pending"': 2}})
+    lines = text.splitlines()
+    assert "# TYPE medicos_stage_duration_seconds histogram" in lines
+    assert 'medicos_documents_processed_total{process="main"} 4' in lines
+    assert 'medicos_emails_total{process="outbox_drainer",outcome="sent"} 1' in lines
+    assert 'medicos_stage_duration_seconds_bucket{process="main",stage="convert_to_pdf",le="0.005"} 1' in lines
+    assert 'medicos_stage_duration_seconds_bucket{process="main",stage="convert_to_pdf",le="10"} 3' in lines
+    assert 'medicos_stage_duration_seconds_bucket{process="main",stage="convert_to_pdf",le="+Inf"} 3' in lines
+    assert 'medicos_stage_duration_seconds_count{process="main",stage="convert_to_pdf"} 3' in lines
+    assert 'medicos_outbox_items{status="pending"} 2' in lines
+    # Metrics nobody reported are left out entirely
+    assert "medicos_cycles_total" not in text
+
+
+def test_time_stage_feeds_registry():
+    registry = MetricsRegistry("test", tempfile.mkdtemp(), autosave_seconds=None)
+    stage_timings.add_listener(
+        lambda stage, seconds: registry.observe("medicos_stage_duration_seconds", seconds, stage=stage))
+    with time_stage("redcap_fetch"):
+        pass
+    stage_timings.reset()
+    series = registry.snapshot()["histograms"]["medicos_stage_duration_seconds"]
+    assert series['stage="redcap_fetch"']["count"] == 1
+
+
+def test_only_entry_points_persist():
+    """Importing the global registry writes nothing; persist() saves it at exit"""
+    app_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app')
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=app_dir, METRICS_DIR=os.path.join(tmp, "metrics"))
+        count = "from utils.metrics import metrics; {}metrics.inc('medicos_cycles_total')"
+        subprocess.run([sys.executable, "-c", count.format("")], cwd=tmp, env=env, check=True)
+        assert not os.path.exists(os.path.join(tmp, "metrics"))
+
+        for _ in range(2):
+            subprocess.run([sys.executable, "-c", count.format("metrics.persist(); ")], cwd=tmp, env=env, check=True)
+        snapshot = load_snapshots(os.path.join(tmp, "metrics"))
+        assert [s["counters"]["medicos_cycles_total"][""] for s in snapshot] == [2]
+
+
+if __name__ == "__main__":
+    test_counters_persist_across_runs()
+    test_prometheus_exposition()
+    test_time_stage_feeds_registry()
+    test_only_entry_points_persist()
+    print("\n✅ All metrics tests passed!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Test script for digest mode of mr_dv notifications.
+"""
+
+import os
+import sys
+import time
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from services.notification_digest import DigestEntry, NotificationDigest, render_digest_table
+from services.sas_email_service import SASEmailService
+
+
+def test_batches_by_count():
+    """A full batch is sent as one message per recipient"""
+    print("📬 Testing digest batching by count...")
+    sent = []
+    digest = NotificationDigest(lambda r, entries: sent.append((r, entries)) or True,
+                                window_seconds=3600, max_items=5)
+    for i in range(12):
+        digest.add("a@test", DigestEntry(f"REC{i}_0", "Jane Doe", "Test Hospital"))
+    digest.add("b@test", DigestEntry("OTHER_0"))
+
+    assert [len(entries) for _, entries in sent] == [5, 5]
+    assert digest.pending() == 3
+    digest.flush()
+    assert sorted((r, len(e)) for r, e in sent[2:]) == [("a@test", 2), ("b@test", 1)]
+    assert digest.pending() == 0
+    print("✅ 13 notifications -> 4 digest emails")
+
+
+def test_batches_by_window():
+    """A partial batch is sent once the window elapses"""
+    sent = []
+    digest = NotificationDigest(lambda r, entries: sent.append(entries) or True,
+                                window_seconds=0.1, max_items=100)
+    digest.add("a@test", DigestEntry("REC1_0"))
+    digest.add("a@test", DigestEntry("REC2_0"))
+    time.sleep(0.5)
+    assert len(sent) == 1 and len(sent[0]) == 2
+
+
+def test_digest_table():
+    table = render_digest_table([DigestEntry("REC1_0", "Jane Doe", "Test Hospital", "2025-01-01 10:00:00")])
+    lines = table.splitlines()
+    assert lines[0].startswith("Record ID")
+    assert "REC1_0" in lines[2] and "Jane Doe" in lines[2] and "Test Hospital" in lines[2]
+
+
+def test_sas_service_digest_mode():
+    """The per-record call site is unchanged; one digest body lists every record"""
+    print("📧 Testing SAS email digest mode...")
+    service = SASEmailService(sas_config_path="/nonexistent/sasv9.cfg", background=False, digest=True)
+    delivered = []
+    service._send_email = lambda to, subject, body, settings: delivered.append((to, subject, body)) or True
+    service.digest.max_items = 3
+
+    for i in range(3):
+        assert service.send_mr_dv_notification(f"REC{i}_0", patient_name="Jane Doe", facility_name="Test Hospital")
+
+    assert len(delivered) == 1
+    to, subject, body = delivered[0]
+    assert subject == "Medical Record Request (3 records)"
+    assert all(f"REC{i}_0" in body for i in range(3))
+    print("✅ SAS digest mode working")
+
+
+if __name__ == "__main__":
+    test_batches_by_count()
+    test_batches_by_window()
+    test_digest_table()
+    test_sas_service_digest_mode()
+    print("\n✅ All notification digest tests passed!")
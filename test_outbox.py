@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Test script for the durable outbox used to retry SmartRequest and email side effects.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from utils.outbox import (KIND_EMAIL, KIND_SMARTREQUEST, STATUS_DEAD, STATUS_DONE, STATUS_REVIEW,
+                          NeedsReview, Outbox, make_key)
+
+
+def _outbox(**kwargs) -> Outbox:
+    return Outbox(os.path.join(tempfile.mkdtemp(), "outbox.sqlite3"), **kwargs)
+
+
+def test_enqueue_is_idempotent():
+    """The same record and request type is only queued once"""
+    print("📥 Testing idempotent enqueue...")
+    box = _outbox()
+    key = make_key("MG123_0", "first_request")
+    assert key == "MG123_0:first_request"
+    assert box.enqueue(key, KIND_SMARTREQUEST, {"request": {"a": 1}}, "timeout")
+    assert not box.enqueue(key, KIND_SMARTREQUEST, {"request": {"a": 2}}, "timeout")
+
+    item = box.get(key)
+    assert item.payload == {"request": {"a": 1}}
+    assert item.last_error == "timeout"
+    assert box.stats()["pending"] == 1
+    print("✅ Duplicate enqueue ignored")
+
+
+def test_enqueue_after_done_or_dead():
+    """A new failure for a delivered or abandoned key is queued again"""
+    box = _outbox(max_attempts=1)
+    key = make_key("MG123_0", "mr_dv_email")
+    box.enqueue(key, KIND_EMAIL, {"subject": "old"}, "timeout")
+    box.mark_done(key)
+    assert box.enqueue(key, KIND_EMAIL, {"subject": "new"}, "refused")
+    item = box.get(key)
+    assert (item.status, item.attempts, item.payload, item.last_error) == ("pending", 0, {"subject": "new"}, "refused")
+
+    assert box.mark_failed(key, "relay down") == STATUS_DEAD
+    assert box.enqueue(key, KIND_EMAIL, {"subject": "newer"})
+    assert box.get(key).status == "pending" and box.get(key).payload == {"subject": "newer"}
+
+
+def test_backoff_and_dead_letter():
+    """Failures push the next attempt out exponentially, then give up"""
+    box = _outbox(base_delay=10, max_attempts=3)
+    key = make_key("MG123_0", "mr_dv_email")
+    box.enqueue(key, KIND_EMAIL, {"to_email": "a@test"})
+    assert box.due() == []
+
+    delays = []
+    for _ in range(2):
+        before = time.time()
+        assert box.mark_failed(key, "relay down") == "pending"
+        delays.append(box.get(key).next_attempt_at - before)
+    assert 8 <= delays[0] <= 12 and 16 <= delays[1] <= 24
+
+    assert box.mark_failed(key, "relay down") == STATUS_DEAD
+    assert box.get(key).attempts == 3
+    assert box.due(now=time.time() + 3600) == []
+
+
+def test_drain():
+    """Due items are handed to the handler for their kind"""
+    print("📤 Testing drain...")
+    box = _outbox(base_delay=0)
+    box.enqueue("ok:first_request", KIND_SMARTREQUEST, {"n": 1})
+    box.enqueue("bad:first_request", KIND_SMARTREQUEST, {"n": 2})
+    box.enqueue("mail:mr_dv_email", KIND_EMAIL, {"n": 3})
+
+    seen = []
+    handlers = {
+        KIND_SMARTREQUEST: lambda payload: seen.append(payload["n"]) or payload["n"] == 1,
+        KIND_EMAIL: lambda payload: 1 / 0,
+    }
+    result = box.drain(handlers)
+
+    assert sorted(seen) == [1, 2]
+    assert result == {"delivered": 1, "failed": 2, "dead": 0, "review": 0}
+    assert box.get("ok:first_request").status == STATUS_DONE
+    assert "division by zero" in box.get("mail:mr_dv_email").last_error
+    print("✅ Drain delivered 1 item and rescheduled 2")
+
+
+def test_review_is_not_retried():
+    """An item that may already have been delivered waits for an operator"""
+    box = _outbox(base_delay=0)
+    box.enqueue("timeout:first_request", KIND_SMARTREQUEST, {"n": 1})
+    box.enqueue("gateway:first_request", KIND_SMARTREQUEST, {"n": 2}, "503", status=STATUS_REVIEW)
+
+    def create(payload):
+        raise NeedsReview("request may have been created")
+
+    assert box.drain({KIND_SMARTREQUEST: create}) == {"delivered": 0, "failed": 0, "dead": 0, "review": 1}
+    assert box.get("timeout:first_request").status == STATUS_REVIEW
+    assert box.due(now=time.time() + 10 ** 6) == []
+    assert [item.idempotency_key for item in box.in_review()] == ["gateway:first_request", "timeout:first_request"]
+
+    # A later run's ordinary failure does not put it back into the retry queue
+    assert not box.enqueue("timeout:first_request", KIND_SMARTREQUEST, {"n": 3}, "timeout")
+    assert box.stats()[STATUS_REVIEW] == 2
+
+    assert box.release("timeout:first_request")
+    assert not box.release("timeout:first_request")
+    assert box.drain({KIND_SMARTREQUEST: lambda payload: True})["delivered"] == 1
+    assert box.mark_done("gateway:first_request") and box.in_review() == []
+    print("✅ Items in review are only retried once released")
+
+
+if __name__ == "__main__":
+    test_enqueue_is_idempotent()
+    test_enqueue_after_done_or_dead()
+    test_backoff_and_dead_letter()
+    test_drain()
+    test_review_is_not_retried()
+    print("\n✅ All outbox tests passed!")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Test script for the REDCap log details parser (fast path and general pattern).
+"""
+
+import json
+import os
+import sys
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from utils.filters import parse_details
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), 'app', 'response_1_sample.json')
+
+
+def test_redcap_format():
+    """Quoted values, checkboxes and numbers are converted as before"""
+    print("🔍 Testing parse_details...")
+    details = "mr_req_for = '3', mr_request_dt = '2025-06-22', mr_rec_needs(6) = checked, mr_rec_needs(7) = unchecked, mr_score = '1.5', mr_note = ''"
+    assert parse_details(details) == {
+        "mr_req_for": 3,
+        "mr_request_dt": "2025-06-22",
+        "mr_rec_needs(6)": True,
+        "mr_rec_needs(7)": False,
+        "mr_score": 1.5,
+        "mr_note": "",
+    }
+    print("✅ REDCap format parsed")
+
+
+def test_general_pattern_fallback():
+    """Strings outside the exact REDCap format still parse the same way"""
+    assert parse_details("mr_needs_oth = 'Labs, imaging = all', mr_dv = '1'") == {
+        "mr_needs_oth": "Labs, imaging = all", "mr_dv": 1
+    }
+    assert parse_details('mr_note = "quoted", mr_dv=1') == {"mr_note": "quoted", "mr_dv": 1}
+    assert parse_details("mr_dv   =   ' 1 '") == {"mr_dv": 1}
+    assert parse_details("no pairs here") == {}
+    assert parse_details("") == {}
+
+
+def test_typed_fields():
+    details = "mr_request = '1', mr_request_dt = '2025-06-22', mr_rec_needs(6) = checked"
+    assert parse_details(details, typed_fields={"mr_request"}) == {
+        "mr_request": 1, "mr_request_dt": "2025-06-22", "mr_rec_needs(6)": "checked"
+    }
+
+
+def test_sample_log():
+    with open(SAMPLE_PATH) as f:
+        entries = json.load(f)
+    parsed = parse_details(entries[0]["details"])
+    assert parsed["mr_req_for"] == 3
+    assert parsed["mr_rec_needs(6)"] is True
+    assert parsed["medical_records_request_for_pregnancy_and_birth_complete"] == 0
+
+
+if __name__ == "__main__":
+    test_redcap_format()
+    test_general_pattern_fallback()
+    test_typed_fields()
+    test_sample_log()
+    print("\n✅ All parse_details tests passed!")
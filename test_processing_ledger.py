@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+Test script for the processing ledger that skips already-handled record states.
+"""
+
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from utils.processing_ledger import STATUS_DEAD, STATUS_FAILED, ProcessingLedger, fields_hash, should_skip
+
+DETAILS = {
+    "mr_request": 1,
+    "mr_request_dt": "2025-06-22",
+    "mr_rec_needs(6)": "checked",
+    "medical_records_request_for_pregnancy_and_birth_complete": 0,
+}
+
+
+def _ledger() -> ProcessingLedger:
+    return ProcessingLedger(os.path.join(tempfile.mkdtemp(), "processing_ledger.jsonl"))
+
+
+def test_hash_uses_only_mr_fields():
+    reordered = dict(reversed(list(DETAILS.items())))
+    assert fields_hash(reordered) == fields_hash(DETAILS)
+    assert fields_hash({**DETAILS, "medical_records_request_for_pregnancy_and_birth_complete": 2}) == fields_hash(DETAILS)
+    assert fields_hash({**DETAILS, "mr_rec_needs(9)": "checked"}) != fields_hash(DETAILS)
+
+
+def test_skip_unchanged_records():
+    """A processed record state is skipped until its mr_ fields change"""
+    print("📒 Testing processing ledger...")
+    ledger = _ledger()
+    assert not ledger.is_processed("TNSC1", "first_request", DETAILS)
+    assert ledger.mark_processed("TNSC1", "first_request", DETAILS)
+
+    # Survives a restart
+    ledger = ProcessingLedger(ledger.ledger_file)
+    assert len(ledger) == 1
+    assert ledger.is_processed("TNSC1", "first_request", DETAILS)
+    assert not ledger.is_processed("TNSC1", "second_request_partial", DETAILS)
+    assert not ledger.is_processed("TNSC1", "first_request", {**DETAILS, "mr_request_dt": "2025-06-23"})
+    assert not ledger.is_processed("TNSC2", "first_request", DETAILS)
+    print("✅ Unchanged record skipped, changed record processed")
+
+
+def test_force_override():
+    ledger = _ledger()
+    ledger.mark_processed("TNSC1", "first_request", DETAILS)
+    assert should_skip(ledger, "TNSC1", "first_request", DETAILS)
+    assert not should_skip(ledger, "TNSC1", "first_request", DETAILS, force_records={"TNSC1"})
+    assert should_skip(ledger, "TNSC1", "first_request", DETAILS, force_records={"TNSC9"})
+    assert not should_skip(ledger, "TNSC1", "first_request", DETAILS, force_all=True)
+
+
+def test_torn_line_ignored():
+    ledger = _ledger()
+    ledger.mark_processed("TNSC1", "first_request", DETAILS)
+    with open(ledger.ledger_file, "a") as f:
+        f.write('{"key": "TNSC2:first_re')
+    assert len(ProcessingLedger(ledger.ledger_file)) == 1
+
+
+def test_failures_are_dead_lettered():
+    """A record state that keeps failing is given up on after max_attempts runs"""
+    ledger = ProcessingLedger(os.path.join(tempfile.mkdtemp(), "processing_ledger.jsonl"), max_attempts=3)
+    assert ledger.mark_failed("TNSC1", "first_request", DETAILS) == STATUS_FAILED
+    assert not should_skip(ledger, "TNSC1", "first_request", DETAILS)
+    assert ledger.mark_failed("TNSC1", "first_request", DETAILS) == STATUS_FAILED
+
+    ledger = ProcessingLedger(ledger.ledger_file, max_attempts=3)
+    assert ledger.mark_failed("TNSC1", "first_request", DETAILS) == STATUS_DEAD
+    assert should_skip(ledger, "TNSC1", "first_request", DETAILS)
+    assert not ledger.is_processed("TNSC1", "first_request", DETAILS)
+    assert not should_skip(ledger, "TNSC1", "first_request", DETAILS, force_records={"TNSC1"})
+    print("✅ Repeated failures dead-lettered")
+
+
+def test_document_steps():
+    """Steps that succeeded are skipped when the record is retried, unless it is forced"""
+    ledger = _ledger()
+    assert ledger.step_key("TNSC1_0", "pdf") is None
+    with ledger.record("TNSC1", "first_request", DETAILS):
+        step = ledger.step_key("TNSC1_0", "pdf")
+        assert not ledger.step_done(step)
+        assert ledger.mark_step_done(step)
+        assert ledger.step_done(step)
+        assert not ledger.step_done(ledger.step_key("TNSC1_1", "pdf"))
+
+    ledger = ProcessingLedger(ledger.ledger_file)
+    with ledger.record("TNSC1", "first_request", DETAILS):
+        assert ledger.step_done(ledger.step_key("TNSC1_0", "pdf"))
+    with ledger.record("TNSC1", "first_request", {**DETAILS, "mr_request_dt": "2025-06-23"}):
+        assert not ledger.step_done(ledger.step_key("TNSC1_0", "pdf"))
+    with ledger.record("TNSC1", "first_request", DETAILS, redo=True):
+        assert not ledger.step_done(ledger.step_key("TNSC1_0", "pdf"))
+    assert not ledger.is_processed("TNSC1", "first_request", DETAILS)
+
+
+def test_retry_skips_submitted_documents():
+    """Retrying a record does not submit its SmartRequests or emails a second time"""
+    import services.record_service as record_service
+
+    submitted, emailed = [], []
+    originals = (record_service.processing_ledger, record_service.get_datavant_request_data,
+                 record_service.submit_datavant_request, record_service.get_sas_email_service)
+    record_service.processing_ledger = ledger = _ledger()
+    record_service.get_datavant_request_data = lambda item, request_for: SimpleNamespace(
+        model_dump=lambda **kwargs: {"patient": item.mg_idpreg})
+    record_service.submit_datavant_request = lambda request: submitted.append(request) or {"requestId": "9"}
+    record_service.get_sas_email_service = lambda: SimpleNamespace(
+        send_mr_dv_notification=lambda **kwargs: emailed.append(kwargs["record_id"]) or True)
+    # The outbox and the trackers write under logs/ of the working directory
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp())
+    try:
+        item = SimpleNamespace(mg_idpreg="TNSC000000001")
+        for attempt in range(2):
+            with ledger.record("TNSC1", "first_request", DETAILS):
+                record_service.handle_datavant_request(item, 0, "first_request", "1")
+                record_service.send_mr_dv_notification(item, 1)
+    finally:
+        os.chdir(cwd)
+        (record_service.processing_ledger, record_service.get_datavant_request_data,
+         record_service.submit_datavant_request, record_service.get_sas_email_service) = originals
+    assert len(submitted) == 1
+    assert emailed == ["TNSC000000001_1"]
+    print("✅ A retried record repeats no SmartRequest or email that already went out")
+
+
+if __name__ == "__main__":
+    test_hash_uses_only_mr_fields()
+    test_skip_unchanged_records()
+    test_force_override()
+    test_torn_line_ignored()
+    test_failures_are_dead_lettered()
+    test_document_steps()
+    test_retry_skips_submitted_documents()
+    print("\n✅ All processing ledger tests passed!")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Test script for the slotted REDCap record models and their to_dict output.
+"""
+
+import os
+import sys
+from dataclasses import replace
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from models.redcap_response_first import RedcapResponseFirst
+from models.redcap_response_second import TEMPLATE_FIELDS, RedcapResponseSecond
+from utils.filters import field_names, filter_records
+
+
+def test_to_dict():
+    """Template keys, SSN masking and the mr_dev alias"""
+    print("🧾 Testing RedcapResponseSecond.to_dict...")
+    record = RedcapResponseSecond(mg_idpreg="P1", bc_momssn="123456789", mr_dv="1",
+                                  mr_rec_needs___1="1", mr_needs_oth="Labs")
+    values = record.to_dict()
+    assert list(values) == list(TEMPLATE_FIELDS) + ["mr_dev"]
+    assert values["mg_idpreg"] == "P1"
+    assert values["bc_momssn"] == "6789" and values["bc_childssn"] == ""
+    assert values["mr_dev"] == "1"
+    assert values["mr_rec_needs___1"] == "☑" and values["mr_rec_needs___2"] == "☐"
+    assert values["mr_needs_oth"] == " Labs"
+    print("✅ to_dict output is unchanged")
+
+
+def test_slots():
+    record = RedcapResponseSecond(mg_idpreg="P1")
+    assert not hasattr(record, "__dict__")
+    record.hospital_mr = "H1"
+    copy = replace(record)
+    assert copy.hospital_mr == "H1" and copy.mg_idpreg == "P1"
+    try:
+        record.not_a_field = "x"
+        assert False, "slotted model accepted an unknown attribute"
+    except AttributeError:
+        pass
+
+
+def test_filter_records():
+    rows = [{"timestamp": "2025-06-22 14:30", "username": "u", "action": "Update",
+             "details": {}, "record": "A", "extra": "dropped"}]
+    [record] = filter_records(rows, RedcapResponseFirst)
+    assert record.record == "A"
+    assert field_names(RedcapResponseFirst) is field_names(RedcapResponseFirst)
+    assert "extra" not in field_names(RedcapResponseFirst)
+
+
+if __name__ == "__main__":
+    test_to_dict()
+    test_slots()
+    test_filter_records()
+    print("\n✅ All record model tests passed!")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""
+Test script for the PDF render pool (inline and worker-process modes).
+"""
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+# Add app directory to path
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'app'))
+
+from fake_responses import generate_fake_detail_record
+import docx2pdf
+import services.render_pool as render_pool_module
+from services.render_pool import RenderPool
+import services.record_service as record_service
+import utils.dashboard_tracker as dashboard_tracker_module
+from utils.timing import record_timing
+
+TEMPLATE = os.path.join(REPO_ROOT, "assets", "templates", "combined_template.docx")
+
+
+def make_job(i, template_path=TEMPLATE):
+    item = generate_fake_detail_record(f"TNSC00000000{i}", 1)[0]
+    return {"template_path": template_path, "data": item.to_dict(), "request_type": "first_request",
+            "mg_idpreg": item.mg_idpreg, "j": 0, "keep_docx": True}
+
+
+def test_inline_pool():
+    print("🧵 Testing render pool...")
+    pool = RenderPool(workers=1)
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with pool.collect("RECORD_A"):
+                assert pool.submit(make_job(1, "missing_template.docx"), lambda r: results.append(r) or False) is False
+            with pool.collect("RECORD_B"):
+                pool.submit(make_job(2), lambda r: results.append(r) or True)
+        finally:
+            os.chdir(cwd)
+    assert "FileNotFoundError" in results[0]["error"]
+    assert "fill_template" in results[1]["timings"]
+    assert pool.wait() == {"RECORD_A"}
+    assert pool.wait() == set()
+    print("✅ One worker renders inline and reports failed records")
+
+
+def test_process_pool():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            pool = RenderPool(workers=2, template_dir=os.path.join(REPO_ROOT, "assets", "templates"),
+                              max_pending=2)
+            results, threads = {}, set()
+
+            def on_done(i):
+                def done(result):
+                    threads.add(threading.get_ident())
+                    results[i] = result
+                    return result["error"] is None
+                return done
+
+            for i in range(5):
+                with pool.collect(f"RECORD_{i}"):
+                    # Queued: the result is not known yet
+                    assert pool.submit(make_job(i), on_done(i)) is True
+            failed = pool.wait()
+            pool.shutdown()
+        finally:
+            os.chdir(cwd)
+
+        assert sorted(results) == list(range(5))
+        assert threads == {threading.get_ident()}, "callbacks run in the submitting thread"
+        for i, result in results.items():
+            assert result["timings"]["fill_template"] > 0
+            assert os.path.exists(os.path.join(tmp, result["docx_path"]))
+            # PDF conversion needs Word: elsewhere each job reports the error instead
+            assert (result["pdf_path"] is not None) != (result["error"] is not None)
+        assert failed == {f"RECORD_{i}" for i, result in results.items() if result["error"]}
+    print(f"✅ 5 jobs rendered on 2 worker processes ({len(failed)} reported conversion errors)")
+
+
+def test_completion_waits_for_render():
+    cwd = os.getcwd()
+    original_pool, original_tracker = record_service.render_pool, dashboard_tracker_module.dashboard_tracker
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(os.path.join(REPO_ROOT, "assets", "templates"), os.path.join(tmp, "assets", "templates"))
+        os.chdir(tmp)
+        tracker = dashboard_tracker_module.dashboard_tracker = dashboard_tracker_module.DashboardTracker(
+            os.path.join(tmp, "dashboard_tracking.json"))
+        pool = record_service.render_pool = RenderPool(workers=2, template_dir=os.path.join(tmp, "assets", "templates"))
+        try:
+            item = generate_fake_detail_record("TNSC000000007", 1)[0]
+            first_data = SimpleNamespace(timestamp="2026-10-01 09:00", username="tester", details={})
+            with record_timing() as timings:
+                assert record_service.handle_pdf_generation(item, "first_request", first_data, 0, timings) is True
+            record_service._document_part_done(f"{item.mg_idpreg}_0", timings)
+            # Queued on a worker: the document is not complete yet
+            assert tracker.get_all_records()[0].processing_duration is None
+
+            pool.wait()
+            pool.shutdown()
+            record = tracker.get_all_records()[0]
+        finally:
+            record_service.render_pool, dashboard_tracker_module.dashboard_tracker = original_pool, original_tracker
+            os.chdir(cwd)
+    assert record.processing_duration >= record.stage_timings["fill_template"] > 0
+    print("✅ A document is completed with its worker's stage timings once the render finished")
+
+
+def test_workers_take_turns_with_word():
+    """Without a Word instance per worker, docx2pdf conversions never overlap"""
+    if multiprocessing.get_start_method() != "fork":
+        print("⏭️ Needs fork start method to patch docx2pdf in the workers")
+        return
+    cwd = os.getcwd()
+    original_convert, original_throttle = docx2pdf.convert, render_pool_module.PDF_THROTTLE_SECONDS
+    with tempfile.TemporaryDirectory() as tmp:
+        spans_file = os.path.join(tmp, "spans.txt")
+
+        def fake_convert(docx_path, pdf_path):
+            started = time.time()
+            time.sleep(0.2)
+            with open(spans_file, "a") as f:
+                f.write(f"{started} {time.time()}\n")
+
+        docx2pdf.convert, render_pool_module.PDF_THROTTLE_SECONDS = fake_convert, 0
+        os.chdir(tmp)
+        try:
+            pool = RenderPool(workers=3, template_dir=os.path.join(REPO_ROOT, "assets", "templates"))
+            results = []
+            for i in range(6):
+                pool.submit(make_job(i), lambda result: results.append(result) or result["error"] is None)
+            assert pool.wait() == set()
+            pool.shutdown()
+        finally:
+            docx2pdf.convert, render_pool_module.PDF_THROTTLE_SECONDS = original_convert, original_throttle
+            os.chdir(cwd)
+        with open(spans_file) as f:
+            spans = sorted(tuple(map(float, line.split())) for line in f)
+    assert len(spans) == 6
+    assert all(end <= next_start for (_, end), (next_start, _) in zip(spans, spans[1:])), spans
+    print("✅ Workers sharing Word convert one document at a time")
+
+
+def test_worker_logs_reach_stdout():
+    """Log lines of the worker processes are written out like the parent's"""
+    script = (
+        "from utils.logger import configure_logging, shutdown_logging\n"
+        "from services.render_pool import RenderPool\n"
+        "import test_render_pool\n"
+        "configure_logging('INFO')\n"
+        "pool = RenderPool(workers=2, template_dir=test_render_pool.os.path.dirname(test_render_pool.TEMPLATE))\n"
+        "pool.submit(test_render_pool.make_job(1), lambda result: True)\n"
+        "pool.shutdown()\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(REPO_ROOT, 'app'), REPO_ROOT]),
+                   PDF_THROTTLE_SECONDS="0")
+        result = subprocess.run([sys.executable, "-c", script], cwd=tmp, env=env,
+                                capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert "📄 Output PDF path" in result.stdout, result.stdout
+    print("✅ Render workers log to stdout")
+
+
+if __name__ == "__main__":
+    test_inline_pool()
+    test_process_pool()
+    test_completion_waits_for_render()
+    test_workers_take_turns_with_word()
+    test_worker_logs_reach_stdout()
+    print("\n✅ All render pool tests passed!")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Test script for the batch request classifier against the per-record validators.
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from fake_responses import generate_fake_log_responses
+from models.redcap_response_first import RedcapResponseFirst
+from utils.filters import filter_records, get_latest_records
+from utils.request_classifier import PANDAS_AVAILABLE, classify_requests, summarize
+from utils.validators import (is_first_request, is_second_request_manual_not_received,
+                              is_second_request_partial_received)
+
+VALIDATORS = (
+    ("first_request", is_first_request),
+    ("second_request_complete", is_second_request_manual_not_received),
+    ("second_request_partial", is_second_request_partial_received),
+)
+
+EDGE_DETAILS = [
+    {"mr_request": 1, "mr_request_dt": "2025-06-22", "mr_request_dt_2": ""},
+    {"mr_request": True, "mr_request_dt": "2025-06-22", "mr_request_dt_2": "0"},
+    {"mr_request": "unchecked", "mr_request_dt": "2025-06-22"},
+    {"mr_request": " 1 ", "mr_request_dt": " ", "mr_request_dt_2": None},
+    {"mr_request_2": "1", "mr_request_dt_2": "2025-06-22"},
+    {"mr_request_2": "1", "mr_request_dt_2": "2025-06-22", "mr_rec_needs(6)": True},
+    {"mr_request_2": "1", "mr_request_dt_2": "2025-06-22", "mr_rec_needs(6)": "unchecked"},
+    {"mr_request_2": 1.0, "mr_request_dt_2": 20250622, "mr_needs_oth": "FALSE"},
+    {"mr_request": 1, "mr_request_dt": "2025-06-22", "mr_request_2": 1, "mr_request_dt_2": "2025-06-23"},
+    {"mr_request": 0, "mr_request_2": 0},
+    {},
+]
+
+
+def _records(details_list):
+    return [RedcapResponseFirst(timestamp="2025-06-22 14:30", username="u", action="Update",
+                                details=details, record=f"R{i}") for i, details in enumerate(details_list)]
+
+
+def validator_types(records):
+    """Request type chosen by trying each validator in turn, as main.py used to"""
+    result = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for record in records:
+            result.append(next((name for name, matches in VALIDATORS if matches(record)), None))
+    return result
+
+
+def test_matches_validators():
+    print("🗂️ Testing request classifier...")
+    generated = filter_records(get_latest_records(generate_fake_log_responses(3000, 1000, seed=7)),
+                               RedcapResponseFirst)
+    for records in (_records(EDGE_DETAILS), generated):
+        expected = validator_types(records)
+        assert classify_requests(records, engine="python") == expected
+        if PANDAS_AVAILABLE:
+            assert classify_requests(records, engine="pandas") == expected
+    print("✅ Classifier agrees with the validators")
+
+
+def test_engines_and_summary():
+    assert classify_requests([]) == []
+    assert classify_requests([], engine="pandas" if PANDAS_AVAILABLE else "python") == []
+    try:
+        classify_requests([], engine="numba")
+        assert False, "unknown engine accepted"
+    except ValueError:
+        pass
+    assert summarize(["first_request", None, "first_request"]) == "first_request=2, none=1"
+
+
+if __name__ == "__main__":
+    test_matches_validators()
+    test_engines_and_summary()
+    print("\n✅ All request classifier tests passed!")
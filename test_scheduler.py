@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Test script for the daemon scheduler: cron parsing, cycle lock and stop handling.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from utils.scheduler import CronSchedule, CycleLock, IntervalSchedule, run_scheduled, upcoming
+
+
+def test_cron_next_run():
+    """Common expressions land on the expected minutes"""
+    print("🕒 Testing cron expressions...")
+    start = datetime(2025, 6, 22, 14, 7, 30)  # a Sunday
+    assert CronSchedule("*/15 * * * *").next_after(start) == datetime(2025, 6, 22, 14, 15)
+    assert CronSchedule("0 6 * * *").next_after(start) == datetime(2025, 6, 23, 6, 0)
+    assert CronSchedule("30 8 * * 1-5").next_after(start) == datetime(2025, 6, 23, 8, 30)
+    assert CronSchedule("0 0 1 * *").next_after(start) == datetime(2025, 7, 1, 0, 0)
+    assert CronSchedule("0 12 * * 0").next_after(start) == datetime(2025, 6, 29, 12, 0)
+    assert CronSchedule("0 0 29 2 *").next_after(start) == datetime(2028, 2, 29, 0, 0)
+    assert [run.minute for run in upcoming(CronSchedule("5,35 * * * *"), 3, start)] == [35, 5, 35]
+    print("✅ Cron schedule working")
+
+
+def test_invalid_cron():
+    for expression in ("* * * *", "61 * * * *", "*/0 * * * *"):
+        try:
+            CronSchedule(expression)
+            assert False, f"accepted {expression}"
+        except ValueError:
+            pass
+
+
+def test_cycle_lock():
+    """A second holder cannot take the lock until it is released"""
+    lock_file = os.path.join(tempfile.mkdtemp(), "main.lock")
+    first, second = CycleLock(lock_file), CycleLock(lock_file)
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+def test_stop_event_ends_loop():
+    """Cycles run on schedule until the stop event is set"""
+    stop_event = threading.Event()
+    cycles = []
+
+    def job():
+        cycles.append(datetime.now())
+        if len(cycles) == 3:
+            stop_event.set()
+
+    run_scheduled(job, IntervalSchedule(0.05), stop_event,
+                  lock=CycleLock(os.path.join(tempfile.mkdtemp(), "main.lock")))
+    assert len(cycles) == 3
+
+
+if __name__ == "__main__":
+    test_cron_next_run()
+    test_invalid_cron()
+    test_cycle_lock()
+    test_stop_event_ends_loop()
+    print("\n✅ All scheduler tests passed!")
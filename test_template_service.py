@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Test script for in-memory template rendering and buffer-to-PDF conversion.
+"""
+
+import os
+import sys
+import tempfile
+import zipfile
+
+# Add app directory to path
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'app'))
+
+import docx2pdf
+
+import services.pdf_service as pdf_service_module
+import services.template_service as template_service_module
+from fake_responses import generate_fake_detail_record
+from services.pdf_service import PDFService
+from services.template_service import TemplateService
+
+TEMPLATE = os.path.join(REPO_ROOT, "assets", "templates", "combined_template.docx")
+
+
+def test_render_in_memory():
+    print("📄 Testing template rendering...")
+    item = generate_fake_detail_record("TNSC000000001", 1)[0]
+    data = item.to_dict()
+    with tempfile.TemporaryDirectory() as tmp:
+        original_output_dir = template_service_module.output_dir
+        template_service_module.output_dir = tmp
+        try:
+            service = TemplateService(TEMPLATE)
+            document = service.render(data)
+            assert os.listdir(tmp) == [], "render must not write files"
+
+            xml = zipfile.ZipFile(document).read("word/document.xml").decode("utf-8")
+            assert "#mg_idpreg#" not in xml
+            assert data["mg_idpreg"] in xml
+
+            path = service.save_docx(document, "first_request", data["mg_idpreg"], 0)
+            assert path.endswith(os.path.join("first_request", "TNSC000000001_0.docx"))
+            with open(path, "rb") as f:
+                assert f.read() == document.getvalue()
+        finally:
+            template_service_module.output_dir = original_output_dir
+    print("✅ Template filled in memory; .docx written only on request")
+
+
+def test_convert_buffer():
+    converted = []
+
+    def fake_convert(source, destination):
+        with open(source, "rb") as f:
+            converted.append((source, destination, f.read()))
+
+    original_convert = docx2pdf.convert
+    docx2pdf.convert = fake_convert
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            original_output_dir = pdf_service_module.output_dir
+            pdf_service_module.output_dir = tmp
+            try:
+                item = generate_fake_detail_record("TNSC000000002", 1)[0]
+                document = TemplateService(TEMPLATE).render(item.to_dict())
+                pdf_path = PDFService().convert_to_pdf(document, "first_request", "TNSC000000002_0")
+            finally:
+                pdf_service_module.output_dir = original_output_dir
+    finally:
+        docx2pdf.convert = original_convert
+
+    source, destination, content = converted[0]
+    assert content == document.getvalue()
+    assert not source.startswith(tmp), "the buffer is spooled outside the output directory"
+    assert not os.path.exists(source), "the spooled file is removed"
+    assert destination.replace(os.sep, "/") == pdf_path
+    assert pdf_path.endswith("first_request/TNSC000000002_0.pdf")
+    print("✅ In-memory .docx converted through a temporary spool file")
+
+
+if __name__ == "__main__":
+    test_render_in_memory()
+    test_convert_buffer()
+    print("\n✅ All template service tests passed!")
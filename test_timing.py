@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Test script for stage timing histograms, per-record timings and the run summary.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+
+# Add app directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from utils.dashboard_tracker import DashboardTracker
+from utils.timing import Histogram, StageTimings, record_timing, stage_timings, time_stage
+
+
+def test_histogram_quantiles():
+    print("⏱️ Testing stage timing...")
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in [0.005] * 50 + [0.05] * 45 + [0.5] * 5:
+        histogram.observe(value)
+    assert histogram.count == 100 and histogram.bucket_counts == [50, 45, 5, 0]
+    assert histogram.quantile(0.50) == 0.01
+    assert 0.01 < histogram.quantile(0.95) <= 0.1
+    assert 0.1 < histogram.quantile(0.99) <= 0.5
+    histogram.observe(7.0)
+    assert histogram.quantile(1.0) == 7.0
+    assert Histogram().quantile(0.5) is None
+    print("✅ Quantiles come from the right buckets")
+
+
+def test_time_stage_and_record_timing():
+    stage_timings.reset()
+    with record_timing() as timings:
+        with time_stage("fill_template"):
+            pass
+        try:
+            with time_stage("convert_to_pdf"):
+                raise RuntimeError("Word is not installed")
+        except RuntimeError:
+            pass
+        with time_stage("fill_template"):
+            pass
+        # Stages timed on other threads (the email worker) stay out of this record
+        thread_timer = threading.Thread(target=lambda: stage_timings.observe("email_send", 0.2))
+        thread_timer.start()
+        thread_timer.join()
+    with time_stage("redcap_log_fetch"):
+        pass
+
+    assert set(timings.stages) == {"fill_template", "convert_to_pdf"}
+    assert timings.total >= sum(timings.stages.values())
+    summary = stage_timings.summary()
+    assert summary["fill_template"]["count"] == 2
+    assert summary["email_send"]["count"] == 1 and summary["redcap_log_fetch"]["count"] == 1
+    stage_timings.reset()
+    assert len(stage_timings) == 0
+
+
+def test_run_summary_and_tracker():
+    directory = tempfile.mkdtemp()
+    timings = StageTimings()
+    timings.observe("fill_template", 0.02)
+    lines = timings.format_summary()
+    assert lines[1].split()[:2] == ["fill_template", "1"]
+    path = os.path.join(directory, "run_summaries.jsonl")
+    timings.write_summary(path, documents=1)
+    timings.write_summary(path, documents=0)
+    with open(path) as f:
+        entries = [json.loads(line) for line in f]
+    assert len(entries) == 2 and entries[0]["stages"]["fill_template"]["p50"] == 0.02
+
+    tracker = DashboardTracker(os.path.join(directory, "dashboard_tracking.json"))
+    tracker.start_processing("P1_0", "first_request")
+    assert tracker.complete_processing("P1_0", 1.5, {"fill_template": 1.2, "convert_to_pdf": 0.3})
+    [record] = tracker.get_all_records()
+    assert record.processing_duration == 1.5
+    assert record.stage_timings == {"fill_template": 1.2, "convert_to_pdf": 0.3}
+
+
+if __name__ == "__main__":
+    test_histogram_quantiles()
+    test_time_stage_and_record_timing()
+    test_run_summary_and_tracker()
+    print("\n✅ All timing tests passed!")